@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+
+from openprocurement.auction.texas.amount import Amount
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+ACK_MEMORY = 'memory'
+ACK_JOURNAL = 'journal'
+ACK_DATABASE = 'database'
+ACKNOWLEDGEMENT_LEVELS = (ACK_MEMORY, ACK_JOURNAL, ACK_DATABASE)
+
+
+class BidsJournal(object):
+    """
+    Local append-only file of accepted bids, one JSON object per line.
+    Every record is flushed and synced to disk before append returns.
+    Records are dropped once auction document with their bids is saved to
+    database, records left in journal after worker restart are replayed.
+
+    Attributes:
+    path: path of the journal file
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def append(self, record):
+        journal = self._open()
+        journal.write(json.dumps(record, sort_keys=True) + '\n')
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    def position(self):
+        """
+        Return size of journal, records written before it are the ones
+        which are already committed to auction document
+        """
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def read(self):
+        """
+        Return records of journal, incomplete record written when worker
+        crashed is skipped
+        """
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'rb') as journal:
+            for line in journal:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    LOGGER.warning("Skip broken record of bids journal {}".format(self.path))
+        return records
+
+    def truncate(self, position):
+        """
+        Drop records written before position, records appended after it
+        are kept
+        """
+        with open(self.path, 'rb') as journal:
+            rest = journal.read()[position:]
+        journal = self._open()
+        journal.seek(0)
+        journal.truncate()
+        journal.write(rest)
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BidAcknowledgement(object):
+    """
+    Point at which accepted bid is answered to bidder:
+
+    database: after auction document with the bid is saved to database,
+    bid survives worker crash (default)
+    journal: after bid is appended to local journal file and synced to
+    disk, document is saved to database in background, bids which were not
+    saved are replayed from journal when worker is started again, so journal
+    directory must be on persistent disk
+    memory: after auction document is changed in memory, document is saved
+    to database in background, bid is lost if worker crashes before that
+
+    Attributes:
+    level: one of ACKNOWLEDGEMENT_LEVELS
+    :type level: str
+    journal: journal of accepted bids for journal level
+    :type journal: BidsJournal
+    """
+
+    def __init__(self, level=ACK_DATABASE, auction_id='', journal_dir=None):
+        if level not in ACKNOWLEDGEMENT_LEVELS:
+            raise ValueError(
+                'Bid acknowledgement level must be one of {}, not {}'.format(ACKNOWLEDGEMENT_LEVELS, level)
+            )
+        self.level = level
+        self.journal = None
+        if level == ACK_JOURNAL:
+            if not journal_dir:
+                raise ValueError('Bid acknowledgement level {} requires journal_dir'.format(ACK_JOURNAL))
+            self.journal = BidsJournal(os.path.join(journal_dir, '{}_bids.journal'.format(auction_id)))
+
+    @classmethod
+    def from_config(cls, config, auction_id):
+        """
+        :param config: acknowledgement level name or mapping with 'level'
+                       and 'journal_dir' keys, journal_dir is required
+                       for journal level
+        """
+        if not isinstance(config, dict):
+            config = {'level': config or ACK_DATABASE}
+        return cls(auction_id=auction_id, **config)
+
+    @property
+    def durable(self):
+        """
+        Whether database save must be confirmed before answering bidder
+        """
+        return self.level == ACK_DATABASE
+
+    def record(self, stage_index, bid):
+        """
+        Record accepted bid according to acknowledgement level, it is
+        called after bid is committed to auction document in memory
+        """
+        if self.journal is not None:
+            self.journal.append({
+                'stage': stage_index,
+                'bidder_id': bid['bidder_id'],
+                'amount': Amount.from_value(bid['amount']).to_value(),
+                'time': bid['time'],
+            })
+
+    def checkpoint(self):
+        """
+        Return position of journal before auction document is saved
+
+        :return: position of journal or None if bids are not journaled
+        """
+        if self.journal is not None:
+            return self.journal.position()
+
+    def confirm(self, checkpoint):
+        """
+        Drop journal records of bids which are saved to database
+
+        :param checkpoint: position returned by checkpoint before save
+        """
+        if self.journal is not None and checkpoint:
+            self.journal.truncate(checkpoint)
+
+    def pending(self):
+        """
+        Return journaled bids which could be not saved to database
+        """
+        if self.journal is None:
+            return []
+        return self.journal.read()
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import deque
+from contextlib import contextmanager
+from time import time
+
+from gevent.event import Event
+
+from openprocurement.auction.texas.metrics import METRICS
+from openprocurement.auction.texas.tracing import record
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+
+class AdmissionError(Exception):
+    """
+    Bid was not admitted for processing
+    """
+
+
+class BidsQueueFull(AdmissionError):
+    pass
+
+
+class BidsQueueTimeout(AdmissionError):
+    pass
+
+
+class BidReplaced(AdmissionError):
+    pass
+
+
+class _PendingBid(object):
+    __slots__ = ('bidder_id', 'enqueued', 'turn', 'replaced')
+
+    def __init__(self, bidder_id):
+        self.bidder_id = bidder_id
+        self.enqueued = time()
+        self.turn = Event()
+        self.replaced = False
+
+
+class BidsQueue(object):
+    """
+    Admission queue which lets bids through one at a time in order they
+    arrived. Bid which came while another one is processed waits for its
+    turn instead of being rejected. Only the latest waiting bid of bidder is
+    kept: newer bid takes place of the previous one in the queue and the
+    previous one is answered as replaced.
+
+    Attributes:
+    semaphore: semaphore of server actions, which is held by admitted bid
+    :type semaphore: gevent.lock.BoundedSemaphore
+    timeout: maximum number of seconds bid could wait for admission
+    :type timeout: float
+    max_depth: maximum number of waiting bids, bids above it are rejected
+    :type max_depth: int
+    _queue: waiting bids in order of arrival
+    :type _queue: collections.deque
+    _pending: waiting bids by bidder identifiers
+    :type _pending: dict
+    _active: bid which is processed at the moment
+    :type _active: _PendingBid
+    """
+
+    def __init__(self, semaphore, timeout=10, max_depth=100):
+        self.semaphore = semaphore
+        self.timeout = float(timeout)
+        self.max_depth = int(max_depth)
+        self._queue = deque()
+        self._pending = {}
+        self._active = None
+
+    def __len__(self):
+        return len(self._queue)
+
+    def _update_depth(self):
+        METRICS.set_gauge('bids_queue.depth', len(self._queue))
+
+    def _enqueue(self, bidder_id):
+        pending_bid = _PendingBid(bidder_id)
+        previous_bid = self._pending.get(bidder_id)
+        if previous_bid is not None:
+            # Newer bid keeps place of the replaced one
+            for position, queued_bid in enumerate(self._queue):
+                if queued_bid is previous_bid:
+                    self._queue[position] = pending_bid
+                    break
+            previous_bid.replaced = True
+            previous_bid.turn.set()
+            METRICS.increment('bids_queue.coalesced')
+        elif len(self._queue) >= self.max_depth:
+            METRICS.increment('bids_queue.rejected')
+            raise BidsQueueFull(u'Too many bids are waiting for processing')
+        else:
+            self._queue.append(pending_bid)
+        self._pending[bidder_id] = pending_bid
+        self._update_depth()
+        self._dispatch()
+        return pending_bid
+
+    def _dispatch(self):
+        if self._active is None and self._queue:
+            pending_bid = self._queue.popleft()
+            del self._pending[pending_bid.bidder_id]
+            self._active = pending_bid
+            self._update_depth()
+            METRICS.observe('bids_queue.wait', time() - pending_bid.enqueued)
+            pending_bid.turn.set()
+
+    def _cancel(self, pending_bid):
+        """
+        Remove bid from the queue if it is still waiting
+
+        :return: True if bid was removed
+        """
+        if self._pending.get(pending_bid.bidder_id) is not pending_bid:
+            return False
+        self._queue.remove(pending_bid)
+        del self._pending[pending_bid.bidder_id]
+        self._update_depth()
+        METRICS.increment('bids_queue.timeouts')
+        return True
+
+    def _release(self, pending_bid):
+        if self._active is pending_bid:
+            self._active = None
+            self._dispatch()
+
+    @contextmanager
+    def admit(self, bidder_id):
+        """
+        Wait until bid of bidder could be processed. Bid is processed inside
+        the block with server actions semaphore acquired and the next bid is
+        admitted on exit from the block.
+
+        :param bidder_id: identifier of bidder who made the bid
+        :raises BidsQueueFull: there are too many bids waiting
+        :raises BidsQueueTimeout: bid was not admitted within timeout
+        :raises BidReplaced: newer bid of the same bidder came while waiting
+        """
+        pending_bid = self._enqueue(bidder_id)
+        deadline = pending_bid.enqueued + self.timeout
+        if not pending_bid.turn.wait(self.timeout) and self._cancel(pending_bid):
+            raise BidsQueueTimeout(u'Bid was not processed in time, try again')
+        if pending_bid.replaced:
+            raise BidReplaced(u'Bid was replaced by newer bid')
+        try:
+            if not self.semaphore.acquire(timeout=max(deadline - time(), 0)):
+                METRICS.increment('bids_queue.timeouts')
+                raise BidsQueueTimeout(u'Bid was not processed in time, try again')
+            record('bid.admission', time() - pending_bid.enqueued)
+            try:
+                yield
+            finally:
+                self.semaphore.release()
+        finally:
+            self._release(pending_bid)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import total_ordering
+
+MINOR_UNITS = 100
+MINOR_UNIT = Decimal('0.01')
+
+
+class AmountPrecisionError(ValueError):
+    """
+    Amount has more decimal places than minor units allow
+    """
+
+
+@total_ordering
+class Amount(object):
+    """
+    Fixed point money amount. Value is parsed once into integer number of
+    minor units (cents), so comparison and arithmetic on amounts are
+    integer operations without float drift. Amounts are converted back to
+    numbers only when they are put into auction document or protocol.
+
+    Attributes:
+    units: amount in minor units
+    :type units: int
+    currency: currency code, None if currency is unknown
+    :type currency: unicode
+    """
+    __slots__ = ('units', 'currency')
+
+    def __init__(self, units, currency=None):
+        self.units = int(units)
+        self.currency = currency
+
+    @classmethod
+    def from_value(cls, value, currency=None, rounding=None):
+        """
+        Parse amount from number or its string representation
+
+        :param value: amount in major units, e.g. 150.25
+        :param currency: currency code of amount
+        :param rounding: decimal rounding mode to round value to minor
+                         units with, None to reject value which is not
+                         whole number of minor units
+        :raises ValueError: value is not a valid amount
+        :raises AmountPrecisionError: value is not whole number of minor
+                                      units and rounding is not given
+        """
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, bool):
+            raise ValueError(u'Not a valid amount value')
+        if isinstance(value, (int, long)):
+            return cls(value * MINOR_UNITS, currency)
+        if isinstance(value, float):
+            # repr gives the shortest string which is parsed to the same
+            # float, so 0.1 is read as 0.10 instead of 0.1000000000000000055
+            value = repr(value)
+        try:
+            value = Decimal(value)
+        except (InvalidOperation, TypeError):
+            raise ValueError(u'Not a valid amount value')
+        if not value.is_finite():
+            raise ValueError(u'Not a valid amount value')
+        if rounding is not None:
+            value = value.quantize(MINOR_UNIT, rounding=rounding)
+        elif value != value.quantize(MINOR_UNIT):
+            raise AmountPrecisionError(u'Amount must have at most 2 decimal places')
+        return cls(value * MINOR_UNITS, currency)
+
+    @classmethod
+    def from_document(cls, value):
+        """
+        Parse amount from value object of auction document, e.g.
+        {'amount': 150.25, 'currency': 'UAH'}, or from amount of document.
+        Document amounts are set by procurement, not by bidders, so they
+        are rounded to minor units instead of being rejected.
+
+        :raises ValueError: value is not a valid amount
+        """
+        if isinstance(value, dict):
+            return cls.from_value(value['amount'], value.get('currency'), rounding=ROUND_HALF_UP)
+        return cls.from_value(value, rounding=ROUND_HALF_UP)
+
+    def to_value(self):
+        """
+        Return amount in major units for auction document and protocol
+        """
+        return self.units / float(MINOR_UNITS)
+
+    def _coerce(self, other):
+        other = Amount.from_value(other)
+        if self.currency and other.currency and self.currency != other.currency:
+            raise ValueError(
+                u'Currencies of amounts do not match: {} and {}'.format(self.currency, other.currency)
+            )
+        return other
+
+    def __add__(self, other):
+        other = self._coerce(other)
+        return Amount(self.units + other.units, self.currency or other.currency)
+
+    def __sub__(self, other):
+        other = self._coerce(other)
+        return Amount(self.units - other.units, self.currency or other.currency)
+
+    def __mod__(self, other):
+        other = self._coerce(other)
+        return Amount(self.units % other.units, self.currency or other.currency)
+
+    def __eq__(self, other):
+        try:
+            return self.units == self._coerce(other).units
+        except ValueError:
+            return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        return self.units < self._coerce(other).units
+
+    def __hash__(self):
+        return hash(self.units)
+
+    def __nonzero__(self):
+        return bool(self.units)
+
+    def __float__(self):
+        return self.to_value()
+
+    def __unicode__(self):
+        sign = u'-' if self.units < 0 else u''
+        return u'{}{}.{:02d}'.format(sign, *divmod(abs(self.units), MINOR_UNITS))
+
+    def __str__(self):
+        return unicode(self).encode('utf-8')
+
+    def __repr__(self):
+        return 'Amount({!r}, {!r})'.format(self.units, self.currency)
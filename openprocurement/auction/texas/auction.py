@@ -24,6 +24,7 @@ from openprocurement.auction.utils import (
 from openprocurement.auction.worker_core.constants import TIMEZONE
 
 from openprocurement.auction.texas import utils
+from openprocurement.auction.texas.bids import BidsHandler
 from openprocurement.auction.texas.constants import (
     MULTILINGUAL_FIELDS,
     ADDITIONAL_LANGUAGES,
@@ -36,6 +37,7 @@ from openprocurement.auction.texas.datasource import IDataSource
 from openprocurement.auction.texas.database import IDatabase
 from openprocurement.auction.texas.scheduler import IJobService
 from openprocurement.auction.texas.server import run_server
+from openprocurement.auction.texas.structures import FrozenDict
 from openprocurement.auction.texas.scheduler import SCHEDULER
 
 LOGGER = logging.getLogger('Auction Worker Texas')
@@ -54,7 +56,9 @@ class Auction(object):
         self.retries = 10
         self.bidders_count = 0
         self.bidders_data = []
+        self.bidders_index = FrozenDict()
         self.bids_mapping = {}
+        self.bidders_presentation = FrozenDict()
 
         gsm = getGlobalSiteManager()
 
@@ -78,7 +82,9 @@ class Auction(object):
             self.synchronize_auction_info()
             self.context['auction_data'] = deepcopy(self._auction_data)
             self.context['bidders_data'] = deepcopy(self.bidders_data)
+            self.context['bidders_index'] = self.bidders_index
             self.context['bids_mapping'] = deepcopy(self.bids_mapping)
+            self.context['bidders_presentation'] = self.bidders_presentation
             self.auction_protocol = utils.prepare_auction_protocol(self.context)
             self.context['auction_protocol'] = deepcopy(self.auction_protocol)
 
@@ -106,6 +112,13 @@ class Auction(object):
         start = utils.convert_datetime(self.context['auction_document']['stages'][1]['start']) + timedelta(seconds=ROUND_DURATION)
         self.job_service.add_ending_main_round_job(start)
 
+        # Bids answered from journal could be not saved before worker stopped
+        acknowledgement = self.context.get('bid_acknowledgement')
+        records = acknowledgement.pending() if acknowledgement is not None else []
+        if records:
+            LOGGER.info("Replay {} records of bids journal".format(len(records)))
+            BidsHandler().replay_bids(records)
+
         self.server = run_server(
             self,
             None,  # TODO: add mapping expire
@@ -311,7 +324,8 @@ class Auction(object):
                     bidder_id=bid['id'],
                     time=bid["date"] if "date" in bid else self.startDate,
                     bidder_name=self.bids_mapping[bid["id"]],
-                    amount=auction_document['value']['amount']
+                    amount=auction_document['value']['amount'],
+                    label=self.bidders_presentation[bid["id"]]['label']
                 )
             )
             self.auction_protocol['timeline']['auction_start']['initial_bids'].append({
@@ -414,6 +428,12 @@ class Auction(object):
             for bid in self._auction_data['data'].get('bids', [])
             if bid.get('status', 'active') == 'active'
         ]
+        # Bidders by identifiers for lookups on login and event_source, bid
+        # numbers are generated later, so they are kept in bidders_presentation
+        self.bidders_index = FrozenDict(
+            (bid['id'], FrozenDict((key, value) for key, value in bid.items() if key != 'bidNumber'))
+            for bid in self.bidders_data
+        )
 
     def _generate_bid_number(self, existed_numbers, bid):
         if bid.get('bidNumber') is not None:
@@ -434,6 +454,7 @@ class Auction(object):
                 self.bids_mapping[self.bidders_data[index]['id']] = generated_bid_number
                 bid['bidNumber'] = generated_bid_number
                 existed_numbers.append(generated_bid_number)
+        self.bidders_presentation = utils.prepare_bidders_presentation(self.bids_mapping)
 
     @property
     def relative_deadline_for_sandbox_mode(self):
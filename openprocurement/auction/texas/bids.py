@@ -1,28 +1,89 @@
 # -*- coding: utf-8 -*-
 import logging
+from bisect import bisect_left
 
 from zope.component import getGlobalSiteManager
 
-from openprocurement.auction.utils import generate_request_id, sorting_by_amount
+from openprocurement.auction.utils import generate_request_id
 
 from openprocurement.auction.texas import utils
+from openprocurement.auction.texas.amount import Amount
 from openprocurement.auction.texas.context import IContext
-from openprocurement.auction.texas.constants import ROUND_DURATION
+from openprocurement.auction.texas.constants import PAUSE, ROUND_DURATION
 from openprocurement.auction.texas.database import IDatabase
 from openprocurement.auction.texas.scheduler import IJobService
-from openprocurement.auction.texas.scheduler import SCHEDULER
+from openprocurement.auction.texas.tracing import get_request_id, span
 from openprocurement.auction.texas.journal import (
     AUCTION_WORKER_SERVICE_END_BID_STAGE,
     AUCTION_WORKER_SERVICE_START_NEXT_STAGE
 )
 from openprocurement.auction.texas.utils import (
     get_round_ending_time,
-    approve_auction_protocol_info_on_bids_stage,
+    approve_auction_protocol_info_on_bid,
 )
 
 LOGGER = logging.getLogger("Auction Worker Texas")
 
 
+class ResultsIndex(object):
+    """
+    Index of auction results which keeps results list ordered by amount
+    descending and time of bid ascending, so result of bidder is replaced
+    in place with binary search instead of search through the whole list
+    and its sorting.
+
+    Attributes:
+    _keys: sort keys of results in order of results list
+    :type _keys: list
+    _by_bidder: sort keys of results by bidder identifiers
+    :type _by_bidder: dict
+    """
+
+    def __init__(self, results):
+        """
+        Build index of results and sort results list in place
+        """
+        self._build(results)
+
+    def _build(self, results):
+        results.sort(key=self.get_key)
+        self._keys = [self.get_key(result) for result in results]
+        self._by_bidder = dict((result['bidder_id'], key) for result, key in zip(results, self._keys))
+
+    def __len__(self):
+        return len(self._keys)
+
+    @staticmethod
+    def get_key(result):
+        return -result['amount'], result['time'], result['bidder_id']
+
+    def update(self, results, result):
+        """
+        Put result into results list instead of previous result of the same bidder
+
+        :param results: results list the index was built for
+        :param result: new result of bidder
+        """
+        previous_key = self._by_bidder.get(result['bidder_id'])
+        if previous_key is not None:
+            position = bisect_left(self._keys, previous_key)
+            if position >= len(results) or self.get_key(results[position]) != previous_key:
+                # Results were reordered or replaced by list of the same
+                # length, like document reloaded from database, so index
+                # is built again instead of changing result of other bidder
+                self._build(results)
+                previous_key = self._by_bidder.get(result['bidder_id'])
+        if previous_key is not None:
+            position = bisect_left(self._keys, previous_key)
+            del self._keys[position]
+            del results[position]
+        key = self.get_key(result)
+        position = bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        results.insert(position, result)
+        self._by_bidder[result['bidder_id']] = key
+
+
 class BidsHandler(object):
     """
     Class for work with bids data
@@ -32,64 +93,185 @@ class BidsHandler(object):
         self.context = gsm.queryUtility(IContext)
         self.database = gsm.queryUtility(IDatabase)
         self.job_service = gsm.queryUtility(IJobService)
+        self._results_index = None
 
-    def add_bid(self, current_stage, bid):
+    def get_results_index(self, results):
+        """
+        Return index of results, index is built again if results
+        were changed not by add_bid
+        """
+        if self._results_index is None or len(self._results_index) != len(results):
+            self._results_index = ResultsIndex(results)
+        return self._results_index
+
+    def add_bid(self, current_stage, bid, record=True):
         LOGGER.info(
             '------------------ Adding bid ------------------',
         )
-        # Updating auction document with bid data
-        with utils.update_auction_document(self.context, self.database) as auction_document:
+        # Updating auction document with bid data. Saving is finished
+        # by end_bid_stage, so it could be merged with the stage switch,
+        # or left for later when bid is answered before database save
+        durable = self._is_durable()
+        with utils.update_auction_document(self.context, self.database, flush=False, save=durable) as auction_document:
             try:
-                bid['bidder_name'] = self.context['bids_mapping'].get(bid['bidder_id'], False)
-                result = utils.prepare_results_stage(**bid)
+                presentation = self.context.get('bidders_presentation', {}).get(bid['bidder_id'], {})
+                bid['bidder_name'] = presentation.get('bidNumber', False)
+                result = utils.prepare_results_stage(label=presentation.get('label'), **bid)
                 auction_document['stages'][current_stage].update(result)
                 results = auction_document['results']
-                bid_index = next((i for i, res in enumerate(results)
-                                  if res['bidder_id'] == bid['bidder_id']), None)
-                if bid_index is not None:
-                    results[bid_index] = result
-                else:
-                    results.append(result)
-                auction_document['results'] = sorting_by_amount(results)
+                self.get_results_index(results).update(results, result)
+                auction_document['results'] = results
             except Exception as e:
                 LOGGER.fatal(
                     "Exception during adding bid. "
                     "Error: {}".format(e)
                 )
                 return e
-        self.end_bid_stage(bid)
+        self.end_bid_stage(bid, record=record)
         return True
 
-    def end_bid_stage(self, bid):
-        request_id = generate_request_id()
+    def replay_bids(self, records):
+        """
+        Add journaled bids which are missing in auction document, they were
+        answered to bidders, but worker stopped before document was saved.
+        Bids are replayed the same way they were added, auction is switched
+        from pause to the round of the next bid, and stage switch of bid
+        which was saved without it is done again. Replayed bids are not
+        journaled again. Document is saved and journal is truncated after
+        replay.
+
+        :param records: records of bids journal in order they were written
+        :type records: list
+        """
+        for record in records:
+            auction_document = self.context['auction_document']
+            stages = auction_document['stages']
+            bid = {
+                'bidder_id': record['bidder_id'],
+                'amount': Amount.from_value(record['amount']),
+                'time': record['time'],
+            }
+            stage = stages[record['stage']] if record['stage'] < len(stages) else {}
+            if stage.get('bidder_id') == record['bidder_id'] and stage.get('time') == record['time']:
+                if auction_document['current_stage'] == record['stage']:
+                    LOGGER.info("Replay end of stage {} of journaled bid of bidder {}".format(
+                        record['stage'], record['bidder_id']
+                    ))
+                    self.end_bid_stage(bid, record=False)
+                continue
+            self._replay_pauses(record['stage'])
+            if record['stage'] != self.context['auction_document']['current_stage']:
+                LOGGER.warning(
+                    "Skip journaled bid of bidder {} for stage {}, auction is at stage {}".format(
+                        record['bidder_id'], record['stage'], self.context['auction_document']['current_stage']
+                    )
+                )
+                continue
+            LOGGER.info("Replay journaled bid of bidder {} for stage {}".format(record['bidder_id'], record['stage']))
+            self.add_bid(record['stage'], bid, record=False)
+        self._save_auction_document()
+
+    def _replay_pauses(self, stage_index):
+        """
+        Switch auction from pauses which were ended before the bid of stage
+        was made, as switch_to_next_stage did before worker was stopped
+        """
+        auction_document = self.context['auction_document']
+        current_stage = auction_document['current_stage']
+        stages = auction_document['stages']
+        while current_stage < min(stage_index, len(stages)) and stages[current_stage].get('type') == PAUSE:
+            current_stage += 1
+        if current_stage != auction_document['current_stage']:
+            with utils.update_auction_document(self.context, self.database, save=False) as auction_document:
+                auction_document['current_stage'] = current_stage
+
+    def _is_durable(self):
+        """
+        Bid is answered as soon as it is recorded according to
+        acknowledgement level, database save could be left for later
+        """
+        acknowledgement = self.context.get('bid_acknowledgement')
+        return acknowledgement is None or acknowledgement.durable
+
+    def _post_commit(self, name, func, *args):
+        """
+        Run side effect of committed bid on post commit pipeline, or right
+        away if pipeline is not available
+        """
+        pipeline = self.context.get('post_commit')
+        if pipeline is None:
+            func(*args)
+        else:
+            pipeline.submit(name, func, *args)
+
+    def _save_auction_document(self):
+        # Deferred save takes the lock of bids and stage switches, so it is
+        # never interleaved with their saves, and the latest document is
+        # saved, so changes made after the bid are saved as well
+        acknowledgement = self.context.get('bid_acknowledgement')
+        with self.context['server_actions']:
+            checkpoint = acknowledgement.checkpoint() if acknowledgement is not None else None
+            with span('database.save'):
+                self.database.save_auction_document(
+                    self.context['auction_document'], self.context['auction_doc_id']
+                )
+            if acknowledgement is not None:
+                acknowledgement.confirm(checkpoint)
+
+    def _approve_bid_in_protocol(self, stage_index, bid_stage):
+        self.context['auction_protocol'] = approve_auction_protocol_info_on_bid(
+            self.context['auction_protocol'], stage_index, bid_stage
+        )
+
+    def _log_end_of_bid_stage(self, request_id, current_stage):
         LOGGER.info(
             '---------------- End Bids Stage ----------------',
             extra={"JOURNAL_REQUEST_ID": request_id,
                    "MESSAGE_ID": AUCTION_WORKER_SERVICE_END_BID_STAGE}
         )
+        LOGGER.info('---------------- Start stage {0} ----------------'.format(
+            current_stage),
+            extra={"JOURNAL_REQUEST_ID": request_id,
+                   "MESSAGE_ID": AUCTION_WORKER_SERVICE_START_NEXT_STAGE}
+        )
 
-        # Cleaning up preplanned jobs
-        SCHEDULER.remove_all_jobs()
+    def end_bid_stage(self, bid, record=True):
+        request_id = get_request_id() or generate_request_id()
 
-        # Update auction protocol
-        auction_protocol = approve_auction_protocol_info_on_bids_stage(
-            self.context['auction_document'], self.context['auction_protocol']
+        # Creating new stages
+        deadline = self.context.get('deadline')
+        bid_document = {
+            'value': {'amount': bid['amount']},
+            'minimalStep': self.context['auction_document']['minimalStep']
+        }
+
+        pause, main_round = utils.prepare_auction_stages(
+            utils.convert_datetime(bid['time']),
+            bid_document,
+            deadline,
+            fast_forward=self.context['worker_defaults'].get('sandbox_mode', False)
         )
-        self.context['auction_protocol'] = auction_protocol
 
-        with utils.update_auction_document(self.context, self.database) as auction_document:
-            # Creating new stages
-            bid_document = {
-                'value': {'amount': bid['amount']},
-                'minimalStep': auction_document['minimalStep']
-            }
+        # Moving preplanned jobs before anything could yield to them, so
+        # jobs of the ended round are never fired
+        with span('bid.scheduler'):
+            if main_round:
+                round_start_date = utils.convert_datetime(main_round['start'])
+                round_end_date = get_round_ending_time(
+                    round_start_date, ROUND_DURATION, deadline
+                )
 
-            pause, main_round = utils.prepare_auction_stages(
-                utils.convert_datetime(bid['time']),
-                bid_document,
-                self.context.get('deadline'),
-                fast_forward=self.context['worker_defaults'].get('sandbox_mode', False)
-            )
+                self.job_service.add_pause_job(round_start_date)
+                self.job_service.add_ending_main_round_job(round_end_date)
+            else:
+                self.job_service.cancel_pause_job()
+                self.job_service.add_ending_main_round_job(deadline)
+
+        durable = self._is_durable()
+
+        with utils.update_auction_document(self.context, self.database, save=durable) as auction_document:
+            bid_stage_index = auction_document["current_stage"]
+            bid_stage = dict(auction_document['stages'][bid_stage_index])
 
             auction_document['stages'].append(pause)
             if main_round:
@@ -97,23 +279,14 @@ class BidsHandler(object):
 
             # Updating current stage
             auction_document["current_stage"] += 1
+            current_stage = auction_document["current_stage"]
 
-        LOGGER.info('---------------- Start stage {0} ----------------'.format(
-            self.context['auction_document']["current_stage"]),
-            extra={"JOURNAL_REQUEST_ID": request_id,
-                   "MESSAGE_ID": AUCTION_WORKER_SERVICE_START_NEXT_STAGE}
-        )
-
-        # Adding jobs to scheduler
-        deadline = self.context.get('deadline')
+        if not durable:
+            # Replayed bids are already in the journal
+            if record:
+                self.context['bid_acknowledgement'].record(bid_stage_index, bid)
+            self._post_commit('save', self._save_auction_document)
 
-        if main_round:
-            round_start_date = utils.convert_datetime(main_round['start'])
-            round_end_date = get_round_ending_time(
-                round_start_date, ROUND_DURATION, deadline
-            )
-
-            self.job_service.add_pause_job(round_start_date)
-            self.job_service.add_ending_main_round_job(round_end_date)
-        else:
-            self.job_service.add_ending_main_round_job(deadline)
+        # Bid is saved, the rest is not needed to answer the bidder
+        self._post_commit('protocol', self._approve_bid_in_protocol, bid_stage_index, bid_stage)
+        self._post_commit('audit', self._log_end_of_bid_stage, request_id, current_stage)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import OrderedDict
+
+from flask import json
+from gevent.queue import Queue
+
+from openprocurement.auction.texas.constants import SSE_MAX_STREAMS, SSE_MAX_STREAMS_PER_BIDDER
+from openprocurement.auction.texas.metrics import METRICS
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+STOP_SSE = 'StopSSE'
+
+
+def encode_event(event, data, event_id=None):
+    """
+    Encode event into SSE frame. Frame is immutable byte string, so one
+    frame is put into channels of all clients which receive the event.
+
+    :param event: name of event
+    :param data: JSON serializable data of event
+    :param event_id: identifier of event, browser sends identifier of the
+                     last received event in Last-Event-ID on reconnect
+    :return: SSE frame
+    :rtype: str
+    """
+    lines = ['id: {}\n'.format(event_id)] if event_id else []
+    lines.append('event: {}\n'.format(event))
+    lines.extend('data: {}\n'.format(line) for line in json.dumps(data).splitlines())
+    lines.append('\n')
+    frame = ''.join(lines)
+    if isinstance(frame, unicode):
+        frame = frame.encode('utf-8')
+    METRICS.increment('sse.encoded')
+    return frame
+
+
+class DroppableFrame(str):
+    """
+    SSE frame which client could miss without losing auction state, like
+    Tick, the next such frame replaces it
+    """
+    __slots__ = ()
+
+
+class Channel(Queue):
+    """
+    Bounded queue of SSE frames of one client. When client does not read
+    frames fast enough and channel is full, the oldest droppable frame is
+    dropped to make room. If there is nothing to drop, droppable frame is
+    dropped itself, while for other frame client is evicted: channel is
+    cleared and stream is closed, so browser reconnects and resumes or
+    resynchronizes instead of being fed from ever growing queue.
+
+    Attributes:
+    size: maximum number of frames waiting in channel
+    :type size: int
+    bidder_id: identifier of bidder of client
+    :type bidder_id: str
+    client_id: identifier of client
+    :type client_id: str
+    evicted: whether client was evicted, frames put into channel of
+             evicted client are ignored
+    :type evicted: bool
+    """
+
+    def __init__(self, size=100, bidder_id=None, client_id=None):
+        super(Channel, self).__init__()
+        self.size = int(size)
+        self.bidder_id = bidder_id
+        self.client_id = client_id
+        self.evicted = False
+
+    def put(self, item, block=True, timeout=None):
+        if self.evicted:
+            return
+        if self.qsize() >= self.size and not self._drop_oldest():
+            if isinstance(item, DroppableFrame):
+                METRICS.increment('sse.dropped')
+            else:
+                self.evict()
+            return
+        super(Channel, self).put(item, block, timeout)
+
+    def _drop_oldest(self):
+        for index, queued in enumerate(self.queue):
+            if isinstance(queued, DroppableFrame):
+                del self.queue[index]
+                METRICS.increment('sse.dropped')
+                return True
+        return False
+
+    def evict(self):
+        """
+        Drop all waiting frames and close stream of client
+        """
+        LOGGER.warning("Evict client {} of bidder {} with {} pending events".format(
+            self.client_id, self.bidder_id, self.qsize()
+        ))
+        self.evicted = True
+        self.queue.clear()
+        super(Channel, self).put({'event': STOP_SSE})
+        METRICS.increment('sse.evicted')
+
+
+class StreamRegistry(object):
+    """
+    Open event streams of worker. Every stream pins greenlet, socket and
+    channel, so number of streams of one bidder and of whole worker is
+    capped. When cap is reached, the oldest streams are closed to admit the
+    new one, as the newest connection is the one user looks at, while old
+    ones are usually left by closed tabs or broken networks. Stream of
+    client which connects again replaces its previous stream.
+
+    Attributes:
+    max_streams: maximum number of streams of worker, 0 for no limit
+    :type max_streams: int
+    max_streams_per_bidder: maximum number of streams of one bidder, 0 for
+                            no limit
+    :type max_streams_per_bidder: int
+    _streams: channels of open streams in order they were opened
+    :type _streams: collections.OrderedDict
+    _bidders: channels of open streams by bidders in order they were opened
+    :type _bidders: dict
+    """
+
+    def __init__(self, max_streams=SSE_MAX_STREAMS, max_streams_per_bidder=SSE_MAX_STREAMS_PER_BIDDER):
+        self.max_streams = int(max_streams)
+        self.max_streams_per_bidder = int(max_streams_per_bidder)
+        self._streams = OrderedDict()
+        self._bidders = {}
+
+    def __len__(self):
+        return len(self._streams)
+
+    def __contains__(self, channel):
+        return channel in self._streams
+
+    def count(self, bidder):
+        return len(self._bidders.get(bidder, ()))
+
+    def open(self, channel):
+        """
+        Register stream of channel and unregister streams which have to be
+        closed to admit it
+
+        :param channel: channel of new stream with bidder_id and client_id
+        :type channel: Channel
+        :return: channels of streams which have to be closed
+        :rtype: list
+        """
+        bidder_streams = self._bidders.setdefault(channel.bidder_id, OrderedDict())
+        closed = [stream for stream in bidder_streams if stream.client_id == channel.client_id]
+        if self.max_streams_per_bidder:
+            excess = len(bidder_streams) - len(closed) - self.max_streams_per_bidder + 1
+            closed.extend([stream for stream in bidder_streams if stream not in closed][:max(excess, 0)])
+        for stream in closed:
+            self.close(stream)
+        if self.max_streams:
+            excess = len(self._streams) - self.max_streams + 1
+            oldest = list(self._streams)[:max(excess, 0)]
+            for stream in oldest:
+                self.close(stream)
+            closed.extend(oldest)
+        self._streams[channel] = None
+        self._bidders.setdefault(channel.bidder_id, OrderedDict())[channel] = None
+        if closed:
+            LOGGER.info("Close {} streams to admit client {} of bidder {}".format(
+                len(closed), channel.client_id, channel.bidder_id
+            ))
+            METRICS.increment('sse.streams.closed', len(closed))
+        self._set_gauges()
+        return closed
+
+    def close(self, channel):
+        """
+        Unregister stream of channel
+        """
+        if channel not in self._streams:
+            return
+        del self._streams[channel]
+        bidder_streams = self._bidders.get(channel.bidder_id, {})
+        bidder_streams.pop(channel, None)
+        if not bidder_streams:
+            self._bidders.pop(channel.bidder_id, None)
+        self._set_gauges()
+
+    def _set_gauges(self):
+        METRICS.set_gauge('sse.streams', len(self._streams))
+        METRICS.set_gauge('sse.streams.bidders', len(self._bidders))
+        METRICS.set_gauge(
+            'sse.streams.max_per_bidder', max([len(streams) for streams in self._bidders.values()] or [0])
+        )
@@ -14,9 +14,14 @@ from zope.component.globalregistry import getGlobalSiteManager
 from openprocurement.auction.utils import check
 from openprocurement.auction.worker_core import constants as C
 
+from openprocurement.auction.texas.acknowledgement import BidAcknowledgement
+from openprocurement.auction.texas.admission import BidsQueue
 from openprocurement.auction.texas.auction import Auction, SCHEDULER
 from openprocurement.auction.texas.constants import DEADLINE_HOUR
 from openprocurement.auction.texas.context import prepare_context, IContext
+from openprocurement.auction.texas.idempotency import BidOutcomes
+from openprocurement.auction.texas.pipeline import PostCommitPipeline
+from openprocurement.auction.texas.state import AuctionStateChannel
 from openprocurement.auction.texas.database import prepare_database, IDatabase
 from openprocurement.auction.texas.datasource import prepare_datasource, IDataSource
 from openprocurement.auction.texas.scheduler import prepare_job_service, IJobService
@@ -100,6 +105,18 @@ def register_utilities(worker_config, args):
     # Initializing semaphore which is used for locking WSGI server actions
     # during applying bids or updating auction document
     context['server_actions'] = BoundedSemaphore()
+    # Bids wait in the queue for the semaphore instead of being rejected
+    context['bids_queue'] = BidsQueue(context['server_actions'], **worker_config.get('bids_queue', {}))
+    # Retried bids with the same key are answered without processing them again
+    context['bid_outcomes'] = BidOutcomes(**worker_config.get('bid_outcomes', {}))
+    # Side effects of accepted bids are run after the bidder is answered
+    context['post_commit'] = PostCommitPipeline()
+    # Point at which accepted bid is answered: memory, journal or database
+    context['bid_acknowledgement'] = BidAcknowledgement.from_config(
+        worker_config.get('bid_acknowledgement'), auction_id
+    )
+    # Committed changes of auction document are streamed to clients
+    context['auction_state'] = AuctionStateChannel(**worker_config.get('auction_state', {}))
 
 
 def main():
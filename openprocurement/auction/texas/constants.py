@@ -16,6 +16,16 @@ PREANNOUNCEMENT = 'pre-announcement'
 END = 'announcement'
 
 DEADLINE_HOUR = 17
+POST_COMMIT_DRAIN_TIMEOUT = 30
+# Seconds between Tick events and before browser reconnects to event_source
+TICK_INTERVAL = 1
+SSE_RETRY = 2000
+SSE_CHANNEL_SIZE = 100
+# Maximum numbers of open event streams, the oldest streams are closed first
+SSE_MAX_STREAMS = 1000
+SSE_MAX_STREAMS_PER_BIDDER = 10
+# Seconds during which repeated ClientsList events of bidder are coalesced
+SSE_DEBOUNCE_WINDOW = 0.25
 SANDBOX_AUCTION_DURATION = timedelta(minutes=30)
 
 DEFAULT_AUCTION_TYPE = 'texas'
@@ -1,16 +1,24 @@
 # -*- coding: utf-8 -*-
-from copy import deepcopy
+from copy import copy, deepcopy
 from datetime import datetime
 from pkg_resources import iter_entry_points
 
 from gevent.event import Event
 from gevent.lock import BoundedSemaphore
 from gevent.pywsgi import WSGIServer
+from yaml import SafeDumper
 from zope.interface import (
     Interface,
     implementer,
 )
 
+from openprocurement.auction.texas.acknowledgement import BidAcknowledgement
+from openprocurement.auction.texas.admission import BidsQueue
+from openprocurement.auction.texas.idempotency import BidOutcomes
+from openprocurement.auction.texas.pipeline import PostCommitPipeline
+from openprocurement.auction.texas.state import AuctionStateChannel
+from openprocurement.auction.texas.structures import FrozenDict
+
 
 class ContextException(Exception):
     pass
@@ -51,9 +59,16 @@ class DictContext(object):
         'auction_doc_id': {'type': str},
         'auction_document': {'type': dict},
         'auction_protocol': {'type': dict},
+        'auction_state': {'type': AuctionStateChannel},
         'bidders_data': {'type': list},
+        'bidders_index': {'type': FrozenDict},
         'bids_mapping': {'type': dict},
+        'bidders_presentation': {'type': FrozenDict},
+        'bid_outcomes': {'type': BidOutcomes},
+        'bid_acknowledgement': {'type': BidAcknowledgement},
+        'bids_queue': {'type': BidsQueue},
         'end_auction_event': {'type': Event},
+        'post_commit': {'type': PostCommitPipeline},
         'server': {'type': WSGIServer},
         'server_actions': {'type': BoundedSemaphore},
         'worker_defaults': {'type': dict},
@@ -94,8 +109,178 @@ class DictContext(object):
         return value
 
 
+def _private(value, owner):
+    """
+    Return version of value which could be safely mutated by view with
+    provided owner token. Containers which belong to another view or to
+    stored snapshot are shallow copied, everything else is returned as is.
+    """
+    if isinstance(value, (CopyOnWriteDict, CopyOnWriteList)) and value._owner is owner:
+        return value
+    if isinstance(value, dict):
+        return CopyOnWriteDict(value, owner)
+    if isinstance(value, list):
+        return CopyOnWriteList(value, owner)
+    return value
+
+
+class CopyOnWriteDict(dict):
+    """
+    Dictionary view on stored snapshot. Nested containers are shared with
+    snapshot until they are accessed, on access they are shallow copied
+    and replaced in view, so mutations never touch shared structure.
+
+    Attributes:
+    _owner: token of the view, containers with the same token are private
+    for this view and could be mutated in place
+    :type _owner: object
+    """
+    __slots__ = ('_owner',)
+
+    def __init__(self, mapping=(), owner=None):
+        dict.__init__(self, mapping)
+        self._owner = owner if owner is not None else object()
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        private = _private(value, self._owner)
+        if private is not value:
+            dict.__setitem__(self, key, private)
+        return private
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            dict.__setitem__(self, key, default)
+        return self[key]
+
+    def pop(self, key, *default):
+        return _private(dict.pop(self, key, *default), self._owner)
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        return key, _private(value, self._owner)
+
+    def iteritems(self):
+        for key in self.keys():
+            yield key, self[key]
+
+    def itervalues(self):
+        for key in self.keys():
+            yield self[key]
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def __deepcopy__(self, memo):
+        result = {}
+        memo[id(self)] = result
+        for key, value in dict.items(self):
+            result[deepcopy(key, memo)] = deepcopy(value, memo)
+        return result
+
+
+class CopyOnWriteList(list):
+    """
+    List view on stored snapshot, works the same way as CopyOnWriteDict
+    """
+    __slots__ = ('_owner',)
+
+    def __init__(self, iterable=(), owner=None):
+        list.__init__(self, iterable)
+        self._owner = owner if owner is not None else object()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+        value = list.__getitem__(self, index)
+        private = _private(value, self._owner)
+        if private is not value:
+            list.__setitem__(self, index, private)
+        return private
+
+    def __getslice__(self, start, stop):
+        return self.__getitem__(slice(max(start, 0), max(stop, 0)))
+
+    def __iter__(self):
+        index = 0
+        while index < len(self):
+            yield self[index]
+            index += 1
+
+    def __reversed__(self):
+        for index in xrange(len(self) - 1, -1, -1):
+            yield self[index]
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def pop(self, index=-1):
+        return _private(list.pop(self, index), self._owner)
+
+    def __deepcopy__(self, memo):
+        result = []
+        memo[id(self)] = result
+        result.extend(deepcopy(value, memo) for value in list.__iter__(self))
+        return result
+
+
+SafeDumper.add_representer(CopyOnWriteDict, SafeDumper.represent_dict)
+SafeDumper.add_representer(CopyOnWriteList, SafeDumper.represent_list)
+
+
+@implementer(IContext)
+class SnapshotContext(DictContext):
+    """
+    Implementation of AuctionWorker context which doesn't deepcopy containers
+    on every read. Stored containers are kept as immutable snapshots and
+    readers get copy-on-write views of them, so reading of big objects
+    (like auction document) costs O(1) and only containers which are
+    actually accessed are shallow copied.
+    """
+
+    def _seal(self, value):
+        """
+        Make snapshot of value to store in mapping. Value itself stops
+        owning its nested containers, so they can't be changed through it
+        after snapshot was made.
+        """
+        if isinstance(value, (CopyOnWriteDict, CopyOnWriteList)):
+            value._owner = object()
+        if isinstance(value, dict):
+            return dict(value)
+        if isinstance(value, list):
+            return list.__getitem__(value, slice(None))
+        return value
+
+    def _view(self, value):
+        if isinstance(value, (dict, list)):
+            return _private(value, object())
+        if isinstance(value, set):
+            return copy(value)
+        return value
+
+    def __getitem__(self, key):
+        return self._view(self._mapping[key])
+
+    def __setitem__(self, key, value):
+        super(SnapshotContext, self).__setitem__(key, value)
+        self._mapping[key] = self._seal(value)
+
+    def get(self, key, default=None):
+        return self._view(self._mapping.get(key, default))
+
+
 CONTEXT_MAPPING = {
     'dict': DictContext,
+    'snapshot': SnapshotContext,
 }
 
 
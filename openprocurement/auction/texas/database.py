@@ -3,8 +3,10 @@ import logging
 from pkg_resources import iter_entry_points
 
 from copy import deepcopy
+from gevent import spawn_later
+from gevent.lock import RLock
 from couchdb import Session, Server
-from couchdb.http import HTTPError, RETRYABLE_ERRORS
+from couchdb.http import HTTPError, ResourceConflict, RETRYABLE_ERRORS
 
 from zope.interface import (
     Interface,
@@ -16,10 +18,60 @@ from openprocurement.auction.utils import generate_request_id
 from openprocurement.auction.texas.journal import (
     AUCTION_WORKER_DB_GET_DOC,
     AUCTION_WORKER_DB_GET_DOC_ERROR, AUCTION_WORKER_DB_GET_DOC_UNHANDLED_ERROR, AUCTION_WORKER_DB_SAVE_DOC,
-    AUCTION_WORKER_DB_SAVE_DOC_ERROR, AUCTION_WORKER_DB_SAVE_DOC_UNHANDLED_ERROR)
+    AUCTION_WORKER_DB_SAVE_DOC_ERROR, AUCTION_WORKER_DB_SAVE_DOC_UNHANDLED_ERROR,
+    AUCTION_WORKER_DB_SAVE_DOC_CONFLICT, AUCTION_WORKER_DB_SAVE_DOC_PATCH,
+    AUCTION_WORKER_DB_SAVE_DOC_PATCH_ERROR, AUCTION_WORKER_DB_CIRCUIT_BREAKER_OPEN)
+from openprocurement.auction.texas.diff import make_json_patch, apply_json_patch
+from openprocurement.auction.texas.retry import RetryPolicy
 
 LOGGER = logging.getLogger("Auction Worker Texas")
 
+# Update handler applies JSON patch made by make_json_patch to the stored
+# document if it still has revision the patch was made against
+APPLY_PATCH_HANDLER = """function (doc, req) {
+    var body = JSON.parse(req.body);
+    if (!doc) {
+        return [null, {code: 404, json: {error: 'not_found'}}];
+    }
+    if (doc._rev !== body.rev) {
+        return [null, {code: 409, json: {error: 'conflict'}}];
+    }
+    body.patch.forEach(function (operation) {
+        var tokens = operation.path.split('/').slice(1).map(function (token) {
+            return token.replace(/~1/g, '/').replace(/~0/g, '~');
+        });
+        var key = tokens.pop();
+        var parent = doc;
+        tokens.forEach(function (token) {
+            parent = parent[token];
+        });
+        if (Array.isArray(parent)) {
+            if (operation.op === 'add' && key === '-') {
+                parent.push(operation.value);
+            } else if (operation.op === 'add') {
+                parent.splice(parseInt(key, 10), 0, operation.value);
+            } else if (operation.op === 'remove') {
+                parent.splice(parseInt(key, 10), 1);
+            } else {
+                parent[parseInt(key, 10)] = operation.value;
+            }
+        } else if (operation.op === 'remove') {
+            delete parent[key];
+        } else {
+            parent[key] = operation.value;
+        }
+    });
+    return [doc, {json: {ok: true}}];
+}"""
+
+AUCTION_WORKER_DESIGN_DOCUMENT = {
+    '_id': '_design/auction_worker',
+    'language': 'javascript',
+    'updates': {
+        'apply_patch': APPLY_PATCH_HANDLER
+    }
+}
+
 
 class IDatabase(Interface):
     """
@@ -45,6 +97,30 @@ class IDatabase(Interface):
         raise NotImplementedError
 
 
+class ICoalescingDatabase(IDatabase):
+    """
+    Interface for databases which are able to postpone saving of document
+    and merge several saves into one write
+    """
+    def defer_auction_document_save(self, auction_document, auction_doc_id):
+        """
+        Schedule saving of provided auction document. Document is written
+        to database later, together with all changes made meanwhile, or
+        earlier if it is saved directly with save_auction_document.
+
+        :param auction_document: auction document object
+        :param auction_doc_id: identifier of document in database
+        :return:
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Write all postponed documents to database
+        """
+        raise NotImplementedError
+
+
 @implementer(IDatabase)
 class CouchDB(object):
     """
@@ -53,21 +129,37 @@ class CouchDB(object):
     Attributes:
         _db: Representation of a database to work with on a CouchDB server
         :type _db: couchdb.Database
-        db_request_retries: Number of retries of database requesting in case
-                            error occurred during getting or saving document
-        :type db_request_retries: int
+        retry_policy: Policy of retrying database requests in case error
+                      occurred during getting or saving document. Circuit
+                      breaker of the policy is shared by all objects which
+                      work with the same database
+        :type retry_policy: openprocurement.auction.texas.retry.RetryPolicy
+        _revisions: '_rev' field values of documents returned by the last
+                    getting or saving, so saving doesn't need to request
+                    document from database before every write
+        :type _revisions: dict
     """
     _db = None
-    db_request_retries = 10
 
     def __init__(self, config):
         """
         Check CouchDB availability and set _db attribute
         """
+        self._db = self._connect(config)
+        self._revisions = {}
+        self.retry_policy = RetryPolicy.from_config('database', self._get_key(config), config)
+
+    def _connect(self, config):
         server, db = config.get("COUCH_DATABASE").rsplit('/', 1)
         server = Server(server, session=Session(retry_delays=range(10)))
-        database = server[db] if db in server else server.create(db)
-        self._db = database
+        return server[db] if db in server else server.create(db)
+
+    def _get_key(self, config):
+        """
+        Return identifier of database, objects which work with the same
+        database share circuit breaker
+        """
+        return config.get("COUCH_DATABASE")
 
     def _update_revision(self, auction_document, auction_doc_id):
         """
@@ -80,7 +172,7 @@ class CouchDB(object):
         :return:
         """
         public_document = self.get_auction_document(auction_doc_id)
-        if public_document and public_document.get('_rev') != auction_document['_rev']:
+        if public_document and public_document.get('_rev') != auction_document.get('_rev'):
             auction_document["_rev"] = public_document["_rev"]
 
     def get_auction_document(self, auction_doc_id):
@@ -91,16 +183,22 @@ class CouchDB(object):
         :return: auction document object from couchdb database
         """
         request_id = generate_request_id()
-        retries = self.db_request_retries
-        while retries:
+        breaker = self.retry_policy.breaker
+        for attempt in xrange(self.retry_policy.retries):
+            if not breaker.allow():
+                LOGGER.error("Skip getting document, database circuit breaker is open",
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_CIRCUIT_BREAKER_OPEN})
+                break
             try:
                 public_document = self._db.get(auction_doc_id)
+                breaker.record_success()
                 if public_document:
                     LOGGER.info("Get auction document {0[_id]} with rev {0[_rev]}".format(public_document),
                                 extra={"JOURNAL_REQUEST_ID": request_id,
                                        "MESSAGE_ID": AUCTION_WORKER_DB_GET_DOC})
+                    self._revisions[auction_doc_id] = public_document['_rev']
                     return public_document
-
+                continue
             except HTTPError, e:
                 LOGGER.error("Error while get document: {}".format(e),
                              extra={'MESSAGE_ID': AUCTION_WORKER_DB_GET_DOC_ERROR})
@@ -112,12 +210,15 @@ class CouchDB(object):
                 else:
                     LOGGER.critical("Unhandled error: {}".format(e),
                                     extra={'MESSAGE_ID': AUCTION_WORKER_DB_GET_DOC_UNHANDLED_ERROR})
-            retries -= 1
+            breaker.record_failure()
+            self.retry_policy.wait(attempt)
         return {}
 
     def save_auction_document(self, auction_document, auction_doc_id):
         """
-        Save provided auction document to couchdb database
+        Save provided auction document to couchdb database. Document is saved
+        with the last known revision, actual revision is requested from
+        database only if saving failed with conflict.
 
         :param auction_document: auction document object
         :param auction_doc_id: identifier of document in database
@@ -125,17 +226,32 @@ class CouchDB(object):
         """
         request_id = generate_request_id()
         public_document = deepcopy(dict(auction_document))
-        retries = self.db_request_retries
-        while retries:
+        if auction_doc_id in self._revisions:
+            public_document['_rev'] = self._revisions[auction_doc_id]
+        breaker = self.retry_policy.breaker
+        for attempt in xrange(self.retry_policy.retries):
+            if not breaker.allow():
+                LOGGER.error("Skip saving document, database circuit breaker is open",
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_CIRCUIT_BREAKER_OPEN})
+                break
             try:
-                self._update_revision(public_document, auction_doc_id)
                 response = self._db.save(public_document)
                 if len(response) == 2:
+                    breaker.record_success()
                     LOGGER.info("Saved auction document {0} with rev {1}".format(*response),
                                 extra={"JOURNAL_REQUEST_ID": request_id,
                                        "MESSAGE_ID": AUCTION_WORKER_DB_SAVE_DOC})
+                    self._revisions[auction_doc_id] = response[1]
                     auction_document['_rev'] = response[1]
                     return response
+            except ResourceConflict, e:
+                # Conflict is not a failure of database, revision is
+                # refreshed and document is saved again without delay
+                breaker.record_success()
+                LOGGER.warning("Conflict while save document: {}".format(e),
+                               extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_CONFLICT})
+                self._update_revision(public_document, auction_doc_id)
+                continue
             except HTTPError, e:
                 LOGGER.error("Error while save document: {}".format(e),
                              extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_ERROR})
@@ -149,21 +265,317 @@ class CouchDB(object):
                                     extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_UNHANDLED_ERROR})
             if "_rev" in public_document:
                 LOGGER.debug("Retry save document changes")
-            retries -= 1
+            breaker.record_failure()
+            self.retry_policy.wait(attempt)
+
+
+@implementer(IDatabase)
+class CouchDBDelta(CouchDB):
+    """
+    CouchDB database which sends only changes of auction document. Changes
+    are sent as JSON patch to update handler of design document, which
+    applies them to the stored document on server side, so size of request
+    doesn't depend on size of document. Whole document is saved only if
+    there is no committed version to compare with or patch was rejected.
+
+    Attributes:
+        _committed: copies of documents as they are stored in database,
+                    without '_rev' field
+        :type _committed: dict
+    """
+    update_handler = 'auction_worker/apply_patch'
+
+    def __init__(self, config):
+        super(CouchDBDelta, self).__init__(config)
+        self._committed = {}
+        self._install_design_document()
+
+    def _install_design_document(self):
+        design_document = self._db.get(AUCTION_WORKER_DESIGN_DOCUMENT['_id']) or {}
+        if design_document.get('updates') != AUCTION_WORKER_DESIGN_DOCUMENT['updates']:
+            design_document.update(deepcopy(AUCTION_WORKER_DESIGN_DOCUMENT))
+            try:
+                self._db.save(design_document)
+            except ResourceConflict:
+                # design document was installed by another worker
+                pass
+
+    def _commit(self, auction_document, auction_doc_id):
+        committed = deepcopy(dict(auction_document))
+        committed.pop('_rev', None)
+        self._committed[auction_doc_id] = committed
+
+    def get_auction_document(self, auction_doc_id):
+        public_document = super(CouchDBDelta, self).get_auction_document(auction_doc_id)
+        if public_document:
+            self._commit(public_document, auction_doc_id)
+        return public_document
+
+    def _save_patch(self, patch, auction_doc_id):
+        """
+        Send patch to update handler
+
+        :return: new revision of document or None if patch was not applied
+        """
+        request_id = generate_request_id()
+        breaker = self.retry_policy.breaker
+        for attempt in xrange(self.retry_policy.retries):
+            if not breaker.allow():
+                LOGGER.error("Skip saving document changes, database circuit breaker is open",
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_CIRCUIT_BREAKER_OPEN})
+                return None
+            try:
+                headers, body = self._db.update_doc(
+                    self.update_handler, auction_doc_id,
+                    body={'rev': self._revisions[auction_doc_id], 'patch': patch}
+                )
+                # Body is read, so connection is returned to the pool
+                body.read()
+            except ResourceConflict, e:
+                # Patch was made for outdated revision, so whole document
+                # is saved instead
+                breaker.record_success()
+                LOGGER.warning("Conflict while save document changes: {}".format(e),
+                               extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_PATCH_ERROR})
+                return None
+            except HTTPError, e:
+                LOGGER.error("Error while save document changes: {}".format(e),
+                             extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_PATCH_ERROR})
+            except Exception, e:
+                errcode = e.args[0] if e.args else None
+                if errcode in RETRYABLE_ERRORS:
+                    LOGGER.error("Error while save document changes: {}".format(e),
+                                 extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_PATCH_ERROR})
+                else:
+                    LOGGER.critical("Unhandled error: {}".format(e),
+                                    extra={'MESSAGE_ID': AUCTION_WORKER_DB_SAVE_DOC_UNHANDLED_ERROR})
+            else:
+                breaker.record_success()
+                revision = headers.get('X-Couch-Update-NewRev')
+                LOGGER.info("Saved {} changes of auction document {} with rev {}".format(
+                    len(patch), auction_doc_id, revision
+                ), extra={"JOURNAL_REQUEST_ID": request_id,
+                          "MESSAGE_ID": AUCTION_WORKER_DB_SAVE_DOC_PATCH})
+                return revision
+            breaker.record_failure()
+            self.retry_policy.wait(attempt)
+        return None
+
+    def save_auction_document(self, auction_document, auction_doc_id):
+        """
+        Save changes of provided auction document made since it was stored
+        last time, save whole document if changes can't be applied
+
+        :param auction_document: auction document object
+        :param auction_doc_id: identifier of document in database
+        :return:
+        """
+        committed = self._committed.pop(auction_doc_id, None)
+        if committed is not None and self._revisions.get(auction_doc_id):
+            patch = [
+                operation for operation in make_json_patch(committed, dict(auction_document))
+                if operation['path'] and operation['path'] != '/_rev'
+            ]
+            revision = self._save_patch(patch, auction_doc_id) if patch else self._revisions[auction_doc_id]
+            if revision:
+                self._committed[auction_doc_id] = apply_json_patch(committed, patch)
+                self._revisions[auction_doc_id] = revision
+                auction_document['_rev'] = revision
+                return auction_doc_id, revision
+
+        response = super(CouchDBDelta, self).save_auction_document(auction_document, auction_doc_id)
+        if response:
+            self._commit(auction_document, auction_doc_id)
+        return response
+
+
+@implementer(ICoalescingDatabase)
+class CoalescingDatabase(object):
+    """
+    Write-behind wrapper for IDatabase implementation. Deferred saves of the
+    same document made within coalescing window are merged into one write,
+    direct saves write document immediately together with pending changes.
+
+    Attributes:
+        _database: database which documents are actually written to
+        :type _database: IDatabase
+        window: number of seconds deferred save could wait before writing
+        :type window: float
+        _pending: documents waiting for writing by their identifiers
+        :type _pending: dict
+        _lock: lock which keeps writes of documents in order they were made
+        :type _lock: gevent.lock.RLock
+    """
+
+    def __init__(self, database, window):
+        self._database = database
+        self.window = window
+        self._pending = {}
+        self._timers = {}
+        self._lock = RLock()
+
+    def get_auction_document(self, auction_doc_id):
+        self._flush_document(auction_doc_id)
+        return self._database.get_auction_document(auction_doc_id)
+
+    def save_auction_document(self, auction_document, auction_doc_id):
+        with self._lock:
+            self._pending.pop(auction_doc_id, None)
+            return self._database.save_auction_document(auction_document, auction_doc_id)
+
+    def defer_auction_document_save(self, auction_document, auction_doc_id):
+        self._pending[auction_doc_id] = auction_document
+        if auction_doc_id not in self._timers:
+            self._timers[auction_doc_id] = spawn_later(
+                self.window, self._flush_document, auction_doc_id
+            )
+
+    def _flush_document(self, auction_doc_id):
+        self._timers.pop(auction_doc_id, None)
+        with self._lock:
+            auction_document = self._pending.pop(auction_doc_id, None)
+            if auction_document is not None:
+                LOGGER.debug("Write deferred changes of document {}".format(auction_doc_id))
+                self._database.save_auction_document(auction_document, auction_doc_id)
+
+    def flush(self):
+        for auction_doc_id in self._pending.keys():
+            self._flush_document(auction_doc_id)
+
+
+@implementer(IDatabase)
+class SegmentedDatabase(object):
+    """
+    Wrapper for IDatabase implementation which keeps auction document small
+    as auction goes on. Closed stages, which are behind 'current_stage', are
+    moved to companion documents by segments of segment_size stages and
+    auction document itself keeps the first stage, stages which are not
+    archived yet and pointer to segments. Document returned by
+    get_auction_document has all stages stitched back together, so
+    segmentation is invisible to the worker.
+
+    Stored auction document is consistent by itself, 'current_stage' of it
+    is index in its own 'stages', so readers of the stored document, like
+    public auction page, find the current stage as before. It has
+    additional fields:
+        stages_offset: number of archived stages, stored stage with index
+                       greater than 0 has index + stages_offset in the
+                       whole auction
+        stages_segments: identifiers of segment documents in order
+
+    Attributes:
+        _database: database which documents are actually written to
+        :type _database: IDatabase
+        segment_size: number of stages in one segment
+        :type segment_size: int
+        _segments: stages of segments as they were last written or read
+                   by their identifiers, so unchanged segments are
+                   neither written nor read again
+        :type _segments: dict
+    """
+
+    def __init__(self, database, segment_size):
+        self._database = database
+        self.segment_size = segment_size
+        self._segments = {}
+
+    def _get_segment_id(self, auction_doc_id, number):
+        return '{}_stages_{}'.format(auction_doc_id, number)
+
+    def _get_segment(self, segment_id):
+        if segment_id not in self._segments:
+            segment_document = self._database.get_auction_document(segment_id)
+            if not segment_document:
+                return None
+            self._segments[segment_id] = segment_document['archived_stages']
+        return deepcopy(self._segments[segment_id])
+
+    def get_auction_document(self, auction_doc_id):
+        auction_document = self._database.get_auction_document(auction_doc_id)
+        segment_ids = auction_document.pop('stages_segments', None)
+        if not segment_ids:
+            return auction_document
+        stages_offset = auction_document.pop('stages_offset', 0)
+        archived_stages = []
+        for segment_id in segment_ids:
+            segment = self._get_segment(segment_id)
+            if segment is None:
+                LOGGER.error("Segment {} of document {} is not available".format(segment_id, auction_doc_id))
+                return {}
+            archived_stages.extend(segment)
+        auction_document['stages'][1:1] = archived_stages
+        auction_document['current_stage'] += stages_offset
+        return auction_document
+
+    def _save_segments(self, auction_document, auction_doc_id, archived_count):
+        """
+        Write segments of archived stages which differ from the stored ones
+
+        :return: identifiers of all segments or None if writing failed
+        """
+        stages = auction_document['stages']
+        segment_ids = []
+        for number, start in enumerate(xrange(1, archived_count + 1, self.segment_size)):
+            segment_id = self._get_segment_id(auction_doc_id, number)
+            segment = stages[start:start + self.segment_size]
+            if self._segments.get(segment_id) != segment:
+                segment_document = {
+                    '_id': segment_id,
+                    'auction_id': auction_doc_id,
+                    'offset': start,
+                    'archived_stages': segment,
+                }
+                if not self._database.save_auction_document(segment_document, segment_id):
+                    return None
+                self._segments[segment_id] = deepcopy(segment)
+            segment_ids.append(segment_id)
+        return segment_ids
+
+    def save_auction_document(self, auction_document, auction_doc_id):
+        current_stage = int(auction_document.get('current_stage', 0))
+        # The first stage stays in place, so auction start is available
+        # from document itself
+        archived_count = max(current_stage - 1, 0) // self.segment_size * self.segment_size
+        segment_ids = None
+        if archived_count:
+            segment_ids = self._save_segments(auction_document, auction_doc_id, archived_count)
+        if not segment_ids:
+            # Document without pointer is complete by itself, so it is
+            # written whole if there is nothing to archive or segments
+            # couldn't be written
+            return self._database.save_auction_document(auction_document, auction_doc_id)
+
+        stages = auction_document['stages']
+        stored_document = dict(auction_document)
+        stored_document['stages'] = stages[:1] + stages[archived_count + 1:]
+        stored_document['current_stage'] = current_stage - archived_count
+        stored_document['stages_offset'] = archived_count
+        stored_document['stages_segments'] = segment_ids
+        response = self._database.save_auction_document(stored_document, auction_doc_id)
+        if '_rev' in stored_document:
+            auction_document['_rev'] = stored_document['_rev']
+        return response
 
 
 DATABASE_MAPPING = {
     'couchdb': CouchDB,
+    'couchdb_delta': CouchDBDelta,
 }
 
 PKG_NAMESPACE = "openprocurement.auction.texas.database"
 
-for entry_point in iter_entry_points(PKG_NAMESPACE):
-    plugin = entry_point.load()
-    DATABASE_MAPPING[entry_point.name] = plugin()
+
+def load_plugins():
+    # Plugins are loaded on demand rather than on import of this module,
+    # so plugin modules are able to import IDatabase and CouchDB from here
+    for entry_point in iter_entry_points(PKG_NAMESPACE):
+        if entry_point.name not in DATABASE_MAPPING:
+            plugin = entry_point.load()
+            DATABASE_MAPPING[entry_point.name] = plugin()
 
 
 def prepare_database(config):
+    load_plugins()
     database_type = config.get('type')
     database_class = DATABASE_MAPPING.get(database_type, None)
 
@@ -176,4 +588,8 @@ def prepare_database(config):
         )
 
     database = database_class(config)
+    if config.get('stages_segment_size'):
+        database = SegmentedDatabase(database, int(config['stages_segment_size']))
+    if config.get('coalesce_window'):
+        database = CoalescingDatabase(database, float(config['coalesce_window']))
     return database
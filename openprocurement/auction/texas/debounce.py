@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from gevent import spawn_later
+
+from openprocurement.auction.texas.constants import SSE_DEBOUNCE_WINDOW
+from openprocurement.auction.texas.metrics import METRICS
+
+
+class Debouncer(object):
+    """
+    Coalesces repeated low priority events, like ClientsList, which only
+    carry the latest state. The first event for key is sent at once and
+    opens window, events for the same key within window are coalesced into
+    the one sent when window ends, so at most one event per window is sent
+    and the last one carries the final state.
+
+    Attributes:
+    window: number of seconds of coalescing window, 0 to send every event
+    :type window: float
+    _pending: callbacks of the last coalesced events by keys, None for keys
+              with open window and no coalesced event
+    :type _pending: dict
+    """
+
+    def __init__(self, window=SSE_DEBOUNCE_WINDOW):
+        self.window = float(window)
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __call__(self, key, callback):
+        """
+        Call callback now or when window of key ends
+
+        :param key: key of coalesced events, like event name and bidder
+        :param callback: callable which sends event, it should read state
+                         when it is called, not when it is scheduled
+        """
+        if not self.window:
+            callback()
+            return
+        if key in self._pending:
+            if self._pending[key] is not None:
+                METRICS.increment('sse.debounced')
+            self._pending[key] = callback
+            return
+        self._pending[key] = None
+        spawn_later(self.window, self._flush, key)
+        callback()
+
+    def _flush(self, key):
+        callback = self._pending.pop(key, None)
+        if callback is not None:
+            self(key, callback)
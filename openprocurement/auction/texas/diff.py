@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from copy import deepcopy
+
+
+def _pointer_token(key):
+    return unicode(key).replace(u'~', u'~0').replace(u'/', u'~1')
+
+
+def make_json_patch(old, new, path=''):
+    """
+    Build list of JSON patch (RFC 6902) operations which turn old object into
+    new one. Only 'add', 'remove' and 'replace' operations are produced,
+    items appended to list are added with '-' index.
+
+    :param old: initial object
+    :param new: changed object
+    :param path: JSON pointer of compared objects
+    :return: list of operations
+    """
+    if old is new or old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        patch = []
+        for key in old:
+            if key not in new:
+                patch.append({'op': 'remove', 'path': u'{}/{}'.format(path, _pointer_token(key))})
+        for key in new:
+            key_path = u'{}/{}'.format(path, _pointer_token(key))
+            if key in old:
+                patch.extend(make_json_patch(old[key], new[key], key_path))
+            else:
+                patch.append({'op': 'add', 'path': key_path, 'value': new[key]})
+        return patch
+    if isinstance(old, list) and isinstance(new, list):
+        patch = []
+        common = min(len(old), len(new))
+        for index in xrange(common):
+            patch.extend(make_json_patch(old[index], new[index], u'{}/{}'.format(path, index)))
+        for index in xrange(common, len(new)):
+            patch.append({'op': 'add', 'path': u'{}/-'.format(path), 'value': new[index]})
+        for index in xrange(len(old) - 1, common - 1, -1):
+            patch.append({'op': 'remove', 'path': u'{}/{}'.format(path, index)})
+        return patch
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+
+def apply_json_patch(document, patch):
+    """
+    Apply operations made by make_json_patch to document in place. Values
+    are copied, so document doesn't share objects with patch.
+
+    :param document: object to change
+    :param patch: list of operations
+    :return: changed document
+    """
+    for operation in patch:
+        if not operation['path']:
+            document = deepcopy(operation['value'])
+            continue
+        tokens = [
+            token.replace(u'~1', u'/').replace(u'~0', u'~')
+            for token in operation['path'].split(u'/')[1:]
+        ]
+        key = tokens.pop()
+        parent = document
+        for token in tokens:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        if isinstance(parent, list):
+            if operation['op'] == 'add' and key == u'-':
+                parent.append(deepcopy(operation['value']))
+            elif operation['op'] == 'add':
+                parent.insert(int(key), deepcopy(operation['value']))
+            elif operation['op'] == 'remove':
+                del parent[int(key)]
+            else:
+                parent[int(key)] = deepcopy(operation['value'])
+        elif operation['op'] == 'remove':
+            del parent[key]
+        else:
+            parent[key] = deepcopy(operation['value'])
+    return document
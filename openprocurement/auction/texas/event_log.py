@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+from collections import deque
+from uuid import uuid4
+
+
+class EventLog(object):
+    """
+    Ring buffer of recent SSE events of auction. Events get monotonically
+    increasing identifiers, so client which reconnects with Last-Event-ID
+    receives only events it missed instead of resynchronizing. Identifiers
+    are prefixed with epoch of the log, so identifiers issued by previous
+    worker process are not mistaken for the current ones.
+
+    Attributes:
+    size: maximum number of kept events
+    :type size: int
+    epoch: unique prefix of identifiers of this log
+    :type epoch: str
+    _last: sequence number of the last event
+    :type _last: int
+    _events: sequence numbers, receivers and frames of kept events, receivers
+             are identifiers of bidders or None if event was sent to all bidders
+    :type _events: collections.deque
+    """
+
+    def __init__(self, size=1000):
+        self.size = int(size)
+        self.epoch = uuid4().hex[:8]
+        self._last = 0
+        self._events = deque(maxlen=self.size)
+
+    def __len__(self):
+        return len(self._events)
+
+    @property
+    def last(self):
+        """
+        Sequence number of the last issued identifier, 0 if none was issued
+        """
+        return self._last
+
+    def next_id(self):
+        """
+        Issue identifier for the next event
+
+        :return: sequence number and identifier of event
+        :rtype: (int, str)
+        """
+        self._last += 1
+        return self._last, '{}-{}'.format(self.epoch, self._last)
+
+    def append(self, sequence, frame, bidders=None):
+        """
+        Keep event for replay
+
+        :param sequence: sequence number issued by next_id
+        :param frame: encoded event with its identifier
+        :param bidders: identifiers of bidders who received event, None if
+                        event was sent to all bidders
+        """
+        self._events.append((sequence, frozenset(bidders) if bidders is not None else None, frame))
+
+    def _parse(self, event_id):
+        epoch, _, sequence = (event_id or '').partition('-')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def replay(self, last_event_id, bidder):
+        """
+        Return events sent to bidder after event with provided identifier
+
+        :param last_event_id: identifier of the last event client received
+        :param bidder: identifier of bidder
+        :return: frames of missed events in order they were sent, None if
+                 missed events are not known and client has to resynchronize
+        :rtype: list
+        """
+        last = self._parse(last_event_id)
+        if last is None or last > self._last:
+            return None
+        oldest = self._events[0][0] if self._events else self._last + 1
+        if last < oldest - 1:
+            return None
+        return [
+            frame for sequence, bidders, frame in self._events
+            if sequence > last and (bidders is None or bidder in bidders)
+        ]
@@ -1,20 +1,181 @@
+from datetime import datetime
+
 from sse import Sse as PySse
-from gevent.queue import Queue
+from gevent import sleep, spawn_later
 from flask import (
     current_app, Blueprint, request,
     session, Response, jsonify, abort
 )
-from openprocurement.auction.event_source import (
-    send_event_to_client, send_event, SseStream
-)
 from openprocurement.auction.utils import (
     prepare_extra_journal_fields, get_bidder_id
 )
 
+from openprocurement.auction.texas.channels import Channel, DroppableFrame, STOP_SSE, encode_event
+from openprocurement.auction.texas.constants import SSE_CHANNEL_SIZE, SSE_RETRY, TICK_INTERVAL
+from openprocurement.auction.texas.metrics import METRICS
 
 sse = Blueprint('sse', __name__)
 
 
+def publish(bidders, frame):
+    """
+    Put encoded frame into channels of all clients of bidders
+
+    :param bidders: identifiers of bidders
+    :param frame: SSE frame made by encode_event
+    """
+    for bidder in bidders:
+        channels = current_app.auction_bidders.get(bidder, {}).get('channels', {})
+        for channel in channels.values():
+            channel.put(frame)
+        METRICS.increment('sse.delivered', len(channels))
+
+
+def send_event_to_client(bidder, client, data, event=''):
+    channel = current_app.auction_bidders.get(bidder, {}).get('channels', {}).get(client)
+    if channel is not None:
+        channel.put(encode_event(event, data))
+        METRICS.increment('sse.delivered')
+
+
+def log_event(event, data, bidders=None):
+    """
+    Encode event with identifier and keep it in event log for replay
+
+    :param bidders: identifiers of bidders who receive event, None if event
+                    is sent to all bidders
+    :return: SSE frame
+    """
+    sequence, event_id = current_app.event_log.next_id()
+    frame = encode_event(event, data, event_id)
+    current_app.event_log.append(sequence, frame, bidders)
+    return frame
+
+
+def send_event(bidder, data, event=''):
+    """
+    Send event to all clients of bidder, event is encoded once
+    """
+    publish([bidder], log_event(event, data, [bidder]))
+
+
+def broadcast(data, event=''):
+    """
+    Send event to all clients of all bidders, event is encoded once
+    """
+    publish(list(current_app.auction_bidders), log_event(event, data))
+
+
+def debounce_event(bidder, event, get_data):
+    """
+    Send low priority event to all clients of bidder at most once per
+    debounce window, data is taken when event is sent, so coalesced event
+    carries the latest data
+
+    :param get_data: callable which returns data of event
+    """
+    app = current_app._get_current_object()
+
+    def send():
+        with app.app_context():
+            send_event(bidder, get_data(), event)
+    app.debouncer((event, bidder), send)
+
+
+def send_clients_list(bidder):
+    """
+    Send clients of bidder to all its clients, clients connecting or
+    leaving at once get one ClientsList with the final list
+    """
+    app = current_app._get_current_object()
+    debounce_event(
+        bidder, 'ClientsList', lambda: app.auction_bidders.get(bidder, {}).get('clients', {})
+    )
+
+
+def stop_client(bidder, client):
+    """
+    Close event stream of client after events which are already sent to it
+    """
+    channel = current_app.auction_bidders.get(bidder, {}).get('channels', {}).get(client)
+    if channel is not None:
+        channel.put({'event': STOP_SSE})
+
+
+def release_stream(app, channel, keep_client=False):
+    """
+    Unregister event stream of channel, stop sending events to it and
+    remove its client from clients list of bidder
+
+    :param app: application, stream is closed out of request context
+    :param keep_client: keep client in clients list, when stream is
+                        replaced by new stream of the same client
+    """
+    app.streams.close(channel)
+    bidder = app.auction_bidders.get(channel.bidder_id, {})
+    channels = bidder.get('channels', {})
+    if channels.get(channel.client_id) is not channel:
+        return
+    del channels[channel.client_id]
+    if not keep_client and bidder.get('clients', {}).pop(channel.client_id, None) is not None:
+        with app.app_context():
+            send_clients_list(channel.bidder_id)
+
+
+def push_timestamps_events(app):
+    with app.app_context():
+        while True:
+            sleep(TICK_INTERVAL)
+            # Missed ticks are not replayed, so they are not logged, and
+            # they are the first to be dropped for slow clients
+            publish(
+                list(app.auction_bidders),
+                DroppableFrame(encode_event('Tick', {'time': datetime.now(app.config['timezone']).isoformat()}))
+            )
+
+
+class SseStream(object):
+    """
+    Stream of SSE frames put into client channel. Frames are yielded as
+    they are, messages put by shared event_source helpers as dicts are
+    encoded by stream.
+
+    Attributes:
+    queue: channel of client
+    :type queue: openprocurement.auction.texas.channels.Channel
+    timeout: number of seconds after which stream is closed, 0 to keep
+             stream open until client disconnects
+    :type timeout: int
+    on_close: callable which is called when server closes stream
+    :type on_close: callable
+    """
+
+    def __init__(self, queue, bidder_id=None, client_id=None, timeout=0, on_close=None):
+        self.queue = queue
+        self.bidder_id = bidder_id
+        self.client_id = client_id
+        self.timeout = timeout
+        self.on_close = on_close
+
+    def close(self):
+        # Response is passed directly to WSGI server, which calls close
+        # of response iterable when client disconnects or stream ends
+        if self.on_close is not None:
+            self.on_close()
+
+    def __iter__(self):
+        if self.timeout:
+            spawn_later(self.timeout, self.queue.put, {'event': STOP_SSE})
+        yield 'retry: {}\n\n'.format(SSE_RETRY)
+        while True:
+            message = self.queue.get()
+            if isinstance(message, dict):
+                if message.get('event') == STOP_SSE:
+                    return
+                message = encode_event(message.get('event', ''), message.get('data', ''))
+            yield message
+
+
 @sse.route("/set_sse_timeout", methods=['POST'])
 def set_sse_timeout():
     current_app.logger.info(
@@ -30,14 +191,31 @@ def set_sse_timeout():
             bidder = bidder_data['bidder_id']
             if 'timeout' in request.json:
                 session["sse_timeout"] = int(request.json['timeout'])
-                send_event_to_client(
-                    bidder, session['client_id'], '',
-                    event='StopSSE'
-                )
+                stop_client(bidder, session['client_id'])
                 return jsonify({'timeout': session["sse_timeout"]})
     return abort(401)
 
 
+@sse.route("/auction_state")
+def auction_state():
+    """
+    Stream of auction document: snapshot and then changes of document as
+    JSON patches, or only changes missed since Last-Event-ID on reconnect
+    """
+    channel = Channel(current_app.config.get('event_source', {}).get('channel_size', SSE_CHANNEL_SIZE))
+    state = current_app.context['auction_state']
+    state.subscribe(channel, request.headers.get('Last-Event-ID'))
+    response = Response(
+        SseStream(channel, on_close=lambda: state.unsubscribe(channel)),
+        direct_passthrough=True,
+        mimetype='text/event-stream',
+        content_type='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @sse.route("/event_source")
 def event_source():
     current_app.logger.debug(
@@ -47,57 +225,79 @@ def event_source():
     if 'remote_oauth' in session and 'client_id' in session:
         bidder_data = get_bidder_id(current_app, session)
         if bidder_data:
-            valid_bidder = False
             client_hash = session['client_id']
             bidder = bidder_data['bidder_id']
-            for bidder_info in current_app.context['bidders_data']:
-                if bidder_info['id'] == bidder:
-                    valid_bidder = True
-                    break
-
-            if valid_bidder:
+            if bidder in current_app.context['bidders_index']:
                 if bidder not in current_app.auction_bidders:
                     current_app.auction_bidders[bidder] = {
                         "clients": {},
                         "channels": {}
                     }
 
-                if client_hash not in current_app.auction_bidders[bidder]:
-                    real_ip = request.environ.get('HTTP_X_REAL_IP', '')
-                    if real_ip.startswith('172.'):
-                        real_ip = ''
-                    current_app.auction_bidders[bidder]["clients"][client_hash] = {
-                        'ip': ','.join(
-                            [request.headers.get('X-Forwarded-For', ''), real_ip]
-                        ),
-                        'User-Agent': request.headers.get('User-Agent'),
-                    }
-                    current_app.auction_bidders[bidder]["channels"][client_hash] = Queue()
-
-                current_app.logger.info(
-                    'Send identification for bidder: {} with client_hash {}'.format(bidder, client_hash),
-                    extra=prepare_extra_journal_fields(request.headers)
+                real_ip = request.environ.get('HTTP_X_REAL_IP', '')
+                if real_ip.startswith('172.'):
+                    real_ip = ''
+                current_app.auction_bidders[bidder]["clients"][client_hash] = {
+                    'ip': ','.join(
+                        [request.headers.get('X-Forwarded-For', ''), real_ip]
+                    ),
+                    'User-Agent': request.headers.get('User-Agent'),
+                }
+                channel = Channel(
+                    current_app.config.get('event_source', {}).get('channel_size', SSE_CHANNEL_SIZE),
+                    bidder_id=bidder,
+                    client_id=client_hash
                 )
-                identification_data = {"bidder_id": bidder,
-                                       "client_id": client_hash,
-                                       "return_url": session.get('return_url', '')}
 
-                send_event_to_client(bidder, client_hash, identification_data,
-                                     "Identification")
+                # Reconnected client gets only events it missed if they are
+                # still in event log and fit into channel, otherwise it is
+                # synchronized again
+                last_event_id = request.headers.get('Last-Event-ID')
+                missed = current_app.event_log.replay(last_event_id, bidder) if last_event_id else None
+                if missed is not None and len(missed) > channel.size:
+                    missed = None
+                if missed is not None:
+                    current_app.logger.info(
+                        'Resume events for bidder: {} with client_hash {} after event {}'.format(
+                            bidder, client_hash, last_event_id),
+                        extra=prepare_extra_journal_fields(request.headers)
+                    )
+                    for frame in missed:
+                        channel.put(frame)
+                    METRICS.increment('sse.resumed')
+                    METRICS.increment('sse.replayed', len(missed))
+                app = current_app._get_current_object()
+                for closed in app.streams.open(channel):
+                    release_stream(
+                        app, closed, keep_client=(closed.bidder_id, closed.client_id) == (bidder, client_hash)
+                    )
+                    closed.put({'event': STOP_SSE})
+                current_app.auction_bidders[bidder]["channels"][client_hash] = channel
 
+                if missed is None:
+                    current_app.logger.info(
+                        'Send identification for bidder: {} with client_hash {}'.format(bidder, client_hash),
+                        extra=prepare_extra_journal_fields(request.headers)
+                    )
+                    identification_data = {"bidder_id": bidder,
+                                           "client_id": client_hash,
+                                           "return_url": session.get('return_url', '')}
+
+                    send_event_to_client(bidder, client_hash, identification_data,
+                                         "Identification")
+
+                # Resumed client is added to clients again, so other clients
+                # of bidder get list with it after the one sent when it left
                 if not session.get("sse_timeout", 0):
                     current_app.logger.debug('Send ClientsList')
-                    send_event(
-                        bidder,
-                        current_app.auction_bidders[bidder]["clients"],
-                        "ClientsList"
-                    )
+                    send_clients_list(bidder)
                 response = Response(
                     SseStream(
-                        current_app.auction_bidders[bidder]["channels"][client_hash],
+                        channel,
                         bidder_id=bidder,
                         client_id=client_hash,
-                        timeout=session.get("sse_timeout", 0)
+                        timeout=session.get("sse_timeout", 0),
+                        on_close=lambda: release_stream(app, channel)
                     ),
                     direct_passthrough=True,
                     mimetype='text/event-stream',
@@ -1,17 +1,19 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime
-from decimal import Decimal
 
 import wtforms_json
 from flask import request, session, current_app as app
-from wtforms import Form, FloatField, StringField
-from wtforms.validators import DataRequired, ValidationError
+from wtforms import Form, Field, StringField
+from wtforms.validators import DataRequired, StopValidation, ValidationError
+from wtforms.widgets import TextInput
 
 from openprocurement.auction.utils import prepare_extra_journal_fields
 from openprocurement.auction.worker_core.constants import TIMEZONE
 
+from openprocurement.auction.texas.admission import AdmissionError
+from openprocurement.auction.texas.amount import Amount, AmountPrecisionError
 from openprocurement.auction.texas.constants import MAIN_ROUND
-from openprocurement.auction.texas.utils import lock_server
+from openprocurement.auction.texas.tracing import span
 
 
 wtforms_json.init()
@@ -23,21 +25,55 @@ def validate_bid_value(form, field):
     amount. Bid amount should also be multiple of minimalStep amount.
     """
     stage_id = form.document['current_stage'] if form.document['current_stage'] >= 0 else 0
-    minimal_step = form.document['minimalStep']['amount']
-    current_amount = form.document['stages'][stage_id].get('amount')
-    if app.context['server_actions'].locked():
-        raise ValidationError(u'Another bid is already processing')
-    if form.document['stages'][stage_id]['type'] != MAIN_ROUND:
+    stage = form.document['stages'][stage_id]
+    if stage['type'] != MAIN_ROUND:
         raise ValidationError(u'Current stage does not allow bidding')
-    if field.data < current_amount:
+    amount = Amount.from_value(field.data)
+    try:
+        current_amount = Amount.from_document(stage.get('amount'))
+        minimal_step = Amount.from_document(form.document['minimalStep'])
+    except ValueError:
+        raise ValidationError(u'Auction document has invalid amount')
+    if amount < current_amount:
         raise ValidationError(u'Too low value')
-    if Decimal(field.data).quantize(Decimal('0.01')) % Decimal(minimal_step).quantize(Decimal('0.01')) and field.data != current_amount:
+    if amount != current_amount and minimal_step and amount % minimal_step:
         raise ValidationError(
-            u'Value should be a multiplier of ' 
-            u'a minimalStep amount ({})'.format(minimal_step)
+            u'Value should be a multiplier of '
+            u'a minimalStep amount ({})'.format(form.document['minimalStep']['amount'])
         )
 
 
+class AmountField(Field):
+    """
+    Field which parses money amount into Amount
+    """
+    widget = TextInput()
+    # Whether submitted amount had more decimal places than minor units
+    imprecise = False
+
+    def _value(self):
+        return unicode(self.data) if self.data is not None else u''
+
+    def process_formdata(self, valuelist):
+        self.imprecise = False
+        if valuelist:
+            try:
+                self.data = Amount.from_value(valuelist[0])
+            except AmountPrecisionError as e:
+                self.data = None
+                self.imprecise = True
+                raise ValueError(self.gettext(e.args[0]))
+            except ValueError:
+                self.data = None
+                raise ValueError(self.gettext(u'Not a valid amount value'))
+
+    def pre_validate(self, form):
+        # Amount more precise than minor units is rejected instead of being
+        # rounded, so bidder gets the reason instead of missing amount
+        if self.imprecise:
+            raise StopValidation()
+
+
 class BidsForm(Form):
     bidder_id = StringField(
         'bidder_id',
@@ -45,7 +81,7 @@ class BidsForm(Form):
             DataRequired(message=u'No bidder id'),
         ]
     )
-    bid = FloatField(
+    bid = AmountField(
         'bid',
         validators=[
             DataRequired(message=u'Bid amount is required'),
@@ -54,40 +90,97 @@ class BidsForm(Form):
     )
 
 
-def form_handler():
+def process_bid_form():
+    """
+    Validate and add bid from request
+
+    :return: tuple of response and flag whether the response is final, i.e.
+             the same submission would not succeed if retried
+    """
     form = app.bids_form.from_json(request.json)
-    form.document = app.context['auction_document']
     current_time = datetime.now(TIMEZONE)
-    if form.validate():
-        with lock_server(app.context['server_actions']):
-            ok = app.bids_handler.add_bid(form.document['current_stage'],
-                                          {'amount': form.data['bid'],
-                                           'bidder_id': form.data['bidder_id'],
-                                           'time': current_time.isoformat()})
-            if not isinstance(ok, Exception):
-                app.logger.info(
-                    "Bidder {} with client_id {} placed bid {} in {}".format(
-                        form.data['bidder_id'], session['client_id'],
-                        form.data['bid'], current_time.isoformat()
-                    ), extra=prepare_extra_journal_fields(request.headers)
-                )
-                return {'status': 'ok', 'data': form.data}
-            else:
-                app.logger.info(
-                    "Bidder {} with client_id {} wants place "
-                    "bid {} in {} with errors {}".format(
-                        form.data['bidder_id'], session['client_id'],
-                        form.data['bid'], current_time.isoformat(), repr(ok)
-                    ), extra=prepare_extra_journal_fields(request.headers)
-                )
-                return {"status": "failed", "errors": [[repr(ok)]]}
-    else:
+    try:
+        # Bid is validated against the document as it is when bid's
+        # turn comes, bids processed before it could change the stage
+        with app.context['bids_queue'].admit(form.data['bidder_id']):
+            form.document = app.context['auction_document']
+            with span('bid.validation'):
+                valid = form.validate()
+            if valid:
+                with span('bid.add_bid'):
+                    ok = app.bids_handler.add_bid(form.document['current_stage'],
+                                                  {'amount': form.data['bid'],
+                                                   'bidder_id': form.data['bidder_id'],
+                                                   'time': current_time.isoformat()})
+                if not isinstance(ok, Exception):
+                    app.logger.info(
+                        "Bidder {} with client_id {} placed bid {} in {}".format(
+                            form.data['bidder_id'], session['client_id'],
+                            form.data['bid'], current_time.isoformat()
+                        ), extra=prepare_extra_journal_fields(request.headers)
+                    )
+                    return {'status': 'ok', 'data': form.data}, True
+                else:
+                    app.logger.info(
+                        "Bidder {} with client_id {} wants place "
+                        "bid {} in {} with errors {}".format(
+                            form.data['bidder_id'], session['client_id'],
+                            form.data['bid'], current_time.isoformat(), repr(ok)
+                        ), extra=prepare_extra_journal_fields(request.headers)
+                    )
+                    return {"status": "failed", "errors": [[repr(ok)]]}, False
+    except AdmissionError as e:
         app.logger.info(
             "Bidder {} with client_id {} wants place "
-            "bid {} in {} with errors {}".format(
+            "bid {} in {} but bid was not admitted: {}".format(
                 request.json.get('bidder_id', 'None'), session['client_id'],
-                request.json.get('bid', 'None'), current_time.isoformat(),
-                repr(form.errors)
+                request.json.get('bid', 'None'), current_time.isoformat(), unicode(e)
             ), extra=prepare_extra_journal_fields(request.headers)
         )
-        return {'status': 'failed', 'errors': form.errors}
+        return {'status': 'failed', 'errors': {'bid': [unicode(e)]}}, False
+    app.logger.info(
+        "Bidder {} with client_id {} wants place "
+        "bid {} in {} with errors {}".format(
+            request.json.get('bidder_id', 'None'), session['client_id'],
+            request.json.get('bid', 'None'), current_time.isoformat(),
+            repr(form.errors)
+        ), extra=prepare_extra_journal_fields(request.headers)
+    )
+    return {'status': 'failed', 'errors': form.errors}, True
+
+
+def form_handler(bid_key=None):
+    """
+    Process bid from request. Submissions with key supplied by client are
+    processed once, retries with the same key are answered with the outcome
+    of the first submission.
+
+    :param bid_key: idempotency key of submission
+    """
+    if not bid_key:
+        return process_bid_form()[0]
+
+    bidder_id = request.json.get('bidder_id')
+    outcomes = app.context['bid_outcomes']
+    outcome, claimed = outcomes.claim(bidder_id, bid_key)
+    if not claimed:
+        app.logger.info(
+            "Bidder {} with client_id {} retries bid with key {}".format(
+                bidder_id, session['client_id'], bid_key
+            ), extra=prepare_extra_journal_fields(request.headers)
+        )
+        response = outcomes.wait(outcome)
+        if response is None:
+            return {'status': 'failed', 'errors': {'bid': [u'Bid is still processing, try again']}}
+        return response
+
+    try:
+        response, final = process_bid_form()
+    except Exception:
+        outcomes.discard(bidder_id, bid_key, outcome, None)
+        raise
+    if final:
+        outcomes.resolve(outcome, response)
+    else:
+        outcomes.discard(bidder_id, bid_key, outcome, response)
+    return response
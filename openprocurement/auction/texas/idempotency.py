@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+from gevent.event import AsyncResult
+
+from openprocurement.auction.texas.metrics import METRICS
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_FIELD = 'bid_key'
+
+
+def get_idempotency_key(request):
+    """
+    Return key of bid submission supplied by client either in header or
+    in request body, None if client has not supplied it
+    """
+    key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+    if not key and isinstance(request.json, dict):
+        key = request.json.get(IDEMPOTENCY_KEY_FIELD)
+    return unicode(key) if key else None
+
+
+class BidOutcomes(object):
+    """
+    Outcomes of recent bid submissions by keys supplied by clients. Retried
+    submission with the same key is answered with the outcome of the first
+    one, or waits for it if the first one is still processed, without going
+    through admission queue and database again. Least recently used outcomes
+    are evicted when number of kept outcomes exceeds max_size.
+
+    Attributes:
+    max_size: maximum number of kept outcomes
+    :type max_size: int
+    timeout: maximum number of seconds retry waits for outcome of the first submission
+    :type timeout: float
+    _outcomes: outcomes by bidder identifier and key pairs in order of use
+    :type _outcomes: collections.OrderedDict
+    """
+
+    def __init__(self, max_size=1000, timeout=30):
+        self.max_size = int(max_size)
+        self.timeout = float(timeout)
+        self._outcomes = OrderedDict()
+
+    def __len__(self):
+        return len(self._outcomes)
+
+    def claim(self, bidder_id, key):
+        """
+        Return outcome of submission with the key. New empty outcome is
+        created if key was not seen and the caller is responsible for
+        setting it with resolve or discard.
+
+        :param bidder_id: identifier of bidder who made the submission
+        :param key: key of submission supplied by client
+        :return: tuple of outcome and flag whether it was created
+        :rtype: (gevent.event.AsyncResult, bool)
+        """
+        entry_key = (bidder_id, key)
+        outcome = self._outcomes.pop(entry_key, None)
+        if outcome is not None:
+            self._outcomes[entry_key] = outcome
+            METRICS.increment('bid_outcomes.hits')
+            return outcome, False
+        outcome = AsyncResult()
+        self._outcomes[entry_key] = outcome
+        while len(self._outcomes) > self.max_size:
+            self._outcomes.popitem(last=False)
+        return outcome, True
+
+    def wait(self, outcome):
+        """
+        Return response of claimed submission
+
+        :return: response or None if it was not finished within timeout
+        """
+        outcome.wait(self.timeout)
+        return outcome.value
+
+    def resolve(self, outcome, response):
+        """
+        Keep final response of submission for retries
+        """
+        outcome.set(response)
+
+    def discard(self, bidder_id, key, outcome, response):
+        """
+        Answer retries which are waiting with the response of failed
+        submission but forget it, so the next retry is processed again.
+        Used for transient failures, like full admission queue.
+        """
+        if self._outcomes.get((bidder_id, key)) is outcome:
+            del self._outcomes[(bidder_id, key)]
+        outcome.set(response)
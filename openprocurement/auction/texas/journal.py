@@ -7,6 +7,11 @@ AUCTION_WORKER_DB_SAVE_DOC = uuid.UUID('48b5f9fef4124cf39be6d2e4722a71c3')
 AUCTION_WORKER_DB_SAVE_DOC_ERROR = uuid.UUID('b219ee898b834628be23424d0c27a8b8')
 AUCTION_WORKER_DB_GET_DOC_UNHANDLED_ERROR = uuid.UUID('2188fca7e99a4d409817567f894421cd')
 AUCTION_WORKER_DB_SAVE_DOC_UNHANDLED_ERROR = uuid.UUID('4b650dea8eb84412a4d630265587dbcb')
+AUCTION_WORKER_DB_SAVE_DOC_PATCH = uuid.UUID('5ee44a6a5a534f55b86f4b105f992673')
+AUCTION_WORKER_DB_SAVE_DOC_PATCH_ERROR = uuid.UUID('adca5eb8b4464675a40f4450c5797734')
+AUCTION_WORKER_DB_CIRCUIT_BREAKER_OPEN = uuid.UUID('93d5482fcb224b41bee37e85a73837a4')
+AUCTION_WORKER_DB_SAVE_DOC_CONFLICT = uuid.UUID('7e166750603a49e6af6b807517bea8b9')
+AUCTION_WORKER_DB_COMPACT_JOURNAL = uuid.UUID('e906ab8bd2ca4f6b8873d8fddfd79d00')
 
 AUCTION_WORKER_SERVICE_PREPARE_SERVER = uuid.UUID('7ddc92a966f7492e8dbf59f7916831c4')
 AUCTION_WORKER_SERVICE_STOP_AUCTION_WORKER = uuid.UUID('e7c0a6eb8ec441e2a7cf32bad5ffa57a')
@@ -21,6 +26,8 @@ AUCTION_WORKER_SERVICE_AUCTION_CANCELED = uuid.UUID('77568c4543e24b70a7633d87153
 AUCTION_WORKER_SERVICE_AUCTION_STATUS_CANCELED = uuid.UUID('38b2145fa25d41198493526085168bd2')
 AUCTION_WORKER_SERVICE_AUCTION_RESCHEDULE = uuid.UUID('f11bba4b55d547f1aa2e8cb2e13e4485')
 AUCTION_WORKER_SERVICE_AUCTION_NOT_FOUND = uuid.UUID('ff4a1d5cf0134bf48a458b65805c9a6e')
+AUCTION_WORKER_SERVICE_TRACE_SPAN = uuid.UUID('108b0e9c49ea462fa2b16a0daa1fc882')
+AUCTION_WORKER_SERVICE_LATENCY_SUMMARY = uuid.UUID('b7d38f261a0a4a1c8314da134ca76b38')
 
 AUCTION_WORKER_BIDS_LATEST_BID_CANCELLATION = uuid.UUID('c558309b45004ce2bd52ec4845e43b48')
 
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from copy import deepcopy
+from uuid import uuid4
+
+from couchdb.http import ResourceConflict, ResourceNotFound
+from zope.interface import implementer
+
+from openprocurement.auction.texas.database import IDatabase, CouchDB
+
+
+def make_revision(current_revision=None):
+    """
+    Make '_rev' value for the next version of document in couchdb format:
+    number of versions and unique suffix
+
+    :param current_revision: revision of the current version of document
+    :return: revision of the next version
+    """
+    generation = int(current_revision.split('-', 1)[0]) if current_revision else 0
+    return '{}-{}'.format(generation + 1, uuid4().hex)
+
+
+class MemoryStore(object):
+    """
+    In-process storage of documents with the same interface and revision
+    semantics as couchdb.Database: every save creates new '_rev' and saving
+    document with outdated or unknown revision fails with conflict.
+
+    Attributes:
+    _documents: copies of stored documents by their identifiers
+    :type _documents: dict
+    """
+
+    def __init__(self):
+        self._documents = {}
+
+    def __contains__(self, doc_id):
+        return doc_id in self._documents
+
+    def __getitem__(self, doc_id):
+        if doc_id not in self._documents:
+            raise ResourceNotFound(('not_found', 'missing'))
+        return deepcopy(self._documents[doc_id])
+
+    def __len__(self):
+        return len(self._documents)
+
+    def get(self, doc_id, default=None):
+        if doc_id not in self._documents:
+            return default
+        return deepcopy(self._documents[doc_id])
+
+    def save(self, document):
+        doc_id = document.setdefault('_id', uuid4().hex)
+        stored = self._documents.get(doc_id)
+        current_revision = stored['_rev'] if stored else None
+        if document.get('_rev') != current_revision:
+            raise ResourceConflict(('conflict', 'Document update conflict.'))
+        document['_rev'] = make_revision(current_revision)
+        self._documents[doc_id] = deepcopy(document)
+        return doc_id, document['_rev']
+
+    def delete(self, document):
+        stored = self._documents.get(document['_id'])
+        if stored is None:
+            raise ResourceNotFound(('not_found', 'missing'))
+        if stored['_rev'] != document.get('_rev'):
+            raise ResourceConflict(('conflict', 'Document update conflict.'))
+        del self._documents[document['_id']]
+
+
+# Stores are shared by all database objects of the process with the same name
+STORES = {}
+
+
+@implementer(IDatabase)
+class InMemoryDatabase(CouchDB):
+    """
+    Database which keeps documents in memory of the worker process. It works
+    with MemoryStore the same way CouchDB works with couchdb server, so it
+    could be used instead of CouchDB for benchmarking auction worker without
+    network I/O or for standalone auctions which don't need persistence.
+    Documents are lost when the process exits.
+    """
+
+    def _connect(self, config):
+        return STORES.setdefault(config.get('name', 'auctions'), MemoryStore())
+
+    def _get_key(self, config):
+        return 'memory:{}'.format(config.get('name', 'auctions'))
+
+
+def memory_database():
+    return InMemoryDatabase
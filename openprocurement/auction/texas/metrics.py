@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+
+class MetricsRegistry(object):
+    """
+    In-process registry of auction worker metrics
+
+    Attributes:
+    _counters: monotonically increasing values by names
+    :type _counters: collections.defaultdict
+    _gauges: current values by names
+    :type _gauges: dict
+    _histograms: summaries of observed values by names, each summary has
+                 count, sum, min and max of values
+    :type _histograms: dict
+    """
+
+    def __init__(self):
+        self._counters = defaultdict(int)
+        self._gauges = {}
+        self._histograms = {}
+
+    def increment(self, name, value=1):
+        self._counters[name] += value
+
+    def set_gauge(self, name, value):
+        self._gauges[name] = value
+
+    def observe(self, name, value):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            self._histograms[name] = {'count': 1, 'sum': value, 'min': value, 'max': value}
+            return
+        histogram['count'] += 1
+        histogram['sum'] += value
+        histogram['min'] = min(histogram['min'], value)
+        histogram['max'] = max(histogram['max'], value)
+
+    def snapshot(self):
+        return {
+            'counters': dict(self._counters),
+            'gauges': dict(self._gauges),
+            'histograms': dict((name, dict(histogram)) for name, histogram in self._histograms.items()),
+        }
+
+    def reset(self):
+        self._counters.clear()
+        self._gauges.clear()
+        self._histograms.clear()
+
+
+METRICS = MetricsRegistry()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from gevent import spawn
+from gevent.queue import JoinableQueue
+
+from openprocurement.auction.texas.metrics import METRICS
+from openprocurement.auction.texas.tracing import span
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+
+class PostCommitPipeline(object):
+    """
+    Queue of side effects of committed changes, like protocol updates and
+    audit logging, which are not needed to answer the request. Side effects
+    are run one by one on background greenlet in order they were submitted.
+    Failed side effect is logged and does not stop the following ones.
+
+    Attributes:
+    _queue: submitted side effects waiting to be run
+    :type _queue: gevent.queue.JoinableQueue
+    _worker: greenlet which runs side effects
+    :type _worker: gevent.Greenlet
+    """
+
+    def __init__(self):
+        self._queue = JoinableQueue()
+        self._worker = None
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def submit(self, name, func, *args, **kwargs):
+        """
+        Schedule side effect to be run after previously submitted ones
+
+        :param name: name of side effect for logs and metrics
+        :param func: callable which performs side effect
+        """
+        self._queue.put((name, func, args, kwargs))
+        METRICS.set_gauge('post_commit.depth', self._queue.qsize())
+        if self._worker is None or self._worker.dead:
+            self._worker = spawn(self._run)
+
+    def _run(self):
+        while not self._queue.empty():
+            name, func, args, kwargs = self._queue.get()
+            try:
+                with span('post_commit.{}'.format(name)):
+                    func(*args, **kwargs)
+            except Exception as e:
+                METRICS.increment('post_commit.failed')
+                LOGGER.error(
+                    "Post commit action {} failed with error: {}".format(name, e)
+                )
+            finally:
+                self._queue.task_done()
+                METRICS.set_gauge('post_commit.depth', self._queue.qsize())
+
+    def drain(self, timeout=None):
+        """
+        Wait until all submitted side effects are run
+
+        :param timeout: maximum number of seconds to wait
+        :return: True if all side effects were run
+        """
+        return self._queue.join(timeout=timeout)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import logging
+from random import uniform
+from time import time
+
+from gevent import sleep
+
+from openprocurement.auction.texas.metrics import METRICS
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker which stops requesting of failing service. It opens
+    after threshold consecutive failures, rejects all requests while open
+    and after reset_timeout lets a single trial request through, which
+    closes it on success or opens it again on failure.
+
+    Attributes:
+    name: name of the breaker used in metrics
+    :type name: str
+    threshold: number of consecutive failures which opens the breaker
+    :type threshold: int
+    reset_timeout: number of seconds the breaker stays open
+    :type reset_timeout: float
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name, threshold=20, reset_timeout=30):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._set_gauge()
+
+    def _set_gauge(self):
+        METRICS.set_gauge('{}.circuit_breaker.open'.format(self.name), int(self.state != self.CLOSED))
+
+    def allow(self):
+        if self.state == self.OPEN and time() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            return True
+        if self.state == self.CLOSED:
+            return True
+        METRICS.increment('{}.circuit_breaker.rejected'.format(self.name))
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != self.CLOSED:
+            LOGGER.info("Circuit breaker {} closed".format(self.name))
+            self.state = self.CLOSED
+            self._set_gauge()
+
+    def record_failure(self):
+        self.failures += 1
+        METRICS.increment('{}.failures'.format(self.name))
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+            LOGGER.warning("Circuit breaker {} opened after {} failures".format(self.name, self.failures))
+            METRICS.increment('{}.circuit_breaker.opened'.format(self.name))
+            self.state = self.OPEN
+            self.opened_at = time()
+            self._set_gauge()
+
+
+# Circuit breakers are shared by all policies which request the same service
+BREAKERS = {}
+
+
+class RetryPolicy(object):
+    """
+    Policy of retrying failed requests with exponential backoff and jitter
+
+    Attributes:
+    retries: maximum number of attempts
+    :type retries: int
+    backoff: delay in seconds after the first failed attempt, delay is
+             doubled after each next one
+    :type backoff: float
+    backoff_max: maximum delay in seconds
+    :type backoff_max: float
+    jitter: part of delay which is randomized, so requests of different
+            workers don't hit the service at the same time
+    :type jitter: float
+    breaker: circuit breaker of requested service
+    :type breaker: CircuitBreaker
+    """
+
+    def __init__(self, breaker, retries=10, backoff=0.1, backoff_max=5, jitter=0.5):
+        self.breaker = breaker
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+
+    @classmethod
+    def from_config(cls, name, key, config):
+        """
+        Create retry policy using config section of requested service
+
+        :param name: name of the service used in metrics
+        :param key: identifier of requested service, policies with the same
+                    key share circuit breaker
+        :param config: config section
+        :return: RetryPolicy object
+        """
+        if key not in BREAKERS:
+            BREAKERS[key] = CircuitBreaker(
+                name,
+                threshold=int(config.get('circuit_breaker_threshold', 20)),
+                reset_timeout=float(config.get('circuit_breaker_timeout', 30))
+            )
+        return cls(
+            BREAKERS[key],
+            retries=int(config.get('retries', 10)),
+            backoff=float(config.get('retry_backoff', 0.1)),
+            backoff_max=float(config.get('retry_backoff_max', 5)),
+            jitter=float(config.get('retry_jitter', 0.5))
+        )
+
+    def get_delay(self, attempt):
+        delay = min(self.backoff_max, self.backoff * 2 ** attempt)
+        return delay - uniform(0, delay * self.jitter)
+
+    def wait(self, attempt):
+        """
+        Sleep before the next attempt if there is any
+
+        :param attempt: number of failed attempt starting from 0
+        """
+        if attempt + 1 < self.retries:
+            METRICS.increment('{}.retries'.format(self.breaker.name))
+            sleep(self.get_delay(attempt))
@@ -9,6 +9,7 @@ from zope.interface import (
 )
 from zope.component import getGlobalSiteManager
 
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.gevent import GeventScheduler
 from openprocurement.auction.worker_core.constants import TIMEZONE
 from openprocurement.auction.executor import AuctionsExecutor
@@ -17,15 +18,17 @@ from openprocurement.auction.utils import (
     delete_mapping
 )
 from openprocurement.auction.texas.constants import (
-    END, PREANNOUNCEMENT
+    END, PAUSE, PREANNOUNCEMENT, POST_COMMIT_DRAIN_TIMEOUT
 )
 from openprocurement.auction.texas.journal import (
     AUCTION_WORKER_SERVICE_START_NEXT_STAGE,
-    AUCTION_WORKER_SERVICE_END_AUCTION
+    AUCTION_WORKER_SERVICE_END_AUCTION,
+    AUCTION_WORKER_SERVICE_LATENCY_SUMMARY
 )
 from openprocurement.auction.texas.context import IContext
 from openprocurement.auction.texas.database import IDatabase
 from openprocurement.auction.texas.datasource import IDataSource
+from openprocurement.auction.texas.tracing import get_latency_summary
 from openprocurement.auction.texas.utils import (
     lock_server,
     update_auction_document,
@@ -40,6 +43,9 @@ SCHEDULER = GeventScheduler(job_defaults={"misfire_grace_time": 100},
                             logger=LOGGER)
 SCHEDULER.timezone = TIMEZONE
 
+END_JOB_ID = 'auction:{}'.format(END)
+PAUSE_JOB_ID = 'auction:pause'
+
 
 class IJobService(Interface):
     pass
@@ -55,28 +61,75 @@ class JobService(object):
         self.database = gsm.queryUtility(IDatabase)
         self.datasource = gsm.queryUtility(IDataSource)
 
-    def add_ending_main_round_job(self, job_start_date):
-        SCHEDULER.add_job(
-            self.end_auction,
+        # Handles of planned jobs by their identifiers
+        self._jobs = {}
+
+    def _plan_job(self, func, run_date, name, job_id):
+        """
+        Move planned job to the new run date. Job is added to scheduler if
+        it has not been planned yet or it has already been fired, so it is
+        never absent from scheduler while being moved.
+
+        :param func: callable which is run by the job
+        :param run_date: date when job should be run
+        :param name: textual description of the job
+        :param job_id: unique identifier of the job
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            try:
+                job.reschedule('date', run_date=run_date)
+                return job
+            except JobLookupError:
+                pass
+        job = SCHEDULER.add_job(
+            func,
             'date',
-            run_date=job_start_date,
-            name='End of Auction',
-            id='auction:{}'.format(END)
+            run_date=run_date,
+            name=name,
+            id=job_id,
+            replace_existing=True
+        )
+        self._jobs[job_id] = job
+        return job
+
+    def add_ending_main_round_job(self, job_start_date):
+        return self._plan_job(
+            self.end_auction, job_start_date, 'End of Auction', END_JOB_ID
         )
 
     def add_pause_job(self, job_start_date):
-        SCHEDULER.add_job(
-            self.switch_to_next_stage,
-            'date',
-            run_date=job_start_date,
-            name='End of Pause',
-            id='auction:pause'
+        return self._plan_job(
+            self.switch_to_next_stage, job_start_date, 'End of Pause', PAUSE_JOB_ID
         )
 
+    def cancel_pause_job(self):
+        job = self._jobs.pop(PAUSE_JOB_ID, None)
+        if job is not None:
+            try:
+                job.remove()
+            except JobLookupError:
+                pass
+
+    @staticmethod
+    def _is_pause(auction_document):
+        stages = auction_document.get('stages', [])
+        current_stage = auction_document['current_stage']
+        return 0 <= current_stage < len(stages) and stages[current_stage]['type'] == PAUSE
+
     def switch_to_next_stage(self):
         request_id = generate_request_id()
 
         with lock_server(self.context['server_actions']):
+            # Pause could be already ended by the bid which was processed
+            # while job was waiting for the lock
+            if not self._is_pause(self.context['auction_document']):
+                LOGGER.warning(
+                    'Skip switching from stage {0} which is not a pause'.format(
+                        self.context['auction_document']["current_stage"]),
+                    extra={"JOURNAL_REQUEST_ID": request_id}
+                )
+                return
             with update_auction_document(self.context, self.database) as auction_document:
                 auction_document["current_stage"] += 1
 
@@ -94,6 +147,14 @@ class JobService(object):
                    "MESSAGE_ID": AUCTION_WORKER_SERVICE_END_AUCTION}
         )
 
+        # Protocol must contain all of the accepted bids
+        post_commit = self.context.get('post_commit')
+        if post_commit is not None and not post_commit.drain(timeout=POST_COMMIT_DRAIN_TIMEOUT):
+            LOGGER.warning(
+                "Post commit actions were not finished in {} seconds".format(POST_COMMIT_DRAIN_TIMEOUT),
+                extra={"JOURNAL_REQUEST_ID": request_id}
+            )
+
         LOGGER.debug(
             "Stop server", extra={"JOURNAL_REQUEST_ID": request_id}
         )
@@ -122,6 +183,11 @@ class JobService(object):
             extra={"JOURNAL_REQUEST_ID": request_id}
         )
         LOGGER.info(self.context['auction_protocol'])
+        LOGGER.info(
+            'Latency summary: \n {}'.format(yaml_dump(get_latency_summary())),
+            extra={"JOURNAL_REQUEST_ID": request_id,
+                   "MESSAGE_ID": AUCTION_WORKER_SERVICE_LATENCY_SUMMARY}
+        )
 
         result = self.datasource.update_source_object(
             self.context['auction_data'], self.context['auction_document'], self.context['auction_protocol']
@@ -136,6 +202,10 @@ class JobService(object):
             auction_document["current_stage"] = len(auction_document["stages"]) - 1
             auction_document['endDate'] = auction_end.isoformat()
 
+        acknowledgement = self.context.get('bid_acknowledgement')
+        if acknowledgement is not None:
+            acknowledgement.close()
+
         self.context['end_auction_event'].set()
 
 
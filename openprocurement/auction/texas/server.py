@@ -2,6 +2,7 @@
 import os
 
 from flask import Flask, session
+from flask.json import JSONEncoder
 from flask_oauthlib.client import OAuth
 
 from gevent import spawn
@@ -11,10 +12,7 @@ from zope.component import getGlobalSiteManager
 
 
 from openprocurement.auction.helpers.system import get_lisener
-from openprocurement.auction.event_source import (
-    push_timestamps_events, check_clients
-)
-from openprocurement.auction.texas.event_source import sse
+from openprocurement.auction.event_source import check_clients
 from openprocurement.auction.utils import (
     create_mapping,
     generate_request_id
@@ -24,15 +22,34 @@ from openprocurement.auction.worker_core.server import (
 )
 
 from openprocurement.auction.texas import views
+from openprocurement.auction.texas.amount import Amount
 from openprocurement.auction.texas.bids import BidsHandler
-from openprocurement.auction.texas.constants import AUCTION_SUBPATH
+from openprocurement.auction.texas.channels import StreamRegistry
+from openprocurement.auction.texas.constants import (
+    AUCTION_SUBPATH, SSE_DEBOUNCE_WINDOW, SSE_MAX_STREAMS, SSE_MAX_STREAMS_PER_BIDDER
+)
 from openprocurement.auction.texas.context import IContext
+from openprocurement.auction.texas.debounce import Debouncer
+from openprocurement.auction.texas.event_log import EventLog
+from openprocurement.auction.texas.event_source import sse, push_timestamps_events
 from openprocurement.auction.texas.forms import BidsForm, form_handler
 
 
+class AuctionJSONEncoder(JSONEncoder):
+
+    def default(self, o):
+        if isinstance(o, Amount):
+            return o.to_value()
+        return super(AuctionJSONEncoder, self).default(o)
+
+
 def initialize_application():
     app = Flask(__name__)
+    app.json_encoder = AuctionJSONEncoder
     app.auction_bidders = {}
+    app.event_log = EventLog()
+    app.debouncer = Debouncer()
+    app.streams = StreamRegistry()
     app.register_blueprint(sse)
     app.secret_key = os.urandom(24)
     app.logins_cache = {}
@@ -48,6 +65,7 @@ def add_url_rules(app):
     app.add_url_rule('/kickclient', 'kickclient', views.kickclient, methods=['POST'])
     app.add_url_rule('/check_authorization', 'check_authorization', views.check_authorization, methods=['POST'])
     app.add_url_rule('/health', 'health', views.health, methods=['GET'])
+    app.add_url_rule('/metrics', 'metrics', views.metrics, methods=['GET'])
 
 
 def run_server(auction, mapping_expire_time, logger, timezone='Europe/Kiev', bids_form=BidsForm,
@@ -55,6 +73,13 @@ def run_server(auction, mapping_expire_time, logger, timezone='Europe/Kiev', bid
     app = initialize_application()
     add_url_rules(app)
     app.config.update(auction.worker_defaults)
+    app.event_log = EventLog(**auction.worker_defaults.get('event_log', {}))
+    event_source_config = auction.worker_defaults.get('event_source', {})
+    app.debouncer = Debouncer(event_source_config.get('debounce_window', SSE_DEBOUNCE_WINDOW))
+    app.streams = StreamRegistry(
+        max_streams=event_source_config.get('max_streams', SSE_MAX_STREAMS),
+        max_streams_per_bidder=event_source_config.get('max_streams_per_bidder', SSE_MAX_STREAMS_PER_BIDDER)
+    )
     # Replace Flask custom logger
     app.logger_name = logger.name
     app._logger = logger
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import sqlite3
+from uuid import uuid4
+
+from couchdb.http import ResourceConflict, ResourceNotFound
+from zope.interface import implementer
+
+from openprocurement.auction.texas.database import IDatabase, CouchDB
+from openprocurement.auction.texas.journal import AUCTION_WORKER_DB_COMPACT_JOURNAL
+from openprocurement.auction.texas.memory import make_revision
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS journal ("
+    "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "doc_id TEXT NOT NULL, "
+    "rev TEXT NOT NULL, "
+    "body TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS journal_doc_id ON journal (doc_id, seq)",
+)
+
+
+class SQLiteStore(object):
+    """
+    Local storage of documents in SQLite database file with the same interface
+    and revision semantics as couchdb.Database. Every save appends new version
+    of document to the journal table in its own transaction and the latest
+    entry of document is its current version, so after crash of the worker
+    documents are restored from the journal as they were at the last
+    committed save. Old versions are removed by compaction, which is run
+    after every compact_threshold appended entries.
+
+    Attributes:
+    path: path to SQLite database file
+    :type path: str
+    compact_threshold: number of appended entries after which journal is compacted
+    :type compact_threshold: int
+    _appended: number of entries appended since the last compaction
+    :type _appended: int
+    """
+
+    def __init__(self, path, compact_threshold=1000):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self._appended = 0
+        # Transactions are controlled explicitly, see _transaction
+        self._connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        for statement in SCHEMA:
+            self._connection.execute(statement)
+
+    def _get_entry(self, doc_id):
+        return self._connection.execute(
+            "SELECT rev, body FROM journal WHERE doc_id = ? ORDER BY seq DESC LIMIT 1", (doc_id,)
+        ).fetchone()
+
+    def __contains__(self, doc_id):
+        return self._get_entry(doc_id) is not None
+
+    def __getitem__(self, doc_id):
+        document = self.get(doc_id)
+        if document is None:
+            raise ResourceNotFound(('not_found', 'missing'))
+        return document
+
+    def get(self, doc_id, default=None):
+        entry = self._get_entry(doc_id)
+        if entry is None:
+            return default
+        return json.loads(entry[1])
+
+    def save(self, document):
+        doc_id = document.setdefault('_id', uuid4().hex)
+        # Write lock is taken before reading current revision, so
+        # documents saved by other connections can't be overwritten
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            entry = self._get_entry(doc_id)
+            current_revision = entry[0] if entry else None
+            if document.get('_rev') != current_revision:
+                raise ResourceConflict(('conflict', 'Document update conflict.'))
+            revision = make_revision(current_revision)
+            body = dict(document, _rev=revision)
+            self._connection.execute(
+                "INSERT INTO journal (doc_id, rev, body) VALUES (?, ?, ?)",
+                (doc_id, revision, json.dumps(body))
+            )
+        except Exception:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+        document['_rev'] = revision
+        self._appended += 1
+        if self._appended >= self.compact_threshold:
+            self.compact()
+        return doc_id, revision
+
+    def compact(self):
+        """
+        Remove all versions of documents from journal except the current ones
+        """
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            removed = self._connection.execute(
+                "DELETE FROM journal WHERE seq NOT IN "
+                "(SELECT MAX(seq) FROM journal GROUP BY doc_id)"
+            ).rowcount
+        except Exception:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+        self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._appended = 0
+        LOGGER.info("Compacted database journal {}, removed {} entries".format(self.path, removed),
+                    extra={'MESSAGE_ID': AUCTION_WORKER_DB_COMPACT_JOURNAL})
+
+    def close(self):
+        self._connection.close()
+
+
+@implementer(IDatabase)
+class SQLiteDatabase(CouchDB):
+    """
+    Database which keeps documents in local SQLite file. It works with
+    SQLiteStore the same way CouchDB works with couchdb server, so
+    auction worker could run on nodes without access to CouchDB.
+    Writes are local and bounded by fsync of the file instead of HTTP
+    request, though they block the worker while being performed.
+    """
+
+    def _connect(self, config):
+        return SQLiteStore(
+            config.get('path', 'auctions.sqlite'),
+            int(config.get('compact_threshold', 1000))
+        )
+
+    def _get_key(self, config):
+        return 'sqlite:{}'.format(config.get('path', 'auctions.sqlite'))
+
+
+def sqlite_database():
+    return SQLiteDatabase
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from openprocurement.auction.texas.channels import encode_event
+from openprocurement.auction.texas.diff import make_json_patch
+from openprocurement.auction.texas.event_log import EventLog
+from openprocurement.auction.texas.metrics import METRICS
+
+# Fields of auction document which are not sent to clients
+PRIVATE_FIELDS = ('_rev',)
+
+
+class AuctionStateChannel(object):
+    """
+    Stream of auction document changes, so clients follow auction from the
+    worker instead of database changes feed. New subscriber gets snapshot
+    of the document, then every committed change is sent to subscribers as
+    JSON patch (RFC 6902) made by make_json_patch. Committed documents are
+    never changed in place, so the channel keeps reference to the last one
+    instead of its copy, and they are published from post commit pipeline,
+    so diffing is kept out of the lock of bids. Changes are not diffed
+    while there are no subscribers, event log is started again instead, so
+    clients which reconnect after such changes get snapshot.
+
+    Attributes:
+    log_size: number of recent changes kept for reconnecting subscribers
+    :type log_size: int
+    log: recent changes
+    :type log: openprocurement.auction.texas.event_log.EventLog
+    subscribers: channels of subscribed clients
+    :type subscribers: set
+    _document: the last committed auction document
+    :type _document: dict
+    _snapshot: encoded snapshot of the last committed document
+    :type _snapshot: str
+    """
+
+    def __init__(self, log_size=100):
+        self.log_size = int(log_size)
+        self.log = EventLog(self.log_size)
+        self.subscribers = set()
+        self._document = None
+        self._snapshot = None
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def snapshot(self):
+        """
+        Return encoded snapshot of the last committed document, it is
+        encoded once for all subscribers who connect before the next change
+        """
+        if self._snapshot is None:
+            _, event_id = self.log.next_id()
+            document = dict(
+                (key, value) for key, value in self._document.items() if key not in PRIVATE_FIELDS
+            )
+            self._snapshot = encode_event('AuctionState', document, event_id)
+        return self._snapshot
+
+    def _send(self, frame):
+        for channel in list(self.subscribers):
+            if channel.evicted:
+                self.subscribers.discard(channel)
+                continue
+            channel.put(frame)
+        METRICS.increment('sse.delivered', len(self.subscribers))
+
+    def publish(self, document):
+        """
+        Send changes of committed document to subscribers
+
+        :param document: committed auction document
+        """
+        previous, self._document = self._document, document
+        self._snapshot = None
+        if not self.subscribers:
+            if self.log.last:
+                self.log = EventLog(self.log_size)
+            return
+        if previous is None:
+            self._send(self.snapshot())
+            return
+        patch = [
+            operation for operation in make_json_patch(previous, document)
+            if operation['path'] and operation['path'].split('/')[1] not in PRIVATE_FIELDS
+        ]
+        if not patch:
+            return
+        sequence, event_id = self.log.next_id()
+        frame = encode_event('AuctionPatch', patch, event_id)
+        self.log.append(sequence, frame)
+        self._send(frame)
+        METRICS.increment('auction_state.patches')
+
+    def subscribe(self, channel, last_event_id=None):
+        """
+        Send snapshot or changes missed since last_event_id to channel and
+        add it to subscribers
+
+        :param channel: channel of client
+        :type channel: openprocurement.auction.texas.channels.Channel
+        :param last_event_id: identifier of the last event client received
+        """
+        missed = self.log.replay(last_event_id, None) if last_event_id else None
+        if missed is not None and len(missed) <= channel.size:
+            for frame in missed:
+                channel.put(frame)
+            METRICS.increment('sse.resumed')
+        elif self._document is not None:
+            channel.put(self.snapshot())
+        self.subscribers.add(channel)
+
+    def unsubscribe(self, channel):
+        self.subscribers.discard(channel)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from collections import Mapping
+
+
+class FrozenDict(Mapping):
+    """
+    Immutable mapping. Unlike dict it is not copied on reading from context,
+    so it is built once and shared by reference between readers.
+
+    Attributes:
+    _data: underlying dictionary, it is never changed after creation
+    :type _data: dict
+    """
+    __slots__ = ('_data', '_hash')
+
+    def __init__(self, *args, **kwargs):
+        self._data = dict(*args, **kwargs)
+        self._hash = None
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self._data.items()))
+        return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return 'FrozenDict({!r})'.format(self._data)
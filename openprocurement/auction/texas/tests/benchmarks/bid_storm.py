@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""
+Bid storm benchmark of auction worker.
+
+Auction worker is planned and run in-process the same way as by
+`auction_texas planning` and `auction_texas run` commands, but with
+in-memory database, file datasource and stub OAuth provider, so no
+external services are needed. Simulated bidders log in through the
+worker's OAuth views, hold `/event_source` streams and post bids to
+`/postbid` as fast as they are answered.
+
+Usage:
+
+    python -m openprocurement.auction.texas.tests.benchmarks.bid_storm \
+        --bidders 50 --duration 30 --output bid_storm.json \
+        --compare previous_bid_storm.json
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+from copy import deepcopy
+from datetime import datetime, timedelta
+from time import time
+from uuid import uuid4
+
+import requests
+import yaml
+from dateutil.tz import tzlocal
+from flask import redirect, request, session
+from gevent import spawn, sleep, joinall, killall
+from gevent.event import Event
+from mock import patch
+from munch import Munch
+from pkg_resources import get_distribution, DistributionNotFound
+
+from openprocurement.auction.utils import calculate_hash
+
+from openprocurement.auction.texas import utils
+from openprocurement.auction.texas.auction import Auction
+from openprocurement.auction.texas.cli import register_utilities
+from openprocurement.auction.texas.constants import MAIN_ROUND
+from openprocurement.auction.texas.metrics import METRICS
+from openprocurement.auction.texas.scheduler import SCHEDULER
+from openprocurement.auction.texas.tests.data.data import tender_data
+
+PWD = os.path.dirname(os.path.realpath(__file__))
+WORKER_DEFAULTS = os.path.join(PWD, '../data/auction_worker_defaults.yaml')
+
+# Values which are compared between runs by --compare
+COMPARED_VALUES = (
+    ('accepted_per_second', 'accepted bids/s'),
+    ('requests_per_second', 'requests/s'),
+    ('latency.p50', 'p50 latency, ms'),
+    ('latency.p99', 'p99 latency, ms'),
+    ('latency.accepted_p99', 'p99 accepted latency, ms'),
+    ('lock_contention.wait_avg', 'avg lock wait, ms'),
+    ('lock_contention.wait_max', 'max lock wait, ms'),
+    ('lock_contention.queue_depth_max', 'max bids queue depth'),
+)
+
+
+class StubOAuthProvider(object):
+    """
+    In-process replacement of remote OAuth application of auction server.
+    It grants access to any bidder who asks for it, so bidders go through
+    login, authorized and get_bidder_id of the worker without network
+    requests to OAuth provider.
+
+    Attributes:
+    grant_duration: number of seconds grant is valid
+    :type grant_duration: int
+    _codes: bidder identifiers by issued authorization codes
+    :type _codes: dict
+    _tokens: bidder identifiers by issued access tokens
+    :type _tokens: dict
+    """
+
+    def __init__(self, grant_duration=86400):
+        self.grant_duration = grant_duration
+        self._codes = {}
+        self._tokens = {}
+
+    def authorize(self, callback, bidder_id, hash, **kwargs):
+        code = uuid4().hex
+        self._codes[code] = bidder_id
+        separator = '&' if '?' in callback else '?'
+        return redirect('{}{}code={}'.format(callback, separator, code))
+
+    def authorized_response(self):
+        bidder_id = self._codes.pop(request.args.get('code'), None)
+        if bidder_id is None:
+            return None
+        token = uuid4().hex
+        self._tokens[token] = bidder_id
+        return {
+            u'access_token': token,
+            u'token_type': u'Bearer',
+            u'expires_in': self.grant_duration,
+            u'refresh_token': uuid4().hex,
+            u'scope': u'email'
+        }
+
+    def get(self, url):
+        token = (session.get('remote_oauth') or (None,))[0]
+        bidder_id = self._tokens.get(token)
+        if url != 'me' or bidder_id is None:
+            return Munch(status=401, data={})
+        expires = datetime.now(tzlocal()) + timedelta(seconds=self.grant_duration)
+        return Munch(status=200, data={u'bidder_id': bidder_id, u'expires': expires.isoformat()})
+
+
+class MarketView(object):
+    """
+    Amount of the current round as bidders see it. Real bidders follow
+    changes of auction document, here the document is read periodically
+    by one greenlet instead of every bidder, so reading does not compete
+    with bids for worker's time.
+
+    Attributes:
+    amount: minimal amount of bid in the current round, None if the
+            current stage does not allow bidding
+    :type amount: float
+    """
+
+    def __init__(self, context, interval):
+        self.context = context
+        self.interval = interval
+        self.amount = None
+
+    def follow(self, stopped):
+        while not stopped.is_set():
+            auction_document = self.context['auction_document']
+            stage = auction_document['stages'][max(auction_document['current_stage'], 0)]
+            self.amount = stage['amount'] if stage.get('type') == MAIN_ROUND else None
+            sleep(self.interval)
+
+
+class Bidder(object):
+    """
+    Simulated bidder which bids the minimal amount of the current round
+
+    Attributes:
+    bidder_id: identifier of bid in auction
+    :type bidder_id: str
+    latencies: durations of bid requests in seconds with their outcomes
+    :type latencies: list
+    events: number of events received through event_source
+    :type events: int
+    """
+
+    def __init__(self, base_url, bidder_id, hash_secret):
+        self.base_url = base_url
+        self.bidder_id = bidder_id
+        self.hash = calculate_hash(bidder_id, hash_secret)
+        self.session = requests.Session()
+        self.latencies = []
+        self.events = 0
+
+    def login(self):
+        response = self.session.get(
+            self.base_url + 'login',
+            params={'bidder_id': self.bidder_id, 'hash': self.hash},
+            allow_redirects=False
+        )
+        response.raise_for_status()
+        # Callback of OAuth provider, worker expects it behind the proxy
+        response = self.session.get(
+            response.headers['Location'],
+            headers={'X-Forwarded-Path': self.base_url},
+            allow_redirects=False
+        )
+        response.raise_for_status()
+
+    def listen(self):
+        response = self.session.get(self.base_url + 'event_source', stream=True)
+        try:
+            for line in response.iter_lines():
+                if line.startswith('event:'):
+                    self.events += 1
+        finally:
+            response.close()
+
+    def bid(self, market, stopped, think_time):
+        while not stopped.is_set():
+            amount = market.amount
+            if amount is None:
+                sleep(market.interval)
+                continue
+            start = time()
+            try:
+                response = self.session.post(
+                    self.base_url + 'postbid',
+                    json={'bidder_id': self.bidder_id, 'bid': amount},
+                    headers={'Idempotency-Key': uuid4().hex}
+                )
+                outcome = 'accepted' if response.json().get('status') == 'ok' else 'rejected'
+            except (requests.RequestException, ValueError):
+                outcome = 'error'
+            self.latencies.append((time() - start, outcome))
+            sleep(think_time)
+
+
+def percentile(values, percent):
+    """
+    Return nearest-rank percentile of sorted values
+    """
+    if not values:
+        return None
+    index = max(int(round(percent / 100.0 * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def prepare_auction_data(bidders_count, start_date):
+    auction_data = deepcopy(tender_data)
+    auction_data['data']['auctionPeriod']['startDate'] = start_date.isoformat()
+    value = auction_data['data']['value']
+    auction_data['data']['bids'] = [
+        {
+            'id': uuid4().hex,
+            'date': datetime.now(tzlocal()).isoformat(),
+            'status': 'active',
+            'value': dict(value),
+        }
+        for _ in xrange(bidders_count)
+    ]
+    return auction_data
+
+
+def start_worker(options, workdir):
+    """
+    Plan auction and start its server and scheduler, auction starts after
+    warmup seconds
+
+    :return: auction worker
+    :rtype: openprocurement.auction.texas.auction.Auction
+    """
+    auction_id = uuid4().hex
+    start_date = datetime.now(tzlocal()) + timedelta(seconds=options.warmup)
+    with open(os.path.join(workdir, 'auction_{}.json'.format(auction_id)), 'w') as auction_file:
+        json.dump(prepare_auction_data(options.bidders, start_date), auction_file)
+
+    with open(WORKER_DEFAULTS) as stream:
+        worker_defaults = yaml.load(stream)
+    worker_defaults.update({
+        'STARTS_PORT': options.port,
+        'WORKER_BIND_IP': '127.0.0.1',
+        'database': {'type': 'memory', 'name': 'bid_storm'},
+        'datasource': {'type': 'file', 'path': workdir},
+        'deadline': {'enabled': False},
+        'bid_acknowledgement': {'level': options.acknowledgement, 'journal_dir': workdir},
+    })
+    register_utilities(worker_defaults, Munch(standalone=False, auction_doc_id=auction_id))
+
+    auction = Auction(auction_id, worker_defaults=worker_defaults)
+    auction.prepare_auction_document()
+    # Mapping is needed only by proxy, bidders connect to server directly
+    with patch('openprocurement.auction.texas.server.create_mapping'):
+        auction.schedule_auction()
+    app = auction.server.application
+    app.remote_oauth = StubOAuthProvider()
+    app.config['SESSION_COOKIE_PATH'] = '/'
+    SCHEDULER.start()
+    return auction
+
+
+def sample_gauges(maximums, stopped, interval):
+    while not stopped.is_set():
+        gauges = METRICS.snapshot()['gauges']
+        for name in maximums:
+            maximums[name] = max(maximums[name], gauges.get(name, 0))
+        sleep(interval)
+
+
+def run_storm(options, auction):
+    """
+    Log bidders in, wait for the main round and post bids for duration seconds
+
+    :return: benchmark results
+    :rtype: dict
+    """
+    host, port = auction.server.address[:2]
+    base_url = 'http://{}:{}/'.format(host, port)
+    bidders = [
+        Bidder(base_url, bid['id'], auction.worker_defaults['HASH_SECRET'])
+        for bid in auction.bidders_data
+    ]
+    joinall([spawn(bidder.login) for bidder in bidders], raise_error=True)
+    listeners = [spawn(bidder.listen) for bidder in bidders[:options.streams]]
+
+    stopped = Event()
+    market = MarketView(auction.context, options.follow_interval)
+    follower = spawn(market.follow, stopped)
+    while market.amount is None:
+        sleep(options.follow_interval)
+
+    METRICS.reset()
+    maximums = {'bids_queue.depth': 0, 'post_commit.depth': 0}
+    sampler = spawn(sample_gauges, maximums, stopped, options.follow_interval)
+    started = time()
+    storm = [spawn(bidder.bid, market, stopped, options.think_time) for bidder in bidders]
+    sleep(options.duration)
+    stopped.set()
+    joinall(storm)
+    elapsed = time() - started
+    killall(listeners + [follower, sampler])
+
+    latencies = sorted(latency for bidder in bidders for latency in bidder.latencies)
+    durations = [duration for duration, _ in latencies]
+    accepted = [duration for duration, outcome in latencies if outcome == 'accepted']
+    metrics = METRICS.snapshot()
+    lock_waits = metrics['histograms'].get('bids_queue.wait', {'count': 0, 'sum': 0, 'max': 0})
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        'requests': len(latencies),
+        'accepted': len(accepted),
+        'rejected': sum(1 for _, outcome in latencies if outcome == 'rejected'),
+        'errors': sum(1 for _, outcome in latencies if outcome == 'error'),
+        'elapsed': round(elapsed, 3),
+        'accepted_per_second': round(len(accepted) / elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 3),
+        'latency': {
+            'p50': ms(percentile(durations, 50)),
+            'p99': ms(percentile(durations, 99)),
+            'max': ms(durations[-1] if durations else None),
+            'accepted_p50': ms(percentile(sorted(accepted), 50)),
+            'accepted_p99': ms(percentile(sorted(accepted), 99)),
+        },
+        'lock_contention': {
+            'waits': lock_waits['count'],
+            'wait_avg': ms(lock_waits['sum'] / lock_waits['count'] if lock_waits['count'] else 0),
+            'wait_max': ms(lock_waits['max']),
+            'queue_depth_max': maximums['bids_queue.depth'],
+            'post_commit_depth_max': maximums['post_commit.depth'],
+            'admission_rejected': metrics['counters'].get('bids_queue.rejected', 0),
+            'coalesced': metrics['counters'].get('bids_queue.coalesced', 0),
+            'timeouts': metrics['counters'].get('bids_queue.timeouts', 0),
+        },
+        'events': sum(bidder.events for bidder in bidders),
+        'metrics': metrics,
+    }
+
+
+def get_version():
+    try:
+        return get_distribution('openprocurement.auction.texas').version
+    except DistributionNotFound:
+        return None
+
+
+def get_value(results, path):
+    for key in path.split('.'):
+        results = (results or {}).get(key)
+    return results
+
+
+def compare(previous, current):
+    lines = ['{:<28} {:>12} {:>12} {:>9}'.format('', previous.get('version') or '-', current.get('version') or '-', 'change')]
+    for path, title in COMPARED_VALUES:
+        before, after = get_value(previous, path), get_value(current, path)
+        change = '{:+.1f}%'.format((after - before) * 100.0 / before) if before and after is not None else '-'
+        lines.append('{:<28} {:>12} {:>12} {:>9}'.format(title, before, after, change))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='---- Bid storm benchmark ----')
+    parser.add_argument('--bidders', type=int, default=20, help='number of simulated bidders')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of posting bids')
+    parser.add_argument('--streams', type=int, default=None,
+                        help='number of bidders holding event_source stream, all by default')
+    parser.add_argument('--pause', type=float, default=0,
+                        help='seconds of pause after accepted bid, the worker uses {}'.format(utils.PAUSE_DURATION))
+    parser.add_argument('--think-time', type=float, default=0, help='seconds bidder waits between bids')
+    parser.add_argument('--follow-interval', type=float, default=0.05,
+                        help='seconds between reads of auction document by bidders')
+    parser.add_argument('--acknowledgement', default='database', help='bid acknowledgement level')
+    parser.add_argument('--warmup', type=float, default=2,
+                        help='seconds before auction starts, main round starts after the first pause')
+    parser.add_argument('--port', type=int, default=9610, help='first port tried by auction server')
+    parser.add_argument('--output', default='bid_storm.json', help='file results are written to')
+    parser.add_argument('--compare', default=None, help='results of previous run to compare with')
+    parser.add_argument('--log-level', default='ERROR', help='level of auction worker logs')
+    options = parser.parse_args()
+    if options.streams is None:
+        options.streams = options.bidders
+
+    logging.basicConfig(level=options.log_level)
+    parameters = dict(vars(options))
+    for name in ('output', 'compare', 'log_level', 'port'):
+        del parameters[name]
+
+    workdir = tempfile.mkdtemp(prefix='bid_storm')
+    try:
+        auction = start_worker(options, workdir)
+        try:
+            # Pause after each accepted bid would limit storm to one bid
+            # per pause, the first pause of auction is not changed
+            with patch.object(utils, 'PAUSE_DURATION', options.pause):
+                results = run_storm(options, auction)
+        finally:
+            SCHEDULER.shutdown(wait=False)
+            auction.server.stop()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results.update({
+        'benchmark': 'bid_storm',
+        'version': get_version(),
+        'date': datetime.now(tzlocal()).isoformat(),
+        'parameters': parameters,
+    })
+    with open(options.output, 'w') as output:
+        json.dump(results, output, indent=2, sort_keys=True)
+
+    print 'Accepted {accepted} of {requests} bids in {elapsed} s: {accepted_per_second} bids/s'.format(**results)
+    print 'Latency, ms: p50 {p50}, p99 {p99}, max {max}'.format(**results['latency'])
+    print 'Lock waits: {waits}, avg {wait_avg} ms, max {wait_max} ms, max queue depth {queue_depth_max}'.format(
+        **results['lock_contention']
+    )
+    print 'Results are written to {}'.format(options.output)
+    if options.compare:
+        with open(options.compare) as previous:
+            print compare(json.load(previous), results)
+
+
+if __name__ == "__main__":
+    main()
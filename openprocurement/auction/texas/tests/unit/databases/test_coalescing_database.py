@@ -0,0 +1,115 @@
+import unittest
+import mock
+
+from openprocurement.auction.texas.database import (
+    CoalescingDatabase,
+    ICoalescingDatabase,
+    prepare_database,
+)
+from openprocurement.auction.texas.utils import update_auction_document
+
+
+class TestCoalescingDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.doc_id = '1' * 32
+        self.inner_database = mock.MagicMock()
+        self.database = CoalescingDatabase(self.inner_database, 0.5)
+
+        self.patch_spawn_later = mock.patch('openprocurement.auction.texas.database.spawn_later')
+        self.mocked_spawn_later = self.patch_spawn_later.start()
+
+    def tearDown(self):
+        self.patch_spawn_later.stop()
+
+    def test_interface(self):
+        self.assertTrue(ICoalescingDatabase.providedBy(self.database))
+
+    def test_deferred_saves_are_merged(self):
+        first_document = {'current_stage': 0}
+        second_document = {'current_stage': 1}
+
+        self.database.defer_auction_document_save(first_document, self.doc_id)
+        self.database.defer_auction_document_save(second_document, self.doc_id)
+
+        self.assertEqual(self.inner_database.save_auction_document.call_count, 0)
+        self.mocked_spawn_later.assert_called_once_with(
+            0.5, self.database._flush_document, self.doc_id
+        )
+
+        self.database._flush_document(self.doc_id)
+
+        self.inner_database.save_auction_document.assert_called_once_with(second_document, self.doc_id)
+        self.assertEqual(self.database._pending, {})
+
+        self.database._flush_document(self.doc_id)
+        self.assertEqual(self.inner_database.save_auction_document.call_count, 1)
+
+    def test_direct_save_overrides_pending(self):
+        deferred_document = {'current_stage': 0}
+        saved_document = {'current_stage': 1}
+
+        self.database.defer_auction_document_save(deferred_document, self.doc_id)
+        self.database.save_auction_document(saved_document, self.doc_id)
+        self.database.flush()
+
+        self.inner_database.save_auction_document.assert_called_once_with(saved_document, self.doc_id)
+
+    def test_get_flushes_pending(self):
+        document = {'current_stage': 0}
+        self.database.defer_auction_document_save(document, self.doc_id)
+
+        self.database.get_auction_document(self.doc_id)
+
+        self.inner_database.save_auction_document.assert_called_once_with(document, self.doc_id)
+        self.inner_database.get_auction_document.assert_called_once_with(self.doc_id)
+
+    def test_update_auction_document(self):
+        context = {'auction_document': {'current_stage': 0}, 'auction_doc_id': self.doc_id}
+
+        with update_auction_document(context, self.database, flush=False) as auction_document:
+            auction_document['current_stage'] += 1
+        self.assertEqual(self.inner_database.save_auction_document.call_count, 0)
+
+        with update_auction_document(context, self.database) as auction_document:
+            auction_document['current_stage'] += 1
+        self.inner_database.save_auction_document.assert_called_once_with(
+            {'current_stage': 2}, self.doc_id
+        )
+
+
+class TestPrepareDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.database_class = mock.MagicMock()
+        self.patch_mapping = mock.patch.dict(
+            'openprocurement.auction.texas.database.DATABASE_MAPPING',
+            {'mocked': self.database_class}
+        )
+        self.patch_mapping.start()
+
+    def tearDown(self):
+        self.patch_mapping.stop()
+
+    def test_without_coalesce_window(self):
+        database = prepare_database({'type': 'mocked'})
+
+        self.assertEqual(database, self.database_class.return_value)
+
+    def test_with_coalesce_window(self):
+        database = prepare_database({'type': 'mocked', 'coalesce_window': '0.2'})
+
+        self.assertIsInstance(database, CoalescingDatabase)
+        self.assertEqual(database._database, self.database_class.return_value)
+        self.assertEqual(database.window, 0.2)
+
+    def test_unknown_type(self):
+        with self.assertRaises(AttributeError):
+            prepare_database({'type': 'unknown'})
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestCoalescingDatabase))
+    suite.addTest(unittest.makeSuite(TestPrepareDatabase))
+    return suite
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import unittest
+import mock
+
+from couchdb.http import ResourceConflict
+
+from openprocurement.auction.texas.database import IDatabase, prepare_database
+from openprocurement.auction.texas.memory import (
+    InMemoryDatabase,
+    MemoryStore,
+    STORES,
+)
+
+
+class TestMemoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryStore()
+        self.doc_id = '1' * 32
+
+    def test_save_and_get(self):
+        document = {'_id': self.doc_id, 'current_stage': 0}
+        doc_id, revision = self.store.save(document)
+
+        self.assertEqual(doc_id, self.doc_id)
+        self.assertEqual(document['_rev'], revision)
+        self.assertTrue(revision.startswith('1-'))
+        self.assertIn(self.doc_id, self.store)
+        self.assertEqual(self.store.get(self.doc_id), document)
+        self.assertIsNot(self.store.get(self.doc_id), document)
+        self.assertIsNone(self.store.get('2' * 32))
+
+    def test_revision_conflicts(self):
+        document = {'_id': self.doc_id, 'current_stage': 0}
+        self.store.save(document)
+        stale_document = self.store.get(self.doc_id)
+
+        document['current_stage'] = 1
+        _, revision = self.store.save(document)
+        self.assertTrue(revision.startswith('2-'))
+
+        stale_document['current_stage'] = 2
+        with self.assertRaises(ResourceConflict):
+            self.store.save(stale_document)
+        with self.assertRaises(ResourceConflict):
+            self.store.save({'_id': '2' * 32, '_rev': revision})
+        self.assertEqual(self.store.get(self.doc_id)['current_stage'], 1)
+
+
+class TestInMemoryDatabase(unittest.TestCase):
+
+    def setUp(self):
+        STORES.clear()
+        self.doc_id = '1' * 32
+        self.database = InMemoryDatabase({'name': 'test'})
+
+        self.patch_sleep = mock.patch('openprocurement.auction.texas.retry.sleep')
+        self.mocked_sleep = self.patch_sleep.start()
+
+    def tearDown(self):
+        self.patch_sleep.stop()
+        STORES.clear()
+
+    def test_interface(self):
+        self.assertTrue(IDatabase.providedBy(self.database))
+
+    def test_get_missing_document(self):
+        self.assertEqual(self.database.get_auction_document(self.doc_id), {})
+        self.assertEqual(self.mocked_sleep.call_count, 0)
+
+    def test_save_and_get(self):
+        document = {'_id': self.doc_id, 'current_stage': 0}
+        self.assertTrue(self.database.save_auction_document(document, self.doc_id))
+
+        stored_document = self.database.get_auction_document(self.doc_id)
+        self.assertEqual(stored_document['current_stage'], 0)
+        self.assertEqual(stored_document['_rev'], document['_rev'])
+
+        stored_document['current_stage'] = 1
+        self.assertTrue(self.database.save_auction_document(stored_document, self.doc_id))
+        self.assertEqual(self.database.get_auction_document(self.doc_id)['current_stage'], 1)
+
+    def test_shared_store_conflict(self):
+        other_database = InMemoryDatabase({'name': 'test'})
+        self.database.save_auction_document({'_id': self.doc_id, 'current_stage': 0}, self.doc_id)
+        other_database.save_auction_document(
+            other_database.get_auction_document(self.doc_id), self.doc_id
+        )
+
+        self.assertTrue(self.database.save_auction_document({'_id': self.doc_id, 'current_stage': 1}, self.doc_id))
+        self.assertEqual(other_database.get_auction_document(self.doc_id)['current_stage'], 1)
+        self.assertEqual(self.mocked_sleep.call_count, 0)
+
+    def test_separate_stores(self):
+        other_database = InMemoryDatabase({'name': 'other'})
+        self.database.save_auction_document({'_id': self.doc_id, 'current_stage': 0}, self.doc_id)
+
+        self.assertEqual(other_database.get_auction_document(self.doc_id), {})
+
+    def test_prepare_database(self):
+        with mock.patch.dict(
+            'openprocurement.auction.texas.database.DATABASE_MAPPING',
+            {'memory': InMemoryDatabase}
+        ):
+            database = prepare_database({'type': 'memory', 'name': 'test'})
+        self.assertIsInstance(database, InMemoryDatabase)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestMemoryStore))
+    suite.addTest(unittest.makeSuite(TestInMemoryDatabase))
+    return suite
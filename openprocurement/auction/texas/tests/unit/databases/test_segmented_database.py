@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import unittest
+import mock
+from copy import deepcopy
+
+from openprocurement.auction.texas.database import (
+    IDatabase,
+    SegmentedDatabase,
+    CoalescingDatabase,
+    prepare_database,
+)
+from openprocurement.auction.texas.memory import InMemoryDatabase, STORES
+
+
+def make_document(doc_id, stages_count, current_stage):
+    return {
+        '_id': doc_id,
+        'current_stage': current_stage,
+        'stages': [{'type': 'stage', 'index': index} for index in range(stages_count)],
+    }
+
+
+class TestSegmentedDatabase(unittest.TestCase):
+
+    def setUp(self):
+        STORES.clear()
+        self.doc_id = '1' * 32
+        self.inner_database = InMemoryDatabase({'name': 'test'})
+        self.database = SegmentedDatabase(self.inner_database, 4)
+
+    def tearDown(self):
+        STORES.clear()
+
+    def get_stored(self, doc_id):
+        return STORES['test'].get(doc_id)
+
+    def test_interface(self):
+        self.assertTrue(IDatabase.providedBy(self.database))
+
+    def test_save_without_closed_segments(self):
+        document = make_document(self.doc_id, 5, 4)
+        self.database.save_auction_document(document, self.doc_id)
+
+        stored_document = self.get_stored(self.doc_id)
+        self.assertEqual(stored_document['stages'], document['stages'])
+        self.assertNotIn('stages_segments', stored_document)
+        self.assertEqual(stored_document['_rev'], document['_rev'])
+
+    def test_save_archives_closed_stages(self):
+        document = make_document(self.doc_id, 12, 10)
+        original = deepcopy(document)
+        self.database.save_auction_document(document, self.doc_id)
+
+        stored_document = self.get_stored(self.doc_id)
+        self.assertEqual(stored_document['stages_offset'], 8)
+        self.assertEqual(
+            stored_document['stages_segments'],
+            [self.doc_id + '_stages_0', self.doc_id + '_stages_1']
+        )
+        self.assertEqual(
+            [stage['index'] for stage in stored_document['stages']],
+            [0, 9, 10, 11]
+        )
+        self.assertEqual(stored_document['current_stage'], 2)
+        self.assertEqual(
+            stored_document['stages'][stored_document['current_stage']],
+            document['stages'][document['current_stage']]
+        )
+        segment = self.get_stored(self.doc_id + '_stages_1')
+        self.assertEqual([stage['index'] for stage in segment['archived_stages']], [5, 6, 7, 8])
+        self.assertEqual(segment['offset'], 5)
+
+        self.assertEqual(document['_rev'], stored_document['_rev'])
+        del document['_rev']
+        self.assertEqual(document, original)
+
+    def test_get_stitches_segments(self):
+        document = make_document(self.doc_id, 12, 10)
+        self.database.save_auction_document(document, self.doc_id)
+
+        database = SegmentedDatabase(InMemoryDatabase({'name': 'test'}), 4)
+        stored_document = database.get_auction_document(self.doc_id)
+
+        self.assertEqual(stored_document, document)
+
+    def test_unchanged_segments_are_not_rewritten(self):
+        document = make_document(self.doc_id, 12, 10)
+        self.database.save_auction_document(document, self.doc_id)
+        segment_revision = self.get_stored(self.doc_id + '_stages_0')['_rev']
+
+        document['stages'].append({'type': 'stage', 'index': 12})
+        document['current_stage'] = 11
+        self.database.save_auction_document(document, self.doc_id)
+        self.assertEqual(self.get_stored(self.doc_id + '_stages_0')['_rev'], segment_revision)
+
+        document['stages'][2]['label'] = 'opened'
+        self.database.save_auction_document(document, self.doc_id)
+        self.assertNotEqual(self.get_stored(self.doc_id + '_stages_0')['_rev'], segment_revision)
+        self.assertEqual(self.database.get_auction_document(self.doc_id), document)
+
+    def test_failed_segment_save(self):
+        self.inner_database = mock.MagicMock()
+        self.inner_database.save_auction_document.return_value = None
+        self.database = SegmentedDatabase(self.inner_database, 4)
+        document = make_document(self.doc_id, 12, 10)
+
+        self.database.save_auction_document(document, self.doc_id)
+
+        self.inner_database.save_auction_document.assert_called_with(document, self.doc_id)
+        self.assertEqual(self.database._segments, {})
+
+    def test_missing_segment(self):
+        document = make_document(self.doc_id, 12, 10)
+        self.database.save_auction_document(document, self.doc_id)
+        STORES['test']._documents.pop(self.doc_id + '_stages_1')
+
+        database = SegmentedDatabase(InMemoryDatabase({'name': 'test'}), 4)
+        with mock.patch('openprocurement.auction.texas.retry.sleep'):
+            self.assertEqual(database.get_auction_document(self.doc_id), {})
+
+    def test_get_missing_document(self):
+        with mock.patch('openprocurement.auction.texas.retry.sleep'):
+            self.assertEqual(self.database.get_auction_document(self.doc_id), {})
+
+    def test_prepare_database(self):
+        with mock.patch.dict(
+            'openprocurement.auction.texas.database.DATABASE_MAPPING',
+            {'memory': InMemoryDatabase}
+        ):
+            database = prepare_database({'type': 'memory', 'stages_segment_size': '10', 'coalesce_window': 1})
+
+        self.assertIsInstance(database, CoalescingDatabase)
+        self.assertIsInstance(database._database, SegmentedDatabase)
+        self.assertEqual(database._database.segment_size, 10)
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestSegmentedDatabase))
+    return suite
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+import mock
+
+from couchdb.http import ResourceConflict
+
+from openprocurement.auction.texas.database import IDatabase
+from openprocurement.auction.texas.sqlite import SQLiteDatabase, SQLiteStore
+
+
+class TestSQLiteStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'auctions.sqlite')
+        self.store = SQLiteStore(self.path, compact_threshold=3)
+        self.doc_id = '1' * 32
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def count_entries(self):
+        return self.store._connection.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+
+    def test_save_and_get(self):
+        document = {'_id': self.doc_id, 'current_stage': 0}
+        doc_id, revision = self.store.save(document)
+
+        self.assertEqual(doc_id, self.doc_id)
+        self.assertEqual(document['_rev'], revision)
+        self.assertIn(self.doc_id, self.store)
+        self.assertEqual(self.store.get(self.doc_id), document)
+        self.assertIsNone(self.store.get('2' * 32))
+
+    def test_revision_conflicts(self):
+        document = {'_id': self.doc_id, 'current_stage': 0}
+        self.store.save(document)
+        stale_document = self.store.get(self.doc_id)
+        document['current_stage'] = 1
+        self.store.save(document)
+
+        with self.assertRaises(ResourceConflict):
+            self.store.save(stale_document)
+        self.assertEqual(self.store.get(self.doc_id)['current_stage'], 1)
+        self.assertEqual(self.count_entries(), 2)
+
+    def test_journal_compaction(self):
+        document = {'_id': self.doc_id, 'current_stage': 0}
+        self.store.save(document)
+        self.store.save({'_id': '2' * 32})
+        self.assertEqual(self.count_entries(), 2)
+
+        document['current_stage'] = 1
+        self.store.save(document)
+        self.assertEqual(self.count_entries(), 2)
+        self.assertEqual(self.store.get(self.doc_id)['current_stage'], 1)
+
+    def test_recovery(self):
+        document = {'_id': self.doc_id, 'current_stage': 0}
+        self.store.save(document)
+        document['current_stage'] = 1
+        self.store.save(document)
+        self.store.close()
+
+        self.store = SQLiteStore(self.path)
+        self.assertEqual(self.store.get(self.doc_id), document)
+
+
+class TestSQLiteDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = {'type': 'sqlite', 'path': os.path.join(self.directory, 'auctions.sqlite')}
+        self.database = SQLiteDatabase(self.config)
+        self.doc_id = '1' * 32
+
+        self.patch_sleep = mock.patch('openprocurement.auction.texas.retry.sleep')
+        self.mocked_sleep = self.patch_sleep.start()
+
+    def tearDown(self):
+        self.patch_sleep.stop()
+        self.database._db.close()
+        shutil.rmtree(self.directory)
+
+    def test_interface(self):
+        self.assertTrue(IDatabase.providedBy(self.database))
+
+    def test_save_and_get(self):
+        self.assertEqual(self.database.get_auction_document(self.doc_id), {})
+
+        document = {'_id': self.doc_id, 'current_stage': 0}
+        self.assertTrue(self.database.save_auction_document(document, self.doc_id))
+        document['current_stage'] = 1
+        self.assertTrue(self.database.save_auction_document(document, self.doc_id))
+
+        self.assertEqual(self.database.get_auction_document(self.doc_id)['current_stage'], 1)
+        self.assertEqual(self.mocked_sleep.call_count, 0)
+
+    def test_conflict_with_other_worker(self):
+        other_database = SQLiteDatabase(self.config)
+        self.database.save_auction_document({'_id': self.doc_id, 'current_stage': 0}, self.doc_id)
+        other_database.save_auction_document(
+            other_database.get_auction_document(self.doc_id), self.doc_id
+        )
+
+        self.assertTrue(self.database.save_auction_document({'_id': self.doc_id, 'current_stage': 1}, self.doc_id))
+        self.assertEqual(other_database.get_auction_document(self.doc_id)['current_stage'], 1)
+        other_database._db.close()
+
+
+def suite():
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.makeSuite(TestSQLiteStore))
+    suite.addTest(unittest.makeSuite(TestSQLiteDatabase))
+    return suite
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from openprocurement.auction.texas.acknowledgement import (
+    ACK_DATABASE,
+    ACK_JOURNAL,
+    ACK_MEMORY,
+    BidAcknowledgement,
+)
+from openprocurement.auction.texas.amount import Amount
+from openprocurement.auction.texas.utils import prepare_auction_protocol
+
+
+class TestBidAcknowledgement(unittest.TestCase):
+
+    def setUp(self):
+        self.journal_dir = tempfile.mkdtemp()
+        self.auction_id = '1' * 32
+        self.bid = {'bidder_id': 'bidder', 'amount': Amount(15025), 'time': 'time'}
+
+    def tearDown(self):
+        shutil.rmtree(self.journal_dir)
+
+    def test_default_level(self):
+        acknowledgement = BidAcknowledgement.from_config(None, self.auction_id)
+
+        self.assertEqual(acknowledgement.level, ACK_DATABASE)
+        self.assertTrue(acknowledgement.durable)
+        self.assertIsNone(acknowledgement.journal)
+
+    def test_memory_level(self):
+        acknowledgement = BidAcknowledgement.from_config(ACK_MEMORY, self.auction_id)
+
+        self.assertFalse(acknowledgement.durable)
+        acknowledgement.record(1, self.bid)
+        self.assertEqual(os.listdir(self.journal_dir), [])
+
+    def test_journal_level(self):
+        acknowledgement = BidAcknowledgement.from_config(
+            {'level': ACK_JOURNAL, 'journal_dir': self.journal_dir}, self.auction_id
+        )
+
+        self.assertFalse(acknowledgement.durable)
+        acknowledgement.record(1, self.bid)
+        acknowledgement.record(3, dict(self.bid, amount=160))
+        acknowledgement.close()
+
+        with open(acknowledgement.journal.path) as journal:
+            records = [json.loads(line) for line in journal]
+        self.assertEqual(acknowledgement.journal.path, os.path.join(self.journal_dir, self.auction_id + '_bids.journal'))
+        self.assertEqual(records, [
+            {'stage': 1, 'bidder_id': 'bidder', 'amount': 150.25, 'time': 'time'},
+            {'stage': 3, 'bidder_id': 'bidder', 'amount': 160.0, 'time': 'time'},
+        ])
+
+    def test_journal_requires_directory(self):
+        with self.assertRaises(ValueError):
+            BidAcknowledgement.from_config(ACK_JOURNAL, self.auction_id)
+
+    def test_confirm_drops_saved_bids(self):
+        acknowledgement = BidAcknowledgement(ACK_JOURNAL, self.auction_id, self.journal_dir)
+        acknowledgement.record(1, self.bid)
+        checkpoint = acknowledgement.checkpoint()
+        acknowledgement.record(3, dict(self.bid, bidder_id='later'))
+
+        acknowledgement.confirm(checkpoint)
+
+        self.assertEqual([record['bidder_id'] for record in acknowledgement.pending()], ['later'])
+        acknowledgement.record(5, self.bid)
+        acknowledgement.confirm(acknowledgement.checkpoint())
+        self.assertEqual(acknowledgement.pending(), [])
+        acknowledgement.close()
+
+    def test_pending_after_restart(self):
+        acknowledgement = BidAcknowledgement(ACK_JOURNAL, self.auction_id, self.journal_dir)
+        acknowledgement.record(1, self.bid)
+        acknowledgement.close()
+        with open(acknowledgement.journal.path, 'ab') as journal:
+            journal.write('{"stage": 3, "bidd')
+
+        restarted = BidAcknowledgement(ACK_JOURNAL, self.auction_id, self.journal_dir)
+
+        self.assertEqual(restarted.pending(), [
+            {'stage': 1, 'bidder_id': 'bidder', 'amount': 150.25, 'time': 'time'}
+        ])
+        self.assertEqual(BidAcknowledgement(ACK_MEMORY).pending(), [])
+
+    def test_unknown_level(self):
+        with self.assertRaises(ValueError):
+            BidAcknowledgement.from_config('disk', self.auction_id)
+
+    def test_level_in_protocol(self):
+        context = {
+            'auction_doc_id': self.auction_id,
+            'auction_data': {'data': {}},
+            'bid_acknowledgement': BidAcknowledgement(ACK_MEMORY)
+        }
+
+        self.assertEqual(prepare_auction_protocol(context)['bid_acknowledgement'], ACK_MEMORY)
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestBidAcknowledgement))
+    return tests
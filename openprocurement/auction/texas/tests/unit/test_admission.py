@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from gevent import spawn, sleep
+from gevent.lock import BoundedSemaphore
+
+from openprocurement.auction.texas.admission import (
+    BidsQueue,
+    BidsQueueFull,
+    BidsQueueTimeout,
+    BidReplaced,
+)
+from openprocurement.auction.texas.metrics import METRICS
+
+
+class TestBidsQueue(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.semaphore = BoundedSemaphore()
+        self.queue = BidsQueue(self.semaphore, timeout=1, max_depth=2)
+        self.processed = []
+
+    def place_bid(self, bidder_id, amount, duration=0.01):
+        try:
+            with self.queue.admit(bidder_id):
+                self.assertTrue(self.semaphore.locked())
+                sleep(duration)
+                self.processed.append((bidder_id, amount))
+        except Exception as e:
+            return e
+        return True
+
+    def test_fifo_order(self):
+        bids = [spawn(self.place_bid, bidder_id, 100) for bidder_id in ('a', 'b', 'c')]
+        results = [bid.get() for bid in bids]
+
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(self.processed, [('a', 100), ('b', 100), ('c', 100)])
+        self.assertFalse(self.semaphore.locked())
+        self.assertEqual(len(self.queue), 0)
+        self.assertEqual(METRICS.snapshot()['histograms']['bids_queue.wait']['count'], 3)
+        self.assertEqual(METRICS.snapshot()['gauges']['bids_queue.depth'], 0)
+
+    def test_latest_bid_of_bidder_is_kept(self):
+        bids = [
+            spawn(self.place_bid, 'a', 100),
+            spawn(self.place_bid, 'b', 100),
+            spawn(self.place_bid, 'c', 100),
+        ]
+        sleep(0)
+        bids.append(spawn(self.place_bid, 'b', 200))
+        results = [bid.get() for bid in bids]
+
+        self.assertEqual(results[0], True)
+        self.assertIsInstance(results[1], BidReplaced)
+        self.assertEqual(results[2:], [True, True])
+        self.assertEqual(self.processed, [('a', 100), ('b', 200), ('c', 100)])
+        self.assertEqual(METRICS.snapshot()['counters']['bids_queue.coalesced'], 1)
+
+    def test_queue_is_full(self):
+        bids = [spawn(self.place_bid, bidder_id, 100) for bidder_id in ('a', 'b', 'c', 'd')]
+        results = [bid.get() for bid in bids]
+
+        self.assertEqual(results[:3], [True, True, True])
+        self.assertIsInstance(results[3], BidsQueueFull)
+        self.assertEqual(METRICS.snapshot()['counters']['bids_queue.rejected'], 1)
+
+    def test_wait_timeout(self):
+        self.queue.timeout = 0.05
+        bids = [spawn(self.place_bid, 'a', 100, 0.2), spawn(self.place_bid, 'b', 100)]
+        results = [bid.get() for bid in bids]
+
+        self.assertEqual(results[0], True)
+        self.assertIsInstance(results[1], BidsQueueTimeout)
+        self.assertEqual(self.processed, [('a', 100)])
+        self.assertEqual(len(self.queue), 0)
+        self.assertEqual(METRICS.snapshot()['counters']['bids_queue.timeouts'], 1)
+
+    def test_semaphore_timeout(self):
+        self.queue.timeout = 0.05
+        self.semaphore.acquire()
+
+        self.assertIsInstance(self.place_bid('a', 100), BidsQueueTimeout)
+        self.semaphore.release()
+        self.assertEqual(self.place_bid('b', 100), True)
+        self.assertEqual(self.processed, [('b', 100)])
+
+    def test_error_releases_queue(self):
+        with self.assertRaises(ValueError):
+            with self.queue.admit('a'):
+                raise ValueError()
+
+        self.assertFalse(self.semaphore.locked())
+        self.assertEqual(self.place_bid('a', 100), True)
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestBidsQueue))
+    return tests
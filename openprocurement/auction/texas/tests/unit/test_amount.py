@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import unittest
+from decimal import Decimal
+
+from openprocurement.auction.texas.amount import Amount, AmountPrecisionError
+
+
+class TestAmount(unittest.TestCase):
+
+    def test_from_value(self):
+        self.assertEqual(Amount.from_value(150).units, 15000)
+        self.assertEqual(Amount.from_value(150.25).units, 15025)
+        self.assertEqual(Amount.from_value(0.1).units, 10)
+        self.assertEqual(Amount.from_value('150.250').units, 15025)
+        self.assertEqual(Amount.from_value(Decimal('1.10')).units, 110)
+        self.assertEqual(Amount.from_value(150, 'UAH').currency, 'UAH')
+
+    def test_invalid_value(self):
+        for value in ('abc', None, True, 'NaN', float('inf')):
+            with self.assertRaises(ValueError):
+                Amount.from_value(value)
+
+    def test_imprecise_value(self):
+        for value in ('150.255', 150.005, Decimal('0.001')):
+            with self.assertRaises(AmountPrecisionError):
+                Amount.from_value(value)
+
+    def test_from_document(self):
+        amount = Amount.from_document({'amount': 100.5, 'currency': 'UAH'})
+        self.assertEqual((amount.units, amount.currency), (10050, 'UAH'))
+        self.assertEqual(Amount.from_document(100.5).units, 10050)
+
+    def test_from_document_is_rounded(self):
+        self.assertEqual(Amount.from_document({'amount': 0.125}).units, 13)
+        self.assertEqual(Amount.from_document('150.004').units, 15000)
+        with self.assertRaises(ValueError):
+            Amount.from_document({'amount': 'abc'})
+
+    def test_arithmetic(self):
+        amount = Amount.from_value(0.1, 'UAH') + Amount.from_value(0.2)
+        self.assertEqual(amount, 0.3)
+        self.assertEqual(amount.currency, 'UAH')
+        self.assertEqual(amount.to_value(), 0.3)
+        self.assertEqual((Amount.from_value(1.15) - 0.05).to_value(), 1.1)
+        self.assertFalse(Amount.from_value(1.15) % Amount.from_value(0.05))
+        self.assertTrue(Amount.from_value(1.16) % Amount.from_value(0.05))
+
+    def test_currency_mismatch(self):
+        with self.assertRaises(ValueError):
+            Amount(100, 'UAH') + Amount(100, 'USD')
+        self.assertNotEqual(Amount(100, 'UAH'), Amount(100, 'USD'))
+
+    def test_comparison(self):
+        self.assertLess(Amount(100), Amount(101))
+        self.assertGreater(Amount.from_value(100.01), 100)
+        self.assertEqual(Amount(100), 1)
+        self.assertNotEqual(Amount(100), None)
+        self.assertFalse(Amount(0))
+
+    def test_text(self):
+        self.assertEqual(unicode(Amount(15005)), u'150.05')
+        self.assertEqual(str(Amount(-5)), '-0.05')
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestAmount))
+    return tests
@@ -5,6 +5,8 @@ from copy import deepcopy
 from datetime import datetime, timedelta
 
 from openprocurement.auction.texas.auction import Auction
+from openprocurement.auction.texas.utils import prepare_bidders_presentation
+from openprocurement.auction.texas.structures import FrozenDict
 from openprocurement.auction.worker_core.constants import TIMEZONE
 from openprocurement.auction.texas.constants import (
     MULTILINGUAL_FIELDS,
@@ -141,6 +143,7 @@ class TestScheduleAuction(AuctionInitSetup):
         self.assertEqual(self.auction.context['auction_data'], self.auction._auction_data)
         self.assertEqual(self.auction.context['bidders_data'], self.auction.bidders_data)
         self.assertEqual(self.auction.context['bids_mapping'], self.auction.bids_mapping)
+        self.assertIs(self.auction.context['bidders_index'], self.auction.bidders_index)
         self.assertEqual(self.auction.context['auction_protocol'], auction_protocol)
 
         self.assertEqual(self.mocked_scheduler.add_job.call_count, 1)
@@ -168,6 +171,22 @@ class TestScheduleAuction(AuctionInitSetup):
 
         self.assertEqual(self.auction.context['server'], 'server')
 
+    def test_auction_schedule_replays_bids_journal(self):
+        auction_document = {'stages': [{'start': 'start'}, {'start': 'start'}]}
+        self.mock_db.get_auction_document.return_value = auction_document
+        self.mocked_utils.update_auction_document.return_value.__enter__.return_value = auction_document
+        self.mocked_utils.convert_datetime.return_value = datetime.now()
+        records = [{'stage': 1, 'bidder_id': 'bidder', 'amount': 350.0, 'time': 'time'}]
+        acknowledgement = mock.MagicMock()
+        acknowledgement.pending.return_value = records
+        self.auction.context['bid_acknowledgement'] = acknowledgement
+
+        with mock.patch('openprocurement.auction.texas.auction.BidsHandler') as mocked_bids_handler:
+            self.auction.schedule_auction()
+
+        mocked_bids_handler.return_value.replay_bids.assert_called_once_with(records)
+        self.assertEqual(self.mocked_run_server.call_count, 1)
+
 
 class TestCancelAuction(AuctionInitSetup):
 
@@ -793,6 +812,7 @@ class TestPrepareInitialBids(AuctionInitSetup):
             'id_2': 'bid_2'
         }
         self.auction.bids_mapping = deepcopy(self.bids_mapping)
+        self.auction.bidders_presentation = prepare_bidders_presentation(self.bids_mapping)
 
         self.auction.auction_protocol = {
             'timeline': {
@@ -870,7 +890,8 @@ class TestPrepareInitialBids(AuctionInitSetup):
             bidder_id=bidders_data[1]['id'],
             time=bidders_data[1]['date'],
             bidder_name=self.bids_mapping[bidders_data[1]['id']],
-            amount=auction_document['value']['amount']
+            amount=auction_document['value']['amount'],
+            label=self.auction.bidders_presentation[bidders_data[1]['id']]['label']
         )
 
         self.assertEqual(auction_document['initial_bids'], self.resulted_stages)
@@ -1288,6 +1309,12 @@ class TestBiddersData(AuctionInitSetup):
         self.auction._set_bidders_data()
 
         self.assertEqual(self.auction.bidders_data, expected_result)
+        self.assertIsInstance(self.auction.bidders_index, FrozenDict)
+        self.assertEqual(list(sorted(self.auction.bidders_index)), ['id_1', 'id_2'])
+        self.assertEqual(
+            dict(self.auction.bidders_index['id_1']),
+            {'id': 'id_1', 'date': 'date_1', 'value': 'value_1', 'owner': 'owner_1'}
+        )
 
 
 class TestSetMapping(AuctionInitSetup):
@@ -1321,6 +1348,10 @@ class TestSetMapping(AuctionInitSetup):
         self.auction._set_mapping()
 
         self.assertEqual(self.auction.bids_mapping, expected_result)
+        self.mocked_utils.prepare_bidders_presentation.assert_called_once_with(expected_result)
+        self.assertEqual(
+            self.auction.bidders_presentation, self.mocked_utils.prepare_bidders_presentation.return_value
+        )
 
 
 def suite():
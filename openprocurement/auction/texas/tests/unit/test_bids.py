@@ -3,9 +3,14 @@ import unittest
 import mock
 from copy import deepcopy
 from datetime import datetime
+from gevent.lock import BoundedSemaphore
 
-from openprocurement.auction.texas.bids import BidsHandler
+from openprocurement.auction.texas.bids import BidsHandler, ResultsIndex
+from openprocurement.auction.texas.acknowledgement import BidAcknowledgement, ACK_MEMORY
+from openprocurement.auction.texas.amount import Amount
 from openprocurement.auction.texas.constants import DEADLINE_HOUR
+from openprocurement.auction.texas.pipeline import PostCommitPipeline
+from openprocurement.auction.texas.utils import prepare_bidders_presentation
 
 
 class TestBidsHandler(unittest.TestCase):
@@ -13,7 +18,7 @@ class TestBidsHandler(unittest.TestCase):
 
         self.bids_handler = BidsHandler()
         self.bids_handler.context = {
-            'bids_mapping': {'test_bidder_id': 'test_name'},
+            'bidders_presentation': prepare_bidders_presentation({'test_bidder_id': 'test_name'}),
             'worker_defaults': {
                 'deadline': {
                     'deadline_hour': DEADLINE_HOUR
@@ -41,25 +46,24 @@ class TestAddBid(TestBidsHandler):
     def setUp(self):
         super(TestAddBid, self).setUp()
 
-        self.patch_sorting_by_amount = mock.patch('openprocurement.auction.texas.bids.sorting_by_amount')
         self.patch_prepare_results_stage = mock.patch('openprocurement.auction.texas.bids.utils.prepare_results_stage')
         self.patch_end_bid_stage = mock.patch.object(self.bids_handler, 'end_bid_stage')
 
-        self.mocked_sorting_by_amount = self.patch_sorting_by_amount.start()
         self.mocked_prepare_results_stage = self.patch_prepare_results_stage.start()
         self.mocked_end_bid_stage = self.patch_end_bid_stage.start()
 
-        self.mocked_sorting_by_amount.return_value = [{'result': 'sorted_results'}]
-        self.mocked_prepare_results_stage.return_value = {'result': 'prepared_result_stage'}
+        self.prepared_result = {'bidder_id': 'test_bidder_id', 'amount': 350, 'time': 'current_time'}
+        self.mocked_prepare_results_stage.return_value = self.prepared_result
+        self.label = self.bids_handler.context['bidders_presentation']['test_bidder_id']['label']
 
     def tearDown(self):
         super(TestAddBid, self).tearDown()
-        self.patch_sorting_by_amount.stop()
         self.patch_prepare_results_stage.stop()
         self.patch_end_bid_stage.stop()
 
     def test_add_bid_not_in_results(self):
-        auction_document = {'stages': [{}], 'results': []}
+        other_result = {'bidder_id': 'other_bidder_id', 'amount': 300, 'time': 'earlier_time'}
+        auction_document = {'stages': [{}], 'results': [other_result]}
         self.mocked_update_auction_document.return_value.__enter__.return_value = auction_document
 
         result = self.bids_handler.add_bid(0, self.test_bid)
@@ -67,17 +71,22 @@ class TestAddBid(TestBidsHandler):
         self.assertEqual(result, True)
 
         self.mocked_update_auction_document.assert_called_once_with(
-            self.bids_handler.context, self.bids_handler.database
+            self.bids_handler.context, self.bids_handler.database, flush=False, save=True
         )
-        self.mocked_prepare_results_stage.assert_called_once_with(**self.bid_with_name)
-        self.mocked_sorting_by_amount.assert_called_once_with([self.mocked_prepare_results_stage.return_value])
-        self.mocked_end_bid_stage.assert_called_once_with(self.bid_with_name)
+        self.mocked_prepare_results_stage.assert_called_once_with(label=self.label, **self.bid_with_name)
+        self.mocked_end_bid_stage.assert_called_once_with(self.bid_with_name, record=True)
 
-        self.assertEqual(auction_document['results'], self.mocked_sorting_by_amount.return_value)
-        self.assertEqual(auction_document['stages'][0], self.mocked_prepare_results_stage.return_value)
+        self.assertEqual(auction_document['results'], [self.prepared_result, other_result])
+        self.assertEqual(auction_document['stages'][0], self.prepared_result)
 
     def test_add_bid_already_in_results(self):
-        auction_document = {'stages': [{}], 'results': [{'bidder_id': 'test_bidder_id'}]}
+        auction_document = {
+            'stages': [{}],
+            'results': [
+                {'bidder_id': 'other_bidder_id', 'amount': 300, 'time': 'earlier_time'},
+                {'bidder_id': 'test_bidder_id', 'amount': 250, 'time': 'earlier_time'},
+            ]
+        }
         self.mocked_update_auction_document.return_value.__enter__.return_value = auction_document
 
         result = self.bids_handler.add_bid(0, self.test_bid)
@@ -85,14 +94,27 @@ class TestAddBid(TestBidsHandler):
         self.assertEqual(result, True)
 
         self.mocked_update_auction_document.assert_called_once_with(
-            self.bids_handler.context, self.bids_handler.database
+            self.bids_handler.context, self.bids_handler.database, flush=False, save=True
+        )
+        self.mocked_prepare_results_stage.assert_called_once_with(label=self.label, **self.bid_with_name)
+        self.mocked_end_bid_stage.assert_called_once_with(self.bid_with_name, record=True)
+
+        self.assertEqual(
+            auction_document['results'],
+            [self.prepared_result, {'bidder_id': 'other_bidder_id', 'amount': 300, 'time': 'earlier_time'}]
         )
-        self.mocked_prepare_results_stage.assert_called_once_with(**self.bid_with_name)
-        self.mocked_sorting_by_amount.assert_called_once_with([self.mocked_prepare_results_stage.return_value])
-        self.mocked_end_bid_stage.assert_called_once_with(self.bid_with_name)
+        self.assertEqual(auction_document['stages'][0], self.prepared_result)
+
+    def test_add_bid_unknown_bidder(self):
+        auction_document = {'stages': [{}], 'results': []}
+        self.mocked_update_auction_document.return_value.__enter__.return_value = auction_document
+        bid = dict(self.test_bid, bidder_id='unknown_bidder_id')
+
+        self.bids_handler.add_bid(0, bid)
 
-        self.assertEqual(auction_document['results'], self.mocked_sorting_by_amount.return_value)
-        self.assertEqual(auction_document['stages'][0], self.mocked_prepare_results_stage.return_value)
+        self.mocked_prepare_results_stage.assert_called_once_with(
+            label=None, bidder_name=False, **dict(self.test_bid, bidder_id='unknown_bidder_id')
+        )
 
     def test_add_bid_error(self):
         exc = Exception('Something went wrong :(')
@@ -102,33 +124,87 @@ class TestAddBid(TestBidsHandler):
 
         self.assertEqual(result, exc)
         self.mocked_update_auction_document.assert_called_once_with(
-            self.bids_handler.context, self.bids_handler.database
+            self.bids_handler.context, self.bids_handler.database, flush=False, save=True
         )
-        self.mocked_prepare_results_stage.assert_called_once_with(**self.bid_with_name)
-        self.assertEqual(self.mocked_sorting_by_amount.call_count, 0)
+        self.mocked_prepare_results_stage.assert_called_once_with(label=self.label, **self.bid_with_name)
         self.assertEqual(self.mocked_end_bid_stage.call_count, 0)
 
 
+class TestResultsIndex(unittest.TestCase):
+
+    def make_result(self, bidder_id, amount, time):
+        return {'bidder_id': bidder_id, 'amount': amount, 'time': time}
+
+    def test_build_sorts_results(self):
+        results = [
+            self.make_result('a', 100, '2'),
+            self.make_result('b', 200, '3'),
+            self.make_result('c', 100, '1'),
+        ]
+        index = ResultsIndex(results)
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual([result['bidder_id'] for result in results], ['b', 'c', 'a'])
+
+    def test_update(self):
+        results = []
+        index = ResultsIndex(results)
+
+        index.update(results, self.make_result('a', 100, '1'))
+        index.update(results, self.make_result('b', 150, '2'))
+        index.update(results, self.make_result('c', 150, '3'))
+        index.update(results, self.make_result('a', 200, '4'))
+        index.update(results, self.make_result('c', 250, '5'))
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(
+            results,
+            [self.make_result('c', 250, '5'), self.make_result('a', 200, '4'), self.make_result('b', 150, '2')]
+        )
+
+    def test_index_is_rebuilt_for_changed_results(self):
+        bids_handler = BidsHandler()
+        results = [self.make_result('a', 100, '1')]
+        index = bids_handler.get_results_index(results)
+
+        self.assertIs(bids_handler.get_results_index(results), index)
+        results.append(self.make_result('b', 200, '2'))
+        self.assertIsNot(bids_handler.get_results_index(results), index)
+        self.assertEqual(results[0]['bidder_id'], 'b')
+
+    def test_index_is_rebuilt_for_replaced_results(self):
+        bids_handler = BidsHandler()
+        results = [self.make_result('a', 200, '1'), self.make_result('b', 100, '2')]
+        bids_handler.get_results_index(results).update(results, self.make_result('b', 300, '3'))
+        # Results of the same length, like ones of document reloaded from database
+        results = [self.make_result('a', 400, '4'), self.make_result('b', 100, '2')]
+
+        bids_handler.get_results_index(results).update(results, self.make_result('b', 500, '5'))
+
+        self.assertEqual(
+            results,
+            [self.make_result('b', 500, '5'), self.make_result('a', 400, '4')]
+        )
+
+
 class TestEndBidStage(TestBidsHandler):
 
     def setUp(self):
         super(TestEndBidStage, self).setUp()
         self.bids_handler.context['auction_protocol'] = {}
+        self.bid_stage = {'bidder_id': 'test_bidder_id', 'amount': 350, 'time': 'current_time'}
         self.patch_generate_request_id = mock.patch('openprocurement.auction.texas.bids.generate_request_id')
         self.mocked_generate_request_id = self.patch_generate_request_id.start()
 
         self.deadline = datetime.now().replace(hour=DEADLINE_HOUR)
         self.bids_handler.context['deadline'] = self.deadline
 
-        self.patch_scheduler = mock.patch('openprocurement.auction.texas.bids.SCHEDULER')
-        self.mocked_scheduler = self.patch_scheduler.start()
-
-        self.patch_approve_auction_protocol_info_on_bids_stage = mock.patch(
-            'openprocurement.auction.texas.bids.approve_auction_protocol_info_on_bids_stage'
+        self.patch_approve_auction_protocol_info_on_bid = mock.patch(
+            'openprocurement.auction.texas.bids.approve_auction_protocol_info_on_bid'
         )
-        self.mocked_approve_auction_protocol_info_on_bids_stage = \
-            self.patch_approve_auction_protocol_info_on_bids_stage.start()
-        self.mocked_approve_auction_protocol_info_on_bids_stage.return_value = {'auction': 'protocol'}
+        self.mocked_approve_auction_protocol_info_on_bid = \
+            self.patch_approve_auction_protocol_info_on_bid.start()
+        self.mocked_approve_auction_protocol_info_on_bid.return_value = {'auction': 'protocol'}
 
         self.patch_prepare_auction_stages = mock.patch(
             'openprocurement.auction.texas.bids.utils.prepare_auction_stages'
@@ -151,15 +227,14 @@ class TestEndBidStage(TestBidsHandler):
     def tearDown(self):
         super(TestEndBidStage, self).tearDown()
         self.patch_generate_request_id.stop()
-        self.patch_scheduler.stop()
         self.patch_prepare_auction_stages.stop()
         self.patch_convert_datetime.stop()
         self.patch_get_round_ending_time.stop()
         self.patch_round_duration.stop()
-        self.patch_approve_auction_protocol_info_on_bids_stage.stop()
+        self.patch_approve_auction_protocol_info_on_bid.stop()
 
     def test_end_bid_stage_no_main_round(self):
-        auction_document = {'stages': [], 'results': [], 'minimalStep': 30, 'current_stage': 0}
+        auction_document = {'stages': [self.bid_stage], 'results': [], 'minimalStep': 30, 'current_stage': 0}
         expected_bid_document = {
             'value': {'amount': self.bid_with_name['amount']},
             'minimalStep': auction_document['minimalStep']
@@ -172,19 +247,18 @@ class TestEndBidStage(TestBidsHandler):
         result = self.bids_handler.end_bid_stage(self.bid_with_name)
 
         self.assertEqual(result, None)
-        self.assertEqual(auction_document['stages'], ['pause'])
+        self.assertEqual(auction_document['stages'], [self.bid_stage, 'pause'])
 
         self.mocked_generate_request_id.assert_called_once()
-        self.mocked_scheduler.remove_all_jobs.assert_called_once()
-        self.mocked_approve_auction_protocol_info_on_bids_stage.assert_called_once_with(
-            self.bids_handler.context['auction_document'], {}
+        self.mocked_approve_auction_protocol_info_on_bid.assert_called_once_with(
+            {}, 0, self.bid_stage
         )
         self.assertEqual(
             self.bids_handler.context['auction_protocol'],
-            self.mocked_approve_auction_protocol_info_on_bids_stage.return_value
+            self.mocked_approve_auction_protocol_info_on_bid.return_value
         )
         self.mocked_update_auction_document.assert_called_once_with(
-            self.bids_handler.context, self.bids_handler.database
+            self.bids_handler.context, self.bids_handler.database, save=True
         )
 
         self.mocked_convert_datetime.assert_called_once_with(self.bid_with_name['time'])
@@ -193,12 +267,13 @@ class TestEndBidStage(TestBidsHandler):
         )
 
         self.bids_handler.job_service.add_ending_main_round_job.assert_called_once_with(self.deadline)
+        self.bids_handler.job_service.cancel_pause_job.assert_called_once_with()
 
         self.assertEqual(self.bids_handler.job_service.add_pause_job.call_count, 0)
         self.assertEqual(self.mocked_get_round_ending_time.call_count, 0)
 
     def test_end_bid_stage_with_main_round(self):
-        auction_document = {'stages': [], 'results': [], 'minimalStep': 30, 'current_stage': 0}
+        auction_document = {'stages': [self.bid_stage], 'results': [], 'minimalStep': 30, 'current_stage': 0}
         expected_bid_document = {
             'value': {'amount': self.bid_with_name['amount']},
             'minimalStep': auction_document['minimalStep']
@@ -212,19 +287,18 @@ class TestEndBidStage(TestBidsHandler):
         result = self.bids_handler.end_bid_stage(self.bid_with_name)
 
         self.assertEqual(result, None)
-        self.assertEqual(auction_document['stages'], prepare_auction_stages_result)
+        self.assertEqual(auction_document['stages'], [self.bid_stage] + prepare_auction_stages_result)
 
         self.mocked_generate_request_id.assert_called_once()
-        self.mocked_scheduler.remove_all_jobs.assert_called_once()
-        self.mocked_approve_auction_protocol_info_on_bids_stage.assert_called_once_with(
-            self.bids_handler.context['auction_document'], {}
+        self.mocked_approve_auction_protocol_info_on_bid.assert_called_once_with(
+            {}, 0, self.bid_stage
         )
         self.assertEqual(
             self.bids_handler.context['auction_protocol'],
-            self.mocked_approve_auction_protocol_info_on_bids_stage.return_value
+            self.mocked_approve_auction_protocol_info_on_bid.return_value
         )
         self.mocked_update_auction_document.assert_called_once_with(
-            self.bids_handler.context, self.bids_handler.database
+            self.bids_handler.context, self.bids_handler.database, save=True
         )
         self.mocked_convert_datetime.assert_any_call(self.bid_with_name['time'])
         self.mocked_prepare_auction_stages.assert_called_once_with(
@@ -235,14 +309,219 @@ class TestEndBidStage(TestBidsHandler):
 
         self.bids_handler.job_service.add_ending_main_round_job.assert_called_once_with(self.round_ending_time_result)
         self.bids_handler.job_service.add_pause_job.assert_called_once_with(self.convert_datetime_results[1])
+        self.assertEqual(self.bids_handler.job_service.cancel_pause_job.call_count, 0)
 
         self.mocked_get_round_ending_time.assert_called_once_with(
             self.convert_datetime_results[1], self.mocked_round_duration, self.deadline
         )
 
+    def test_jobs_are_moved_before_save(self):
+        auction_document = {'stages': [self.bid_stage], 'results': [], 'minimalStep': 30, 'current_stage': 0}
+        self.bids_handler.context['auction_document'] = auction_document
+        self.mocked_prepare_auction_stages.return_value = ['pause', {'start': 'test'}]
+        planned_jobs = []
+
+        def enter():
+            planned_jobs.append(self.bids_handler.job_service.add_ending_main_round_job.call_count)
+            return auction_document
+        self.mocked_update_auction_document.return_value.__enter__.side_effect = enter
+
+        self.bids_handler.end_bid_stage(self.bid_with_name)
+
+        self.assertEqual(planned_jobs, [1])
+
+    def test_side_effects_run_after_commit(self):
+        auction_document = {'stages': [self.bid_stage], 'results': [], 'minimalStep': 30, 'current_stage': 0}
+        self.mocked_update_auction_document.return_value.__enter__.return_value = auction_document
+        self.bids_handler.context['auction_document'] = auction_document
+        self.bids_handler.context['post_commit'] = PostCommitPipeline()
+        self.mocked_prepare_auction_stages.return_value = ['pause', {}]
+
+        self.bids_handler.end_bid_stage(self.bid_with_name)
+
+        self.assertEqual(self.mocked_approve_auction_protocol_info_on_bid.call_count, 0)
+        self.assertTrue(self.bids_handler.context['post_commit'].drain(timeout=1))
+        self.mocked_approve_auction_protocol_info_on_bid.assert_called_once_with({}, 0, self.bid_stage)
+        self.assertEqual(
+            self.bids_handler.context['auction_protocol'],
+            self.mocked_approve_auction_protocol_info_on_bid.return_value
+        )
+
+    def test_memory_acknowledgement(self):
+        auction_document = {'stages': [self.bid_stage], 'results': [], 'minimalStep': 30, 'current_stage': 0}
+        self.mocked_update_auction_document.return_value.__enter__.return_value = auction_document
+        self.bids_handler.context['auction_document'] = auction_document
+        self.bids_handler.context['auction_doc_id'] = '1' * 32
+        self.bids_handler.context['server_actions'] = BoundedSemaphore()
+        self.bids_handler.context['post_commit'] = PostCommitPipeline()
+        self.bids_handler.context['bid_acknowledgement'] = BidAcknowledgement(ACK_MEMORY)
+        self.mocked_prepare_auction_stages.return_value = ['pause', {}]
+
+        self.bids_handler.end_bid_stage(self.bid_with_name)
+
+        self.mocked_update_auction_document.assert_called_once_with(
+            self.bids_handler.context, self.bids_handler.database, save=False
+        )
+        self.assertEqual(self.bids_handler.database.save_auction_document.call_count, 0)
+        self.assertTrue(self.bids_handler.context['post_commit'].drain(timeout=1))
+        self.bids_handler.database.save_auction_document.assert_called_once_with(auction_document, '1' * 32)
+
+    def test_journal_acknowledgement(self):
+        auction_document = {'stages': [self.bid_stage], 'results': [], 'minimalStep': 30, 'current_stage': 0}
+        self.mocked_update_auction_document.return_value.__enter__.return_value = auction_document
+        self.bids_handler.context['auction_document'] = auction_document
+        self.bids_handler.context['auction_doc_id'] = '1' * 32
+        self.bids_handler.context['server_actions'] = BoundedSemaphore()
+        acknowledgement = mock.MagicMock(durable=False)
+        self.bids_handler.context['bid_acknowledgement'] = acknowledgement
+        self.mocked_prepare_auction_stages.return_value = ['pause', {}]
+
+        self.bids_handler.end_bid_stage(self.bid_with_name)
+
+        acknowledgement.record.assert_called_once_with(0, self.bid_with_name)
+        self.assertEqual(self.bids_handler.database.save_auction_document.call_count, 1)
+        acknowledgement.confirm.assert_called_once_with(acknowledgement.checkpoint.return_value)
+
+    def test_replayed_bid_is_not_journaled(self):
+        auction_document = {'stages': [self.bid_stage], 'results': [], 'minimalStep': 30, 'current_stage': 0}
+        self.mocked_update_auction_document.return_value.__enter__.return_value = auction_document
+        self.bids_handler.context['auction_document'] = auction_document
+        self.bids_handler.context['auction_doc_id'] = '1' * 32
+        self.bids_handler.context['server_actions'] = BoundedSemaphore()
+        acknowledgement = mock.MagicMock(durable=False)
+        self.bids_handler.context['bid_acknowledgement'] = acknowledgement
+        self.mocked_prepare_auction_stages.return_value = ['pause', {}]
+
+        self.bids_handler.end_bid_stage(self.bid_with_name, record=False)
+
+        self.assertEqual(acknowledgement.record.call_count, 0)
+        self.assertEqual(self.bids_handler.database.save_auction_document.call_count, 1)
+
+    def test_deferred_save_waits_for_lock(self):
+        auction_document = {'stages': [self.bid_stage], 'results': [], 'minimalStep': 30, 'current_stage': 0}
+        self.mocked_update_auction_document.return_value.__enter__.return_value = auction_document
+        self.bids_handler.context['auction_document'] = auction_document
+        self.bids_handler.context['auction_doc_id'] = '1' * 32
+        self.bids_handler.context['server_actions'] = BoundedSemaphore()
+        self.bids_handler.context['post_commit'] = PostCommitPipeline()
+        self.bids_handler.context['bid_acknowledgement'] = BidAcknowledgement(ACK_MEMORY)
+        self.mocked_prepare_auction_stages.return_value = ['pause', {}]
+
+        with self.bids_handler.context['server_actions']:
+            self.bids_handler.end_bid_stage(self.bid_with_name)
+            self.assertFalse(self.bids_handler.context['post_commit'].drain(timeout=0.01))
+            self.assertEqual(self.bids_handler.database.save_auction_document.call_count, 0)
+            # Document committed under the lock later is the one saved
+            latest_document = dict(auction_document, current_stage=2)
+            self.bids_handler.context['auction_document'] = latest_document
+
+        self.assertTrue(self.bids_handler.context['post_commit'].drain(timeout=1))
+        self.bids_handler.database.save_auction_document.assert_called_once_with(latest_document, '1' * 32)
+
+
+class TestReplayBids(TestBidsHandler):
+
+    def setUp(self):
+        super(TestReplayBids, self).setUp()
+        self.patch_update_auction_document.stop()
+        self.bids_handler.context['auction_doc_id'] = '1' * 32
+        self.bids_handler.context['server_actions'] = BoundedSemaphore()
+        self.bids_handler.context['auction_document'] = {
+            'current_stage': 3,
+            'stages': [
+                {'type': 'pause'},
+                {'type': 'english', 'bidder_id': 'saved_bidder', 'time': 'saved_time'},
+                {'type': 'pause'},
+                {'type': 'english'},
+            ]
+        }
+        self.acknowledgement = mock.MagicMock(durable=False)
+        self.bids_handler.context['bid_acknowledgement'] = self.acknowledgement
+        self.patch_add_bid = mock.patch.object(self.bids_handler, 'add_bid', side_effect=self.add_bid)
+        self.mocked_add_bid = self.patch_add_bid.start()
+        self.patch_end_bid_stage = mock.patch.object(
+            self.bids_handler, 'end_bid_stage', side_effect=self.end_bid_stage
+        )
+        self.mocked_end_bid_stage = self.patch_end_bid_stage.start()
+
+    def tearDown(self):
+        self.patch_add_bid.stop()
+        self.patch_end_bid_stage.stop()
+
+    def add_bid(self, current_stage, bid, record=True):
+        auction_document = self.bids_handler.context['auction_document']
+        auction_document['stages'][current_stage].update(bid)
+        self.bids_handler.context['auction_document'] = auction_document
+        self.bids_handler.end_bid_stage(bid, record=record)
+
+    def end_bid_stage(self, bid, record=True):
+        auction_document = self.bids_handler.context['auction_document']
+        auction_document['stages'].extend([{'type': 'pause'}, {'type': 'english'}])
+        auction_document['current_stage'] += 1
+        self.bids_handler.context['auction_document'] = auction_document
+
+    def test_replay_missing_bids(self):
+        self.bids_handler.replay_bids([
+            {'stage': 1, 'bidder_id': 'saved_bidder', 'amount': 350.0, 'time': 'saved_time'},
+            {'stage': 3, 'bidder_id': 'lost_bidder', 'amount': 360.5, 'time': 'lost_time'},
+        ])
+
+        self.mocked_add_bid.assert_called_once_with(
+            3, {'bidder_id': 'lost_bidder', 'amount': Amount(36050), 'time': 'lost_time'}, record=False
+        )
+        self.bids_handler.database.save_auction_document.assert_called_once_with(
+            self.bids_handler.context['auction_document'], '1' * 32
+        )
+        self.acknowledgement.confirm.assert_called_once_with(self.acknowledgement.checkpoint.return_value)
+
+    def test_replay_bids_in_sequence(self):
+        self.bids_handler.replay_bids([
+            {'stage': 3, 'bidder_id': 'first_bidder', 'amount': 360.0, 'time': 'first_time'},
+            {'stage': 5, 'bidder_id': 'second_bidder', 'amount': 370.0, 'time': 'second_time'},
+            {'stage': 7, 'bidder_id': 'third_bidder', 'amount': 380.0, 'time': 'third_time'},
+        ])
+
+        self.assertEqual(
+            [c[0][:1] for c in self.mocked_add_bid.call_args_list], [(3,), (5,), (7,)]
+        )
+        auction_document = self.bids_handler.context['auction_document']
+        self.assertEqual(auction_document['current_stage'], 8)
+        self.assertEqual(auction_document['stages'][5]['bidder_id'], 'second_bidder')
+        self.assertEqual(auction_document['stages'][7]['bidder_id'], 'third_bidder')
+        self.assertEqual(self.acknowledgement.record.call_count, 0)
+        self.assertEqual(self.bids_handler.database.save_auction_document.call_count, 1)
+
+    def test_replay_end_of_saved_bid_stage(self):
+        # Bid was saved, but worker stopped before its stage was ended
+        auction_document = self.bids_handler.context['auction_document']
+        auction_document['stages'][3].update({'bidder_id': 'saved_bidder', 'time': 'later_time'})
+
+        self.bids_handler.replay_bids([
+            {'stage': 3, 'bidder_id': 'saved_bidder', 'amount': 360.0, 'time': 'later_time'},
+            {'stage': 5, 'bidder_id': 'lost_bidder', 'amount': 370.0, 'time': 'lost_time'},
+        ])
+
+        self.mocked_end_bid_stage.assert_any_call(
+            {'bidder_id': 'saved_bidder', 'amount': Amount(36000), 'time': 'later_time'}, record=False
+        )
+        self.mocked_add_bid.assert_called_once_with(
+            5, {'bidder_id': 'lost_bidder', 'amount': Amount(37000), 'time': 'lost_time'}, record=False
+        )
+        self.assertEqual(self.bids_handler.context['auction_document']['current_stage'], 6)
+
+    def test_skip_bid_of_other_stage(self):
+        self.bids_handler.replay_bids([
+            {'stage': 1, 'bidder_id': 'other_bidder', 'amount': 350.0, 'time': 'other_time'},
+        ])
+
+        self.assertEqual(self.mocked_add_bid.call_count, 0)
+        self.assertEqual(self.bids_handler.database.save_auction_document.call_count, 1)
+
 
 def suite():
     tests = unittest.TestSuite()
     tests.addTest(unittest.makeSuite(TestAddBid))
+    tests.addTest(unittest.makeSuite(TestResultsIndex))
     tests.addTest(unittest.makeSuite(TestEndBidStage))
+    tests.addTest(unittest.makeSuite(TestReplayBids))
     return tests
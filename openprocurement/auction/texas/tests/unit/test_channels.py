@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import mock
+
+from openprocurement.auction.texas.channels import Channel, DroppableFrame, StreamRegistry, STOP_SSE
+from openprocurement.auction.texas.metrics import METRICS
+
+
+class TestChannel(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.channel = Channel(size=3, bidder_id='bidder_1', client_id='client_1')
+
+        self.patch_logger = mock.patch('openprocurement.auction.texas.channels.LOGGER')
+        self.mocked_logger = self.patch_logger.start()
+
+    def tearDown(self):
+        self.patch_logger.stop()
+
+    def frames(self):
+        return list(self.channel.queue)
+
+    def test_put(self):
+        self.channel.put('state_1')
+        self.channel.put(DroppableFrame('tick_1'))
+
+        self.assertEqual(self.channel.get(), 'state_1')
+        self.assertEqual(self.channel.get(), 'tick_1')
+
+    def test_drop_oldest_tick(self):
+        tick_1, tick_2, tick_3 = DroppableFrame('tick_1'), DroppableFrame('tick_2'), DroppableFrame('tick_3')
+        self.channel.put(tick_1)
+        self.channel.put('state_1')
+        self.channel.put(tick_2)
+        self.channel.put(tick_3)
+
+        self.assertEqual(self.frames(), ['state_1', 'tick_2', 'tick_3'])
+
+        self.channel.put('state_2')
+
+        self.assertEqual(self.frames(), ['state_1', 'tick_3', 'state_2'])
+        self.assertEqual(METRICS.snapshot()['counters'], {'sse.dropped': 2})
+        self.assertFalse(self.channel.evicted)
+
+    def test_drop_tick_when_full_of_state(self):
+        for frame in ('state_1', 'state_2', 'state_3'):
+            self.channel.put(frame)
+
+        self.channel.put(DroppableFrame('tick_1'))
+
+        self.assertEqual(self.frames(), ['state_1', 'state_2', 'state_3'])
+        self.assertEqual(METRICS.snapshot()['counters'], {'sse.dropped': 1})
+
+    def test_evict(self):
+        for frame in ('state_1', 'state_2', 'state_3', 'state_4'):
+            self.channel.put(frame)
+
+        self.assertTrue(self.channel.evicted)
+        self.assertEqual(self.frames(), [{'event': STOP_SSE}])
+        self.assertEqual(METRICS.snapshot()['counters'], {'sse.evicted': 1})
+        self.assertEqual(self.mocked_logger.warning.call_count, 1)
+
+        self.channel.put('state_5')
+
+        self.assertEqual(self.frames(), [{'event': STOP_SSE}])
+
+
+class TestStreamRegistry(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.registry = StreamRegistry(max_streams=4, max_streams_per_bidder=2)
+
+    def open(self, bidder, client):
+        channel = Channel(bidder_id=bidder, client_id=client)
+        return channel, self.registry.open(channel)
+
+    def test_open_close(self):
+        first, closed = self.open('bidder_1', 'client_1')
+        second, _ = self.open('bidder_2', 'client_2')
+
+        self.assertEqual(closed, [])
+        self.assertEqual(len(self.registry), 2)
+        self.assertEqual(METRICS.snapshot()['gauges'], {
+            'sse.streams': 2, 'sse.streams.bidders': 2, 'sse.streams.max_per_bidder': 1
+        })
+
+        self.registry.close(first)
+        self.registry.close(first)
+
+        self.assertNotIn(first, self.registry)
+        self.assertIn(second, self.registry)
+        self.assertEqual(self.registry.count('bidder_1'), 0)
+        self.assertEqual(METRICS.snapshot()['gauges'], {
+            'sse.streams': 1, 'sse.streams.bidders': 1, 'sse.streams.max_per_bidder': 1
+        })
+
+    def test_bidder_limit_keeps_newest(self):
+        first, _ = self.open('bidder_1', 'client_1')
+        second, _ = self.open('bidder_1', 'client_2')
+        third, closed = self.open('bidder_1', 'client_3')
+
+        self.assertEqual(closed, [first])
+        self.assertEqual(self.registry.count('bidder_1'), 2)
+        self.assertIn(second, self.registry)
+        self.assertIn(third, self.registry)
+        self.assertEqual(METRICS.snapshot()['counters'], {'sse.streams.closed': 1})
+
+    def test_same_client_replaces_stream(self):
+        first, _ = self.open('bidder_1', 'client_1')
+        second, _ = self.open('bidder_1', 'client_2')
+        third, closed = self.open('bidder_1', 'client_1')
+
+        self.assertEqual(closed, [first])
+        self.assertEqual(self.registry.count('bidder_1'), 2)
+
+    def test_worker_limit_keeps_newest(self):
+        oldest, _ = self.open('bidder_1', 'client_1')
+        for bidder in ('bidder_2', 'bidder_3', 'bidder_4'):
+            self.open(bidder, 'client_1')
+
+        newest, closed = self.open('bidder_5', 'client_1')
+
+        self.assertEqual(closed, [oldest])
+        self.assertEqual(len(self.registry), 4)
+        self.assertIn(newest, self.registry)
+        self.assertEqual(METRICS.snapshot()['gauges']['sse.streams.bidders'], 4)
+
+    def test_no_limits(self):
+        self.registry = StreamRegistry(max_streams=0, max_streams_per_bidder=0)
+
+        for client in range(20):
+            _, closed = self.open('bidder_1', 'client_{}'.format(client))
+            self.assertEqual(closed, [])
+
+        self.assertEqual(METRICS.snapshot()['gauges']['sse.streams.max_per_bidder'], 20)
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestChannel))
+    tests.addTest(unittest.makeSuite(TestStreamRegistry))
+    return tests
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import unittest
+from copy import deepcopy
+
+from yaml import safe_dump as yaml_dump
+
+from openprocurement.auction.texas.context import (
+    DictContext,
+    SnapshotContext,
+    CopyOnWriteDict,
+    CopyOnWriteList,
+    ContextException,
+    prepare_context,
+)
+
+
+class TestPrepareContext(unittest.TestCase):
+
+    def test_prepare_dict_context(self):
+        context = prepare_context({'type': 'dict'})
+        self.assertIsInstance(context, DictContext)
+
+    def test_prepare_snapshot_context(self):
+        context = prepare_context({'type': 'snapshot'})
+        self.assertIsInstance(context, SnapshotContext)
+
+    def test_prepare_unknown_context(self):
+        with self.assertRaises(AttributeError):
+            prepare_context({'type': 'unknown'})
+
+
+class TestSnapshotContext(unittest.TestCase):
+
+    def setUp(self):
+        self.context = SnapshotContext({})
+        self.auction_document = {
+            'current_stage': 0,
+            'stages': [{'type': 'pause'}, {'type': 'english', 'amount': 100}],
+            'results': []
+        }
+        self.context['auction_document'] = deepcopy(self.auction_document)
+
+    def test_validation(self):
+        with self.assertRaises(ContextException):
+            self.context['unknown_field'] = {}
+        with self.assertRaises(ContextException):
+            self.context['auction_document'] = []
+
+    def test_read_returns_view(self):
+        auction_document = self.context['auction_document']
+
+        self.assertIsInstance(auction_document, CopyOnWriteDict)
+        self.assertIsInstance(auction_document['stages'], CopyOnWriteList)
+        self.assertEqual(auction_document, self.auction_document)
+
+    def test_read_shares_structure(self):
+        stored = self.context._mapping['auction_document']
+        auction_document = self.context['auction_document']
+
+        self.assertIs(dict.__getitem__(auction_document, 'stages'), stored['stages'])
+        auction_document['stages']
+        self.assertIsNot(dict.__getitem__(auction_document, 'stages'), stored['stages'])
+        self.assertIs(list.__getitem__(auction_document['stages'], 1), stored['stages'][1])
+
+    def test_mutation_does_not_affect_snapshot(self):
+        auction_document = self.context['auction_document']
+        auction_document['current_stage'] += 1
+        auction_document['stages'][1]['amount'] = 200
+        auction_document['stages'].append({'type': 'pause'})
+        for stage in auction_document['stages']:
+            stage['time'] = 'now'
+
+        self.assertEqual(self.context['auction_document'], self.auction_document)
+
+    def test_set_makes_new_snapshot(self):
+        auction_document = self.context['auction_document']
+        auction_document['stages'][1]['amount'] = 200
+        auction_document['stages'].append({'type': 'pause'})
+        self.context['auction_document'] = auction_document
+
+        auction_document['stages'][1]['amount'] = 300
+
+        stored_document = self.context['auction_document']
+        self.assertEqual(stored_document['stages'][1]['amount'], 200)
+        self.assertEqual(len(stored_document['stages']), 3)
+
+    def test_deepcopy_returns_plain_objects(self):
+        copied = deepcopy(self.context['auction_document'])
+
+        self.assertIs(type(copied), dict)
+        self.assertIs(type(copied['stages']), list)
+        self.assertIs(type(copied['stages'][0]), dict)
+        self.assertEqual(copied, self.auction_document)
+
+    def test_slicing_and_iteration(self):
+        stages = self.context['auction_document']['stages']
+
+        for stage in stages[1:]:
+            stage['amount'] = 0
+        for stage in reversed(stages):
+            stage['type'] = 'changed'
+
+        self.assertEqual(stages[1], {'type': 'changed', 'amount': 0})
+        self.assertEqual(self.context['auction_document'], self.auction_document)
+
+    def test_yaml_dump(self):
+        self.assertEqual(
+            yaml_dump(self.context['auction_document']),
+            yaml_dump(self.auction_document)
+        )
+
+    def test_get(self):
+        self.assertEqual(self.context.get('auction_document'), self.auction_document)
+        self.assertEqual(self.context.get('auction_protocol', {}), {})
+        self.assertIsNone(self.context.get('auction_protocol'))
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestPrepareContext))
+    tests.addTest(unittest.makeSuite(TestSnapshotContext))
+    return tests
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import gevent
+import mock
+
+from openprocurement.auction.texas.debounce import Debouncer
+from openprocurement.auction.texas.metrics import METRICS
+
+
+class TestDebouncer(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.debouncer = Debouncer(window=0.01)
+        self.sent = []
+
+    def send(self, value):
+        return lambda: self.sent.append(value)
+
+    def test_first_event_is_sent_at_once(self):
+        self.debouncer('key', self.send(1))
+
+        self.assertEqual(self.sent, [1])
+        self.assertEqual(len(self.debouncer), 1)
+
+        gevent.sleep(0.02)
+
+        self.assertEqual(self.sent, [1])
+        self.assertEqual(len(self.debouncer), 0)
+
+    def test_coalesce(self):
+        for value in range(5):
+            self.debouncer('key', self.send(value))
+
+        self.assertEqual(self.sent, [0])
+
+        gevent.sleep(0.015)
+
+        self.assertEqual(self.sent, [0, 4])
+        self.assertEqual(METRICS.snapshot()['counters'], {'sse.debounced': 3})
+        # Coalesced event opens the next window
+        self.debouncer('key', self.send(5))
+        self.assertEqual(self.sent, [0, 4])
+
+        gevent.sleep(0.015)
+
+        self.assertEqual(self.sent, [0, 4, 5])
+
+    def test_keys(self):
+        self.debouncer('first', self.send(1))
+        self.debouncer('second', self.send(2))
+
+        self.assertEqual(self.sent, [1, 2])
+
+    def test_no_window(self):
+        debouncer = Debouncer(window=0)
+
+        for value in range(3):
+            debouncer('key', self.send(value))
+
+        self.assertEqual(self.sent, [0, 1, 2])
+        self.assertEqual(len(debouncer), 0)
+
+    def test_callback_reads_state_when_sent(self):
+        state = {'clients': 1}
+        callback = mock.MagicMock(side_effect=lambda: self.sent.append(state['clients']))
+
+        self.debouncer('key', callback)
+        state['clients'] = 2
+        self.debouncer('key', callback)
+        state['clients'] = 3
+        gevent.sleep(0.015)
+
+        self.assertEqual(self.sent, [1, 3])
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestDebouncer))
+    return tests
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import unittest
+from copy import deepcopy
+
+from openprocurement.auction.texas.diff import make_json_patch, apply_json_patch
+
+
+class TestMakeJsonPatch(unittest.TestCase):
+
+    def setUp(self):
+        self.document = {
+            'current_stage': 1,
+            'stages': [{'type': 'pause'}, {'type': 'english', 'amount': 100}],
+            'results': [{'bidder_id': '1', 'amount': 100}]
+        }
+
+    def test_equal_documents(self):
+        self.assertEqual(make_json_patch(self.document, deepcopy(self.document)), [])
+
+    def test_changed_values(self):
+        new_document = deepcopy(self.document)
+        new_document['current_stage'] = 2
+        new_document['stages'][1]['time'] = 'now'
+        new_document['stages'][1]['amount'] = 150
+
+        patch = make_json_patch(self.document, new_document)
+
+        self.assertItemsEqual(patch, [
+            {'op': 'replace', 'path': '/current_stage', 'value': 2},
+            {'op': 'add', 'path': '/stages/1/time', 'value': 'now'},
+            {'op': 'replace', 'path': '/stages/1/amount', 'value': 150},
+        ])
+
+    def test_appended_stages(self):
+        new_document = deepcopy(self.document)
+        new_document['stages'].extend([{'type': 'pause'}, {'type': 'english', 'amount': 200}])
+
+        patch = make_json_patch(self.document, new_document)
+
+        self.assertEqual(patch, [
+            {'op': 'add', 'path': '/stages/-', 'value': {'type': 'pause'}},
+            {'op': 'add', 'path': '/stages/-', 'value': {'type': 'english', 'amount': 200}},
+        ])
+
+    def test_removed_values(self):
+        new_document = deepcopy(self.document)
+        del new_document['results']
+        new_document['stages'] = new_document['stages'][:1]
+
+        patch = make_json_patch(self.document, new_document)
+
+        self.assertItemsEqual(patch, [
+            {'op': 'remove', 'path': '/results'},
+            {'op': 'remove', 'path': '/stages/1'},
+        ])
+
+    def test_escaped_keys(self):
+        patch = make_json_patch({}, {'a/b~c': 1})
+
+        self.assertEqual(patch, [{'op': 'add', 'path': '/a~1b~0c', 'value': 1}])
+
+
+class TestApplyJsonPatch(unittest.TestCase):
+
+    def test_apply_made_patch(self):
+        document = {
+            'current_stage': 1,
+            'stages': [{'type': 'pause'}, {'type': 'english', 'amount': 100}],
+            'a/b~c': 1,
+            'removed': True
+        }
+        new_document = deepcopy(document)
+        new_document['current_stage'] = 2
+        new_document['stages'][1]['amount'] = 150
+        new_document['stages'].append({'type': 'pause'})
+        new_document['a/b~c'] = 2
+        del new_document['removed']
+
+        patched = apply_json_patch(deepcopy(document), make_json_patch(document, new_document))
+
+        self.assertEqual(patched, new_document)
+
+    def test_values_are_copied(self):
+        value = {'type': 'pause'}
+        document = {'stages': []}
+
+        apply_json_patch(document, [{'op': 'add', 'path': '/stages/-', 'value': value}])
+        value['type'] = 'changed'
+
+        self.assertEqual(document, {'stages': [{'type': 'pause'}]})
+
+    def test_insert_into_list(self):
+        document = {'stages': [1, 3]}
+
+        apply_json_patch(document, [{'op': 'add', 'path': '/stages/1', 'value': 2}])
+
+        self.assertEqual(document, {'stages': [1, 2, 3]})
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestMakeJsonPatch))
+    tests.addTest(unittest.makeSuite(TestApplyJsonPatch))
+    return tests
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from openprocurement.auction.texas.event_log import EventLog
+
+
+class TestEventLog(unittest.TestCase):
+
+    def setUp(self):
+        self.log = EventLog(size=3)
+
+    def add(self, frame, bidders=None):
+        sequence, event_id = self.log.next_id()
+        self.log.append(sequence, frame, bidders)
+        return event_id
+
+    def test_ids(self):
+        first = self.log.next_id()
+        second = self.log.next_id()
+
+        self.assertEqual(first, (1, '{}-1'.format(self.log.epoch)))
+        self.assertEqual(second, (2, '{}-2'.format(self.log.epoch)))
+        self.assertNotEqual(EventLog().epoch, self.log.epoch)
+
+    def test_replay(self):
+        first = self.add('first')
+        self.add('second', ['bidder_1'])
+        self.add('third', ['bidder_2'])
+
+        self.assertEqual(self.log.replay(first, 'bidder_1'), ['second'])
+        self.assertEqual(self.log.replay(first, 'bidder_2'), ['third'])
+
+    def test_replay_up_to_date(self):
+        self.add('first')
+        last = self.add('second')
+
+        self.assertEqual(self.log.replay(last, 'bidder_1'), [])
+
+    def test_replay_evicted(self):
+        first = self.add('first')
+        second = self.add('second')
+        for frame in ('third', 'fourth', 'fifth'):
+            self.add(frame)
+
+        self.assertEqual(len(self.log), 3)
+        self.assertIsNone(self.log.replay(first, 'bidder_1'))
+        self.assertEqual(self.log.replay(second, 'bidder_1'), ['third', 'fourth', 'fifth'])
+
+    def test_replay_unknown(self):
+        self.add('first')
+
+        self.assertIsNone(self.log.replay('other-1', 'bidder_1'))
+        self.assertIsNone(self.log.replay('{}-5'.format(self.log.epoch), 'bidder_1'))
+        self.assertIsNone(self.log.replay('{}-x'.format(self.log.epoch), 'bidder_1'))
+        self.assertIsNone(self.log.replay('', 'bidder_1'))
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestEventLog))
+    return tests
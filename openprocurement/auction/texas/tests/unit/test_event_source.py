@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import gevent
+import mock
+from gevent.queue import Queue
+
+from openprocurement.auction.texas.amount import Amount
+from openprocurement.auction.texas.channels import StreamRegistry, STOP_SSE
+from openprocurement.auction.texas.debounce import Debouncer
+from openprocurement.auction.texas.event_source import (
+    encode_event, send_event, send_event_to_client, send_clients_list, broadcast, stop_client, release_stream, SseStream
+)
+from openprocurement.auction.texas.metrics import METRICS
+from openprocurement.auction.texas.server import initialize_application
+from openprocurement.auction.texas.tests.unit.utils import create_test_app
+
+
+class EventSourceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.app = initialize_application()
+        self.app.auction_bidders = {
+            'bidder_1': {'clients': {}, 'channels': {'client_1': Queue(), 'client_2': Queue()}},
+            'bidder_2': {'clients': {}, 'channels': {'client_3': Queue()}},
+        }
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        self.app_context.pop()
+
+    def channel(self, bidder, client):
+        return self.app.auction_bidders[bidder]['channels'][client]
+
+
+class TestEncodeEvent(EventSourceTestCase):
+
+    def test_frame(self):
+        frame = encode_event('Tick', {'time': '2018-01-01T00:00:00'})
+
+        self.assertIsInstance(frame, str)
+        self.assertEqual(frame, 'event: Tick\ndata: {"time": "2018-01-01T00:00:00"}\n\n')
+
+    def test_unicode(self):
+        frame = encode_event(u'ClientsList', {u'name': u'Учасник'})
+
+        self.assertIsInstance(frame, str)
+        self.assertTrue(frame.startswith('event: ClientsList\ndata: '))
+
+    def test_amount(self):
+        self.assertEqual(encode_event('Bid', {'amount': Amount(15025)}), 'event: Bid\ndata: {"amount": 150.25}\n\n')
+
+    def test_event_id(self):
+        self.assertEqual(encode_event('Bid', {}, 'abc-1'), 'id: abc-1\nevent: Bid\ndata: {}\n\n')
+
+
+class TestSendEvent(EventSourceTestCase):
+
+    def test_send_event_shares_frame(self):
+        send_event('bidder_1', {'client_1': {}}, 'ClientsList')
+
+        first = self.channel('bidder_1', 'client_1').get_nowait()
+        second = self.channel('bidder_1', 'client_2').get_nowait()
+        self.assertIs(first, second)
+        self.assertTrue(first.startswith('id: {}-1\nevent: ClientsList\n'.format(self.app.event_log.epoch)))
+        self.assertTrue(self.channel('bidder_2', 'client_3').empty())
+        self.assertEqual(METRICS.snapshot()['counters'], {'sse.encoded': 1, 'sse.delivered': 2})
+
+    def test_broadcast(self):
+        broadcast({'time': 'now'}, 'Tick')
+
+        frames = [self.channel(bidder, client).get_nowait()
+                  for bidder, client in [('bidder_1', 'client_1'), ('bidder_1', 'client_2'), ('bidder_2', 'client_3')]]
+        self.assertEqual(len(set(map(id, frames))), 1)
+        self.assertEqual(METRICS.snapshot()['counters'], {'sse.encoded': 1, 'sse.delivered': 3})
+
+    def test_send_event_to_client(self):
+        send_event_to_client('bidder_1', 'client_2', {'client_id': 'client_2'}, 'Identification')
+        send_event_to_client('bidder_1', 'unknown', {}, 'Identification')
+        send_event_to_client('unknown', 'client_2', {}, 'Identification')
+
+        self.assertTrue(self.channel('bidder_1', 'client_1').empty())
+        self.assertEqual(
+            self.channel('bidder_1', 'client_2').get_nowait(),
+            'event: Identification\ndata: {"client_id": "client_2"}\n\n'
+        )
+
+    def test_send_clients_list(self):
+        self.app.debouncer = Debouncer(window=0.01)
+        clients = self.app.auction_bidders['bidder_1']['clients']
+
+        for client in ['client_1', 'client_2', 'client_3']:
+            clients[client] = {}
+            send_clients_list('bidder_1')
+
+        channel = self.channel('bidder_1', 'client_1')
+        self.assertEqual(len(channel), 1)
+        self.assertIn('data: {"client_1": {}}\n', channel.get_nowait())
+
+        gevent.sleep(0.015)
+
+        self.assertEqual(len(channel), 1)
+        self.assertIn('data: {"client_1": {}, "client_2": {}, "client_3": {}}\n', channel.get_nowait())
+        self.assertEqual(METRICS.snapshot()['counters']['sse.debounced'], 1)
+
+    def test_unknown_bidder(self):
+        send_event('unknown', {}, 'ClientsList')
+
+        self.assertEqual(METRICS.snapshot()['counters'], {'sse.encoded': 1, 'sse.delivered': 0})
+
+
+class TestSseStream(EventSourceTestCase):
+
+    def test_stream(self):
+        channel = self.channel('bidder_1', 'client_1')
+        send_event('bidder_1', {}, 'ClientsList')
+        channel.put({'event': 'KickClient', 'data': {'from': 'client_2'}})
+        stop_client('bidder_1', 'client_1')
+        send_event('bidder_1', {}, 'ClientsList')
+
+        frames = list(SseStream(channel, bidder_id='bidder_1', client_id='client_1'))
+
+        self.assertEqual(frames, [
+            'retry: 2000\n\n',
+            'id: {}-1\nevent: ClientsList\ndata: {{}}\n\n'.format(self.app.event_log.epoch),
+            'event: KickClient\ndata: {"from": "client_2"}\n\n',
+        ])
+        self.assertEqual(len(channel), 1)
+
+    def test_close(self):
+        on_close = mock.MagicMock()
+
+        SseStream(Queue(), on_close=on_close).close()
+
+        on_close.assert_called_once_with()
+
+    def test_timeout(self):
+        channel = Queue()
+
+        frames = list(SseStream(channel, timeout=0.01))
+
+        self.assertEqual(frames, ['retry: 2000\n\n'])
+
+
+class TestEventSourceView(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.client = create_test_app()
+        self.app = self.client.application
+        self.app.debouncer = Debouncer(window=0)
+        self.bidder = self.app.context['bidders_data'][0]['id']
+        self.session = {
+            'remote_oauth': (u'aMALGpjnB1iyBwXJM6betfgT4usHqw', ''),
+            'client_id': 'client_1'
+        }
+        self.patch_session = mock.patch('openprocurement.auction.texas.event_source.session', self.session)
+        self.patch_session.start()
+        self.patch_get_bidder_id = mock.patch(
+            'openprocurement.auction.texas.event_source.get_bidder_id',
+            return_value={'bidder_id': self.bidder}
+        )
+        self.patch_get_bidder_id.start()
+
+    def tearDown(self):
+        self.patch_session.stop()
+        self.patch_get_bidder_id.stop()
+
+    def connect(self, last_event_id=None):
+        headers = {'Last-Event-ID': last_event_id} if last_event_id else {}
+        response = self.client.get('/event_source', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        channel = self.app.auction_bidders[self.bidder]['channels']['client_1']
+        frames = []
+        while not channel.empty():
+            frames.append(channel.get_nowait())
+        return frames
+
+    def get_event_id(self, frame):
+        return frame.split('\n', 1)[0][len('id: '):]
+
+    def test_connect(self):
+        frames = self.connect()
+
+        self.assertEqual(len(frames), 2)
+        self.assertIn('event: Identification\n', frames[0])
+        self.assertIn('event: ClientsList\n', frames[1])
+
+    def test_unknown_bidder(self):
+        self.patch_get_bidder_id.stop()
+        self.patch_get_bidder_id = mock.patch(
+            'openprocurement.auction.texas.event_source.get_bidder_id',
+            return_value={'bidder_id': 'unknown'}
+        )
+        self.patch_get_bidder_id.start()
+
+        response = self.client.get('/event_source')
+
+        self.assertIn('event: Close\n', ''.join(str(chunk) for chunk in response.response))
+        self.assertNotIn('unknown', self.app.auction_bidders)
+
+    def test_resume(self):
+        clients_list = self.connect()[1]
+        with self.app.app_context():
+            send_event(self.bidder, {'status': 'ok'}, 'BidAccepted')
+            send_event('other_bidder', {}, 'BidAccepted')
+            broadcast({'status': 'started'}, 'Started')
+
+        frames = self.connect(self.get_event_id(clients_list))
+
+        self.assertEqual(len(frames), 3)
+        self.assertIn('event: BidAccepted\ndata: {"status": "ok"}', frames[0])
+        self.assertIn('event: Started\n', frames[1])
+        self.assertIn('event: ClientsList\n', frames[2])
+        self.assertEqual(METRICS.snapshot()['counters']['sse.replayed'], 2)
+
+        frames = self.connect(self.get_event_id(frames[2]))
+        self.assertEqual(len(frames), 1)
+        self.assertIn('event: ClientsList\n', frames[0])
+
+    def test_resume_too_many_events(self):
+        self.app.config['event_source'] = {'channel_size': 2}
+        clients_list = self.connect()[1]
+        with self.app.app_context():
+            for index in range(3):
+                send_event(self.bidder, {'index': index}, 'BidAccepted')
+
+        frames = self.connect(self.get_event_id(clients_list))
+
+        self.assertEqual(len(frames), 2)
+        self.assertIn('event: Identification\n', frames[0])
+        self.assertEqual(self.app.auction_bidders[self.bidder]['channels']['client_1'].size, 2)
+
+    def test_stream_limits(self):
+        self.app.streams = StreamRegistry(max_streams=10, max_streams_per_bidder=1)
+        self.connect()
+        first = self.app.auction_bidders[self.bidder]['channels']['client_1']
+        self.session['client_id'] = 'client_2'
+
+        response = self.client.get('/event_source')
+
+        channels = self.app.auction_bidders[self.bidder]['channels']
+        clients = self.app.auction_bidders[self.bidder]['clients']
+        self.assertEqual(list(channels), ['client_2'])
+        self.assertEqual(list(clients), ['client_2'])
+        self.assertEqual(first.get_nowait(), {'event': STOP_SSE})
+        frames = [channels['client_2'].get_nowait() for _ in range(len(channels['client_2']))]
+        self.assertIn('data: {"client_2": ', frames[-1])
+        self.assertEqual(METRICS.snapshot()['gauges']['sse.streams'], 1)
+
+        response.close()
+
+        self.assertEqual(channels, {})
+        self.assertEqual(clients, {})
+        self.assertEqual(len(self.app.streams), 0)
+        self.assertEqual(METRICS.snapshot()['gauges']['sse.streams'], 0)
+
+    def test_reconnect_keeps_client(self):
+        self.connect()
+        first = self.app.auction_bidders[self.bidder]['channels']['client_1']
+
+        frames = self.connect()
+
+        self.assertEqual(first.get_nowait(), {'event': STOP_SSE})
+        self.assertEqual(list(self.app.auction_bidders[self.bidder]['clients']), ['client_1'])
+        self.assertEqual(len(frames), 2)
+        self.assertIn('data: {"client_1": ', frames[1])
+
+    def test_closed_stream_is_removed_from_clients_list(self):
+        self.connect()
+        other = self.app.auction_bidders[self.bidder]['channels']['client_1']
+        self.session['client_id'] = 'client_2'
+        response = self.client.get('/event_source')
+        channel = self.app.auction_bidders[self.bidder]['channels']['client_2']
+        while not channel.empty():
+            channel.get_nowait()
+
+        response.close()
+
+        self.assertEqual(list(self.app.auction_bidders[self.bidder]['clients']), ['client_1'])
+        frames = [other.get_nowait() for _ in range(len(other))]
+        self.assertIn('event: ClientsList\ndata: {"client_1": ', frames[-1])
+        self.assertNotIn('client_2', frames[-1])
+
+    def test_resumed_client_is_in_clients_list(self):
+        clients_list = self.connect()[1]
+        self.session['client_id'] = 'client_2'
+        self.client.get('/event_source')
+        other = self.app.auction_bidders[self.bidder]['channels']['client_2']
+        self.session['client_id'] = 'client_1'
+        # Client is dropped from list when its stream is closed, like
+        # after slow consumer eviction
+        with self.app.app_context():
+            release_stream(self.app, self.app.auction_bidders[self.bidder]['channels']['client_1'])
+        self.assertNotIn('client_1', self.app.auction_bidders[self.bidder]['clients'])
+
+        frames = self.connect(self.get_event_id(clients_list))
+
+        self.assertIn('event: ClientsList\n', frames[-1])
+        self.assertIn('"client_1": ', frames[-1])
+        frames = [other.get_nowait() for _ in range(len(other))]
+        self.assertIn('event: ClientsList\n', frames[-1])
+        self.assertIn('"client_1": ', frames[-1])
+
+    def test_auction_state(self):
+        state = self.app.context['auction_state']
+        state.publish({'_id': 'auction', 'current_stage': 0})
+
+        response = self.client.get('/auction_state')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertEqual(len(state), 1)
+        channel = list(state.subscribers)[0]
+        self.assertIn('event: AuctionState\n', channel.get_nowait())
+
+        response.close()
+
+        self.assertEqual(len(state), 0)
+
+    def test_resume_unknown_event(self):
+        self.connect()
+
+        frames = self.connect('otherepoch-1')
+
+        self.assertEqual(len(frames), 2)
+        self.assertIn('event: Identification\n', frames[0])
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestEncodeEvent))
+    tests.addTest(unittest.makeSuite(TestSendEvent))
+    tests.addTest(unittest.makeSuite(TestSseStream))
+    tests.addTest(unittest.makeSuite(TestEventSourceView))
+    return tests
@@ -3,7 +3,9 @@ import unittest
 from uuid import uuid4
 
 import mock
+from gevent import spawn_later
 from munch import munchify
+from openprocurement.auction.texas.amount import Amount
 from openprocurement.auction.texas.bids import BidsHandler
 
 from openprocurement.auction.texas.constants import MAIN_ROUND, PAUSE
@@ -104,6 +106,63 @@ class TestFormValidation(unittest.TestCase):
 
         self.assertEqual(valid, True)
 
+    def test_bid_value_fractional_minimal_step(self):
+        self.auction_document.update({
+            'current_stage': 0,
+            'stages': [{'type': MAIN_ROUND, 'amount': 0.3}],
+            'minimalStep': {'amount': 0.1, 'currency': 'UAH'}
+        })
+        self.bids_form.bidder_id.data = self.auction_data['bidder_id']
+        self.bids_form.bid.data = 0.7
+
+        self.assertEqual(self.bids_form.validate(), True)
+
+        self.bids_form.bid.data = 0.75
+        self.assertEqual(self.bids_form.validate(), False)
+
+    def test_bid_value_imprecise_minimal_step(self):
+        self.auction_document.update({
+            'current_stage': 0,
+            'stages': [{'type': MAIN_ROUND, 'amount': 100}],
+            'minimalStep': {'amount': 0.125, 'currency': 'UAH'}
+        })
+        self.bids_form.bidder_id.data = self.auction_data['bidder_id']
+        self.bids_form.bid.data = 104
+
+        self.assertEqual(self.bids_form.validate(), True)
+
+        self.bids_form.bid.data = 104.5
+        self.assertEqual(self.bids_form.validate(), False)
+
+    def test_bid_value_invalid_document_amount(self):
+        self.auction_document.update({
+            'current_stage': 0,
+            'stages': [{'type': MAIN_ROUND, 'amount': 100}],
+            'minimalStep': {'amount': 'abc'}
+        })
+        self.bids_form.bidder_id.data = self.auction_data['bidder_id']
+        self.bids_form.bid.data = 150
+
+        self.assertEqual(self.bids_form.validate(), False)
+        self.assertEqual({'bid': [u'Auction document has invalid amount']}, self.bids_form.errors)
+
+    def test_bid_value_parsed_from_json(self):
+        form = BidsForm.from_json({'bidder_id': self.auction_data['bidder_id'], 'bid': '150.10'})
+        self.assertEqual(form.data['bid'], Amount(15010))
+
+        form = BidsForm.from_json({'bidder_id': self.auction_data['bidder_id'], 'bid': 'abc'})
+        form.document = self.auction_document
+        self.assertEqual(form.validate(), False)
+        self.assertEqual(form.errors, {'bid': [u'Bid amount is required']})
+
+    def test_bid_value_is_not_rounded(self):
+        form = BidsForm.from_json({'bidder_id': self.auction_data['bidder_id'], 'bid': 150.005})
+        form.document = self.auction_document
+
+        self.assertIsNone(form.data['bid'])
+        self.assertEqual(form.validate(), False)
+        self.assertEqual(form.errors, {'bid': [u'Amount must have at most 2 decimal places']})
+
 
 class TestFormHandler(unittest.TestCase):
 
@@ -184,22 +243,84 @@ class TestFormHandler(unittest.TestCase):
             res, {'status': 'failed', 'errors': {'bid': [u'Bid amount is required'], 'bidder_id': [u'No bidder id']}}
         )
 
-    def test_form_handler_another_bid_is_processing(self):
+    def test_form_handler_waits_for_processing_bid(self):
         self.auction_document.update({
             'current_stage': 0,
             'stages': [{'type': MAIN_ROUND, 'amount': self.auction_data['amount']}],
             'minimalStep': {'amount': self.auction_data['minimalStep']}
         })
         self.app.application.context['auction_document'] = self.auction_document
-        self.app.application.context['server_actions'].acquire()
+        self.app.application.bids_handler.add_bid = mock.MagicMock(return_value=True)
+        server_actions = self.app.application.context['server_actions']
+        server_actions.acquire()
+        spawn_later(0.1, server_actions.release)
         self.request.json = {'bidder_id': self.auction_data['bidder_id'], 'bid': 150}
 
         with self.app.application.test_request_context():
             res = self.app.application.form_handler()
 
+        self.assertEqual(res['status'], 'ok')
+        self.assertEqual(self.app.application.bids_handler.add_bid.call_count, 1)
+        self.assertFalse(server_actions.locked())
+
+    def test_form_handler_bid_not_admitted(self):
+        self.auction_document.update({
+            'current_stage': 0,
+            'stages': [{'type': MAIN_ROUND, 'amount': self.auction_data['amount']}],
+            'minimalStep': {'amount': self.auction_data['minimalStep']}
+        })
+        self.app.application.context['auction_document'] = self.auction_document
+        self.app.application.context['bids_queue'].timeout = 0.1
+        server_actions = self.app.application.context['server_actions']
+        server_actions.acquire()
+        self.request.json = {'bidder_id': self.auction_data['bidder_id'], 'bid': 150}
+
+        with self.app.application.test_request_context():
+            res = self.app.application.form_handler()
+        server_actions.release()
+
         self.assertEqual(
-            res, {'status': 'failed', 'errors': {'bid': [u'Another bid is already processing']}}
+            res, {'status': 'failed', 'errors': {'bid': [u'Bid was not processed in time, try again']}}
+        )
+
+    def test_form_handler_retry_with_key(self):
+        self.auction_document.update({
+            'current_stage': 0,
+            'stages': [{'type': MAIN_ROUND, 'amount': self.auction_data['amount']}],
+            'minimalStep': {'amount': self.auction_data['minimalStep']}
+        })
+        self.app.application.context['auction_document'] = self.auction_document
+        self.app.application.bids_handler.add_bid = mock.MagicMock(return_value=True)
+        self.request.json = {'bidder_id': self.auction_data['bidder_id'], 'bid': 150}
+
+        with self.app.application.test_request_context():
+            res = self.app.application.form_handler(bid_key='key')
+            retry_res = self.app.application.form_handler(bid_key='key')
+
+        self.assertEqual(res['status'], 'ok')
+        self.assertIs(retry_res, res)
+        self.assertEqual(self.app.application.bids_handler.add_bid.call_count, 1)
+
+    def test_form_handler_retry_after_transient_failure(self):
+        self.auction_document.update({
+            'current_stage': 0,
+            'stages': [{'type': MAIN_ROUND, 'amount': self.auction_data['amount']}],
+            'minimalStep': {'amount': self.auction_data['minimalStep']}
+        })
+        self.app.application.context['auction_document'] = self.auction_document
+        add_bid_results = [Exception('Database is not available'), True]
+        self.app.application.bids_handler.add_bid = mock.MagicMock(
+            side_effect=lambda *args: add_bid_results.pop(0)
         )
+        self.request.json = {'bidder_id': self.auction_data['bidder_id'], 'bid': 150}
+
+        with self.app.application.test_request_context():
+            res = self.app.application.form_handler(bid_key='key')
+            retry_res = self.app.application.form_handler(bid_key='key')
+
+        self.assertEqual(res['status'], 'failed')
+        self.assertEqual(retry_res['status'], 'ok')
+        self.assertEqual(self.app.application.bids_handler.add_bid.call_count, 2)
 
 
 def suite():
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from gevent import spawn, sleep
+from munch import munchify
+
+from openprocurement.auction.texas.idempotency import BidOutcomes, get_idempotency_key
+from openprocurement.auction.texas.metrics import METRICS
+
+
+class TestGetIdempotencyKey(unittest.TestCase):
+
+    def test_key_from_header(self):
+        request = munchify({'headers': {'Idempotency-Key': 'header-key'}, 'json': {'bid_key': 'body-key'}})
+        self.assertEqual(get_idempotency_key(request), u'header-key')
+
+    def test_key_from_body(self):
+        request = munchify({'headers': {}, 'json': {'bid_key': 'body-key'}})
+        self.assertEqual(get_idempotency_key(request), u'body-key')
+
+    def test_no_key(self):
+        request = munchify({'headers': {}, 'json': None})
+        self.assertIsNone(get_idempotency_key(request))
+
+
+class TestBidOutcomes(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.outcomes = BidOutcomes(max_size=2, timeout=0.1)
+
+    def test_claim_and_resolve(self):
+        outcome, claimed = self.outcomes.claim('bidder', 'key')
+        self.assertTrue(claimed)
+        self.outcomes.resolve(outcome, {'status': 'ok'})
+
+        retry, claimed = self.outcomes.claim('bidder', 'key')
+        self.assertFalse(claimed)
+        self.assertEqual(self.outcomes.wait(retry), {'status': 'ok'})
+        self.assertEqual(METRICS.snapshot()['counters']['bid_outcomes.hits'], 1)
+
+    def test_keys_are_scoped_by_bidder(self):
+        self.outcomes.claim('bidder', 'key')
+        self.assertTrue(self.outcomes.claim('other_bidder', 'key')[1])
+
+    def test_retry_waits_for_processing(self):
+        outcome, _ = self.outcomes.claim('bidder', 'key')
+        retry = spawn(lambda: self.outcomes.wait(self.outcomes.claim('bidder', 'key')[0]))
+        sleep(0)
+        self.outcomes.resolve(outcome, {'status': 'ok'})
+
+        self.assertEqual(retry.get(), {'status': 'ok'})
+
+    def test_wait_timeout(self):
+        outcome, _ = self.outcomes.claim('bidder', 'key')
+        self.assertIsNone(self.outcomes.wait(outcome))
+
+    def test_discard(self):
+        outcome, _ = self.outcomes.claim('bidder', 'key')
+        self.outcomes.discard('bidder', 'key', outcome, {'status': 'failed'})
+
+        self.assertEqual(self.outcomes.wait(outcome), {'status': 'failed'})
+        self.assertTrue(self.outcomes.claim('bidder', 'key')[1])
+
+    def test_least_recently_used_are_evicted(self):
+        self.outcomes.claim('bidder', 'first')
+        self.outcomes.claim('bidder', 'second')
+        self.outcomes.claim('bidder', 'first')
+        self.outcomes.claim('bidder', 'third')
+
+        self.assertEqual(len(self.outcomes), 2)
+        self.assertFalse(self.outcomes.claim('bidder', 'first')[1])
+        self.assertTrue(self.outcomes.claim('bidder', 'second')[1])
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestGetIdempotencyKey))
+    tests.addTest(unittest.makeSuite(TestBidOutcomes))
+    return tests
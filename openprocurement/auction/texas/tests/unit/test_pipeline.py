@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import mock
+from gevent import sleep
+
+from openprocurement.auction.texas.metrics import METRICS
+from openprocurement.auction.texas.pipeline import PostCommitPipeline
+
+
+class TestPostCommitPipeline(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.pipeline = PostCommitPipeline()
+        self.done = []
+
+        self.patch_logger = mock.patch('openprocurement.auction.texas.pipeline.LOGGER')
+        self.mocked_logger = self.patch_logger.start()
+
+    def tearDown(self):
+        self.patch_logger.stop()
+
+    def action(self, name, duration=0):
+        sleep(duration)
+        self.done.append(name)
+
+    def test_actions_run_in_background(self):
+        self.pipeline.submit('first', self.action, 'first')
+
+        self.assertEqual(self.done, [])
+        self.assertEqual(len(self.pipeline), 1)
+        self.assertTrue(self.pipeline.drain(timeout=1))
+        self.assertEqual(self.done, ['first'])
+
+    def test_order(self):
+        self.pipeline.submit('first', self.action, 'first', 0.02)
+        self.pipeline.submit('second', self.action, 'second')
+        sleep(0)
+        self.pipeline.submit('third', self.action, 'third')
+
+        self.assertTrue(self.pipeline.drain(timeout=1))
+        self.assertEqual(self.done, ['first', 'second', 'third'])
+
+    def test_failed_action(self):
+        def fail():
+            raise ValueError('failed')
+        self.pipeline.submit('fail', fail)
+        self.pipeline.submit('second', self.action, 'second')
+
+        self.assertTrue(self.pipeline.drain(timeout=1))
+        self.assertEqual(self.done, ['second'])
+        self.assertEqual(self.mocked_logger.error.call_count, 1)
+        self.assertEqual(METRICS.snapshot()['counters']['post_commit.failed'], 1)
+
+    def test_drain_timeout(self):
+        self.pipeline.submit('slow', self.action, 'slow', 0.5)
+
+        self.assertFalse(self.pipeline.drain(timeout=0.01))
+
+    def test_submit_after_drain(self):
+        self.pipeline.submit('first', self.action, 'first')
+        self.pipeline.drain(timeout=1)
+        self.pipeline.submit('second', self.action, 'second')
+
+        self.assertTrue(self.pipeline.drain(timeout=1))
+        self.assertEqual(self.done, ['first', 'second'])
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestPostCommitPipeline))
+    return tests
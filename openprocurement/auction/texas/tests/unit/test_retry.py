@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import mock
+
+from openprocurement.auction.texas.metrics import METRICS
+from openprocurement.auction.texas.retry import BREAKERS, CircuitBreaker, RetryPolicy
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.patch_time = mock.patch('openprocurement.auction.texas.retry.time')
+        self.mocked_time = self.patch_time.start()
+        self.mocked_time.return_value = 100
+        self.breaker = CircuitBreaker('test', threshold=3, reset_timeout=10)
+
+    def tearDown(self):
+        self.patch_time.stop()
+
+    def test_opens_after_threshold(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(METRICS.snapshot()['gauges']['test.circuit_breaker.open'], 1)
+        self.assertEqual(METRICS.snapshot()['counters']['test.circuit_breaker.opened'], 1)
+        self.assertEqual(METRICS.snapshot()['counters']['test.circuit_breaker.rejected'], 1)
+
+    def test_success_resets_failures(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_trial(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+        self.mocked_time.return_value = 110
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        self.mocked_time.return_value = 120
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(METRICS.snapshot()['gauges']['test.circuit_breaker.open'], 0)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        BREAKERS.clear()
+
+    def test_from_config(self):
+        policy = RetryPolicy.from_config('database', 'key', {
+            'retries': '5',
+            'retry_backoff': 1,
+            'retry_backoff_max': 2,
+            'retry_jitter': 0,
+            'circuit_breaker_threshold': 7,
+            'circuit_breaker_timeout': 60
+        })
+
+        self.assertEqual(policy.retries, 5)
+        self.assertEqual(policy.backoff, 1)
+        self.assertEqual(policy.backoff_max, 2)
+        self.assertEqual(policy.jitter, 0)
+        self.assertEqual(policy.breaker.threshold, 7)
+        self.assertEqual(policy.breaker.reset_timeout, 60)
+
+    def test_shared_breaker(self):
+        first_policy = RetryPolicy.from_config('database', 'key', {})
+        second_policy = RetryPolicy.from_config('database', 'key', {})
+        other_policy = RetryPolicy.from_config('database', 'other key', {})
+
+        self.assertIs(first_policy.breaker, second_policy.breaker)
+        self.assertIsNot(first_policy.breaker, other_policy.breaker)
+
+    def test_exponential_backoff(self):
+        policy = RetryPolicy(None, backoff=0.5, backoff_max=3, jitter=0)
+
+        self.assertEqual([policy.get_delay(attempt) for attempt in range(4)], [0.5, 1, 2, 3])
+
+    def test_jitter(self):
+        policy = RetryPolicy(None, backoff=1, backoff_max=10, jitter=0.5)
+
+        for _ in range(100):
+            delay = policy.get_delay(1)
+            self.assertTrue(1 <= delay <= 2)
+
+    @mock.patch('openprocurement.auction.texas.retry.sleep')
+    def test_wait(self, mocked_sleep):
+        policy = RetryPolicy(CircuitBreaker('test'), retries=2, backoff=1, jitter=0)
+
+        policy.wait(0)
+        mocked_sleep.assert_called_once_with(1)
+
+        policy.wait(1)
+        self.assertEqual(mocked_sleep.call_count, 1)
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestCircuitBreaker))
+    tests.addTest(unittest.makeSuite(TestRetryPolicy))
+    return tests
@@ -3,11 +3,16 @@ import mock
 from copy import deepcopy
 
 
+from apscheduler.jobstores.base import JobLookupError
+
 from openprocurement.auction.texas.constants import (
     DEADLINE_HOUR,
     END,
+    MAIN_ROUND,
+    PAUSE,
     PREANNOUNCEMENT
 )
+from openprocurement.auction.texas.pipeline import PostCommitPipeline
 from openprocurement.auction.texas.scheduler import JobService
 
 
@@ -69,9 +74,30 @@ class TestEndingMainRoundJob(TestScheduler):
             'date',
             run_date=job_start_date,
             name='End of Auction',
-            id='auction:{}'.format(END)
+            id='auction:{}'.format(END),
+            replace_existing=True
         )
 
+    def test_reschedule_ending_main_round_job(self):
+        job = self.mocked_SCHEDULER.add_job.return_value
+
+        self.job_service.add_ending_main_round_job('start_date')
+        self.job_service.add_ending_main_round_job('new_start_date')
+
+        self.assertEqual(self.mocked_SCHEDULER.add_job.call_count, 1)
+        self.assertEqual(self.mocked_SCHEDULER.remove_all_jobs.call_count, 0)
+        job.reschedule.assert_called_once_with('date', run_date='new_start_date')
+
+    def test_add_fired_ending_main_round_job(self):
+        job = self.mocked_SCHEDULER.add_job.return_value
+        job.reschedule.side_effect = JobLookupError('auction:{}'.format(END))
+
+        self.job_service.add_ending_main_round_job('start_date')
+        self.job_service.add_ending_main_round_job('new_start_date')
+
+        self.assertEqual(self.mocked_SCHEDULER.add_job.call_count, 2)
+        self.assertEqual(self.mocked_SCHEDULER.add_job.call_args[1]['run_date'], 'new_start_date')
+
 
 class TestPauseJob(TestScheduler):
 
@@ -88,15 +114,33 @@ class TestPauseJob(TestScheduler):
             'date',
             run_date=job_start_date,
             name='End of Pause',
-            id='auction:pause'
+            id='auction:pause',
+            replace_existing=True
         )
 
+    def test_cancel_pause_job(self):
+        job = self.mocked_SCHEDULER.add_job.return_value
+        self.job_service.add_pause_job('start_date')
+
+        self.job_service.cancel_pause_job()
+        job.remove.assert_called_once_with()
+
+        job.remove.side_effect = JobLookupError('auction:pause')
+        self.job_service.add_pause_job('start_date')
+        self.job_service.cancel_pause_job()
+        self.job_service.cancel_pause_job()
+        self.assertEqual(job.remove.call_count, 2)
+
 
 class TestSwitchToNextStage(TestScheduler):
 
     def test_switch_to_next_stage(self):
         default_current_stage = 0
-        auction_document = {'current_stage': default_current_stage}
+        auction_document = {
+            'current_stage': default_current_stage,
+            'stages': [{'type': PAUSE}, {'type': MAIN_ROUND}]
+        }
+        self.job_service.context['auction_document'] = auction_document
         self.mocked_update_auction_document.return_value.__enter__.return_value = auction_document
 
         self.job_service.switch_to_next_stage()
@@ -109,6 +153,19 @@ class TestSwitchToNextStage(TestScheduler):
 
         self.assertEqual(auction_document['current_stage'], default_current_stage + 1)
 
+    def test_switch_from_not_pause(self):
+        auction_document = {
+            'current_stage': 1,
+            'stages': [{'type': PAUSE}, {'type': MAIN_ROUND}]
+        }
+        self.job_service.context['auction_document'] = auction_document
+
+        self.job_service.switch_to_next_stage()
+
+        self.assertEqual(self.mocked_lock_server.call_count, 1)
+        self.assertEqual(self.mocked_update_auction_document.call_count, 0)
+        self.assertEqual(auction_document['current_stage'], 1)
+
 
 class TestEndAuction(TestScheduler):
 
@@ -217,6 +274,28 @@ class TestEndAuction(TestScheduler):
         self.assertEqual(self.job_service.context['auction_document'], final_document)
         self.assertEqual(self.job_service.context['auction_protocol'], self.final_protocol)
 
+    def test_end_auction_waits_for_post_commit(self):
+        post_commit = PostCommitPipeline()
+        self.job_service.context['post_commit'] = post_commit
+        second_protocol = {'second': 'protocol'}
+
+        def update_protocol():
+            self.job_service.context['auction_protocol'] = second_protocol
+        post_commit.submit('protocol', update_protocol)
+
+        self.job_service.end_auction()
+
+        self.assertEqual(len(post_commit), 0)
+        self.assertEqual(self.mocked_approve_protocol.call_args[0][1], second_protocol)
+
+    def test_end_auction_closes_bids_journal(self):
+        acknowledgement = mock.MagicMock()
+        self.job_service.context['bid_acknowledgement'] = acknowledgement
+
+        self.job_service.end_auction()
+
+        acknowledgement.close.assert_called_once_with()
+
     def test_end_auction_with_server(self):
         auction_document_before_approval = deepcopy(self.auction_document)
         auction_document_before_approval['stages'].append(
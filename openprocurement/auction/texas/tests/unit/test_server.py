@@ -242,6 +242,12 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(res.status, '401 UNAUTHORIZED')
         self.assertEqual(res.status_code, 401)
 
+    def test_server_metrics(self):
+        res = self.app.get('/metrics')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(set(json.loads(res.data).keys()), {'counters', 'gauges', 'histograms'})
+
     def test_server_kickclient(self):
         app = self.app
         s = {
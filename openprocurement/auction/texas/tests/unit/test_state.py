@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from openprocurement.auction.texas.channels import Channel
+from openprocurement.auction.texas.metrics import METRICS
+from openprocurement.auction.texas.state import AuctionStateChannel
+
+
+class TestAuctionStateChannel(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.state = AuctionStateChannel(log_size=2)
+        self.document = {'_id': 'auction', '_rev': '1-a', 'current_stage': 0, 'stages': [{'amount': 100}]}
+        self.state.publish(self.document)
+
+    def frames(self, channel):
+        frames = []
+        while not channel.empty():
+            frames.append(channel.get_nowait())
+        return frames
+
+    def parse(self, frame):
+        lines = frame.strip().split('\n')
+        return lines[0][len('id: '):], lines[1][len('event: '):], json.loads(lines[2][len('data: '):])
+
+    def commit(self, **changes):
+        document = dict(self.document, _rev=self.document['_rev'] + 'x', **changes)
+        self.document = document
+        self.state.publish(document)
+
+    def test_snapshot(self):
+        channel = Channel()
+
+        self.state.subscribe(channel)
+
+        frames = self.frames(channel)
+        self.assertEqual(len(frames), 1)
+        _, event, data = self.parse(frames[0])
+        self.assertEqual(event, 'AuctionState')
+        self.assertEqual(data, {'_id': 'auction', 'current_stage': 0, 'stages': [{'amount': 100}]})
+        self.assertEqual(len(self.state), 1)
+
+    def test_snapshot_is_encoded_once(self):
+        first, second = Channel(), Channel()
+        self.state.subscribe(first)
+        self.state.subscribe(second)
+
+        self.assertIs(self.frames(first)[0], self.frames(second)[0])
+
+    def test_patch(self):
+        first, second = Channel(), Channel()
+        self.state.subscribe(first)
+        self.state.subscribe(second)
+        self.frames(first), self.frames(second)
+
+        self.commit(current_stage=1, stages=[{'amount': 100}, {'amount': 200}])
+
+        frame = self.frames(first)[0]
+        self.assertIs(frame, self.frames(second)[0])
+        _, event, data = self.parse(frame)
+        self.assertEqual(event, 'AuctionPatch')
+        self.assertEqual(data, [
+            {'op': 'replace', 'path': '/current_stage', 'value': 1},
+            {'op': 'add', 'path': '/stages/-', 'value': {'amount': 200}},
+        ])
+        self.assertEqual(METRICS.snapshot()['counters']['auction_state.patches'], 1)
+
+    def test_only_private_changes(self):
+        channel = Channel()
+        self.state.subscribe(channel)
+        self.frames(channel)
+
+        self.commit()
+
+        self.assertEqual(self.frames(channel), [])
+
+    def test_resume(self):
+        self.state.subscribe(Channel())
+        channel = Channel()
+        self.state.subscribe(channel)
+        self.frames(channel)
+        self.commit(current_stage=1)
+        patch_id, _, _ = self.parse(self.frames(channel)[0])
+        self.state.unsubscribe(channel)
+        self.commit(current_stage=2)
+
+        channel = Channel()
+        self.state.subscribe(channel, patch_id)
+
+        frames = self.frames(channel)
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(self.parse(frames[0])[2], [{'op': 'replace', 'path': '/current_stage', 'value': 2}])
+
+    def test_resume_after_changes_without_subscribers(self):
+        channel = Channel()
+        self.state.subscribe(channel)
+        snapshot_id, _, _ = self.parse(self.frames(channel)[0])
+        self.state.unsubscribe(channel)
+        self.commit(current_stage=1)
+        self.commit(current_stage=2)
+
+        self.state.subscribe(channel, snapshot_id)
+
+        _, event, data = self.parse(self.frames(channel)[0])
+        self.assertEqual(event, 'AuctionState')
+        self.assertEqual(data['current_stage'], 2)
+
+    def test_evicted_subscriber(self):
+        channel = Channel(size=1)
+        self.state.subscribe(channel)
+
+        self.commit(current_stage=1)
+
+        self.assertTrue(channel.evicted)
+        self.commit(current_stage=2)
+        self.assertEqual(len(self.state), 0)
+
+    def test_subscribe_before_document(self):
+        state = AuctionStateChannel()
+        channel = Channel()
+        state.subscribe(channel)
+
+        self.assertEqual(self.frames(channel), [])
+
+        state.publish(self.document)
+
+        self.assertEqual(self.parse(self.frames(channel)[0])[1], 'AuctionState')
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestAuctionStateChannel))
+    return tests
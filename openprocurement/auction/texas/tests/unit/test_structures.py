@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import unittest
+from copy import deepcopy
+
+from openprocurement.auction.texas.context import DictContext
+from openprocurement.auction.texas.structures import FrozenDict
+
+
+class TestFrozenDict(unittest.TestCase):
+
+    def test_mapping(self):
+        frozen = FrozenDict({'a': 1}, b=2)
+
+        self.assertEqual(dict(frozen), {'a': 1, 'b': 2})
+        self.assertEqual(len(frozen), 2)
+        self.assertIn('a', frozen)
+        self.assertEqual(frozen.get('c', 3), 3)
+        self.assertEqual(frozen, FrozenDict(a=1, b=2))
+        self.assertEqual(hash(frozen), hash(FrozenDict(a=1, b=2)))
+
+    def test_immutable(self):
+        frozen = FrozenDict(a=1)
+        with self.assertRaises(TypeError):
+            frozen['a'] = 2
+        with self.assertRaises(AttributeError):
+            frozen.update({'a': 2})
+
+    def test_shared_by_reference(self):
+        frozen = FrozenDict(a=FrozenDict(b=1))
+        self.assertIs(deepcopy(frozen), frozen)
+
+        context = DictContext({})
+        context['bidders_presentation'] = frozen
+        self.assertIs(context['bidders_presentation'], frozen)
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestFrozenDict))
+    return tests
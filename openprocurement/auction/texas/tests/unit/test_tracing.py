@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import mock
+from gevent import spawn
+
+from openprocurement.auction.texas.metrics import METRICS
+from openprocurement.auction.texas.tracing import (
+    trace,
+    span,
+    record,
+    get_request_id,
+    get_latency_summary,
+)
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+        self.patch_logger = mock.patch('openprocurement.auction.texas.tracing.LOGGER')
+        self.mocked_logger = self.patch_logger.start()
+
+    def tearDown(self):
+        self.patch_logger.stop()
+
+    def test_span_without_trace(self):
+        with span('phase'):
+            pass
+
+        self.assertEqual(METRICS.snapshot()['histograms']['trace.phase']['count'], 1)
+        self.assertEqual(self.mocked_logger.debug.call_count, 0)
+
+    def test_trace(self):
+        with trace('request', request_id='test-request-id') as request_id:
+            self.assertEqual(request_id, 'test-request-id')
+            self.assertEqual(get_request_id(), 'test-request-id')
+            with span('request.phase'):
+                pass
+        self.assertIsNone(get_request_id())
+
+        histograms = METRICS.snapshot()['histograms']
+        self.assertEqual(histograms['trace.request']['count'], 1)
+        self.assertEqual(histograms['trace.request.phase']['count'], 1)
+        self.assertEqual(self.mocked_logger.debug.call_count, 2)
+        for call in self.mocked_logger.debug.call_args_list:
+            self.assertEqual(call[1]['extra']['JOURNAL_REQUEST_ID'], 'test-request-id')
+
+    def test_trace_is_local_to_greenlet(self):
+        with trace('request'):
+            self.assertIsNone(spawn(get_request_id).get())
+
+    def test_span_on_error(self):
+        with self.assertRaises(ValueError):
+            with span('phase'):
+                raise ValueError()
+
+        self.assertEqual(METRICS.snapshot()['histograms']['trace.phase']['count'], 1)
+
+    def test_latency_summary(self):
+        record('phase', 1.0)
+        record('phase', 3.0)
+        METRICS.observe('other', 5.0)
+
+        self.assertEqual(get_latency_summary(), {'phase': {'count': 2, 'avg': 2.0, 'max': 3.0}})
+
+
+def suite():
+    tests = unittest.TestSuite()
+    tests.addTest(unittest.makeSuite(TestTracing))
+    return tests
@@ -4,6 +4,7 @@ import mock
 
 from datetime import datetime, timedelta
 
+from openprocurement.auction.texas.amount import Amount
 from openprocurement.auction.texas.constants import (
     DEADLINE_HOUR,
     PAUSE,
@@ -13,8 +14,11 @@ from openprocurement.auction.texas.constants import (
     ROUND_DURATION
 )
 from openprocurement.auction.texas.context import prepare_context
+from openprocurement.auction.texas.pipeline import PostCommitPipeline
+from openprocurement.auction.texas.state import AuctionStateChannel
 from openprocurement.auction.texas.utils import (
     prepare_results_stage,
+    prepare_bidders_presentation,
     prepare_auction_stages,
     prepare_end_stage,
     get_round_ending_time,
@@ -27,7 +31,8 @@ from openprocurement.auction.texas.utils import (
     approve_auction_protocol_info_on_announcement,
     approve_auction_protocol_info_on_bids_stage,
     set_absolute_deadline,
-    set_relative_deadline)
+    set_relative_deadline,
+    update_auction_document)
 
 
 class TestPrepareResultStage(unittest.TestCase):
@@ -36,7 +41,7 @@ class TestPrepareResultStage(unittest.TestCase):
         self.bidder_name = 'name_of_bidder'
         self.expected = {
             'bidder_id': 'id_of_bidder',
-            'amount': 'name_of_bidder',
+            'amount': 150.25,
             'time': 'some_time',
             'label': dict(
                 en='Bidder #{}'.format(self.bidder_name),
@@ -75,6 +80,29 @@ class TestPrepareResultStage(unittest.TestCase):
         )
         self.assertEqual(stage, self.expected)
 
+    def test_precomputed_label(self):
+        presentation = prepare_bidders_presentation({'id_of_bidder': self.bidder_name})
+        label = presentation['id_of_bidder']['label']
+
+        stage = prepare_results_stage(
+            bidder_id=self.expected['bidder_id'],
+            amount=self.expected['amount'],
+            time=self.expected['time'],
+            label=label
+        )
+        self.assertEqual(stage, self.expected)
+        self.assertIsInstance(stage['label'], dict)
+        self.assertEqual(presentation['id_of_bidder']['bidNumber'], self.bidder_name)
+
+    def test_amount(self):
+        stage = prepare_results_stage(
+            bidder_id=self.expected['bidder_id'],
+            bidder_name=self.bidder_name,
+            amount=Amount(15025, 'UAH'),
+            time=self.expected['time']
+        )
+        self.assertEqual(stage, self.expected)
+
 
 class TestPrepareAuctionStages(unittest.TestCase):
 
@@ -140,6 +168,16 @@ class TestPrepareAuctionStages(unittest.TestCase):
         stages = prepare_auction_stages(stage_start, self.auction_data, deadline)
         self.assertEqual(stages, expected)
 
+    def test_stage_amount_without_float_drift(self):
+        stage_start = datetime.now()
+        self.auction_data = {
+            'value': {'amount': 0.1, 'currency': 'UAH'},
+            'minimalStep': {'amount': 0.2, 'currency': 'UAH'}
+        }
+
+        stages = prepare_auction_stages(stage_start, self.auction_data, None)
+        self.assertEqual(stages[1]['amount'], 0.3)
+
     def test_generating_stages_after_deadline(self):
         stage_start = datetime.now().replace(hour=DEADLINE_HOUR + 2)
 
@@ -673,6 +711,42 @@ class TestSetAbsoluteDeadline(BaseDeadlineTest):
         self.assertEqual(self.context.get('deadline'), self.deadline)
 
 
+class TestUpdateAuctionDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.context = prepare_context({'type': 'dict'})
+        self.context['auction_doc_id'] = '1' * 32
+        self.context['auction_document'] = {'current_stage': 0}
+        self.database = mock.MagicMock()
+
+    def test_update(self):
+        with update_auction_document(self.context, self.database) as auction_document:
+            auction_document['current_stage'] = 1
+
+        self.database.save_auction_document.assert_called_once_with({'current_stage': 1}, '1' * 32)
+        self.assertEqual(self.context['auction_document'], {'current_stage': 1})
+
+    def test_publish_state(self):
+        self.context['auction_state'] = mock.MagicMock(spec=AuctionStateChannel)
+
+        with update_auction_document(self.context, self.database, save=False) as auction_document:
+            auction_document['current_stage'] = 1
+
+        self.assertEqual(self.database.save_auction_document.call_count, 0)
+        self.context['auction_state'].publish.assert_called_once_with({'current_stage': 1})
+
+    def test_publish_state_after_commit(self):
+        self.context['auction_state'] = mock.MagicMock(spec=AuctionStateChannel)
+        self.context['post_commit'] = PostCommitPipeline()
+
+        with update_auction_document(self.context, self.database) as auction_document:
+            auction_document['current_stage'] = 1
+
+        self.assertEqual(self.context['auction_state'].publish.call_count, 0)
+        self.assertTrue(self.context['post_commit'].drain(timeout=1))
+        self.context['auction_state'].publish.assert_called_once_with({'current_stage': 1})
+
+
 class TestSetRelativeDeadline(BaseDeadlineTest):
 
     def setUp(self):
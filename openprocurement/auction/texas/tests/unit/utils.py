@@ -14,6 +14,7 @@ from openprocurement.auction.texas.server import initialize_application, add_url
 from openprocurement.auction.texas.auction import Auction
 from openprocurement.auction.texas.context import IContext
 from openprocurement.auction.texas.cli import register_utilities
+from openprocurement.auction.texas.structures import FrozenDict
 
 from openprocurement.auction.texas.tests.data.data import tender_data, test_auction_document
 
@@ -72,6 +73,9 @@ def create_test_app():
     worker_app.gsm = getGlobalSiteManager()
     worker_app.context = worker_app.gsm.queryUtility(IContext)
     worker_app.context['bidders_data'] = tender_data['data']['bids']
+    worker_app.context['bidders_index'] = FrozenDict(
+        (bid['id'], FrozenDict(bid)) for bid in tender_data['data']['bids']
+    )
     worker_app.context['auction_document'] = {}
 
     worker_app.remote_oauth.authorized_response.side_effect = [None, {
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import logging
+from contextlib import contextmanager
+from time import time
+
+from gevent.local import local
+
+from openprocurement.auction.utils import generate_request_id
+
+from openprocurement.auction.texas.journal import AUCTION_WORKER_SERVICE_TRACE_SPAN
+from openprocurement.auction.texas.metrics import METRICS
+
+LOGGER = logging.getLogger("Auction Worker Texas")
+
+# Histograms of spans are stored in METRICS with this prefix
+SPAN_PREFIX = 'trace.'
+
+_local = local()
+
+
+def get_request_id():
+    """
+    Return request identifier of trace started in current greenlet
+    """
+    return getattr(_local, 'request_id', None)
+
+
+def record(name, duration):
+    """
+    Record duration of phase which was measured without span
+
+    :param name: name of phase
+    :param duration: duration of phase in seconds
+    """
+    METRICS.observe(SPAN_PREFIX + name, duration)
+    request_id = get_request_id()
+    if request_id is not None:
+        LOGGER.debug("Span {} took {:.6f} s".format(name, duration),
+                     extra={"JOURNAL_REQUEST_ID": request_id,
+                            "MESSAGE_ID": AUCTION_WORKER_SERVICE_TRACE_SPAN})
+
+
+@contextmanager
+def span(name):
+    """
+    Measure duration of the block as phase with provided name
+    """
+    start = time()
+    try:
+        yield
+    finally:
+        record(name, time() - start)
+
+
+@contextmanager
+def trace(name, request_id=None):
+    """
+    Start trace of request handled by current greenlet. Spans recorded
+    inside the block are logged with the same JOURNAL_REQUEST_ID and the
+    whole block is recorded as span with provided name.
+
+    :param name: name of span of the whole request
+    :param request_id: identifier of request, generated if not provided
+    :return: request identifier
+    """
+    _local.request_id = request_id or generate_request_id()
+    try:
+        with span(name):
+            yield _local.request_id
+    finally:
+        del _local.request_id
+
+
+def get_latency_summary():
+    """
+    Return summary of durations of all phases recorded by this worker
+
+    :return: count, average and maximum of durations in seconds by names of phases
+    """
+    summary = {}
+    for name, histogram in METRICS.snapshot()['histograms'].items():
+        if name.startswith(SPAN_PREFIX):
+            summary[name[len(SPAN_PREFIX):]] = {
+                'count': histogram['count'],
+                'avg': histogram['sum'] / histogram['count'],
+                'max': histogram['max'],
+            }
+    return summary
@@ -3,26 +3,40 @@ import iso8601
 
 from contextlib import contextmanager
 from datetime import datetime, time, timedelta
-from decimal import Decimal
 
 from openprocurement.auction.worker_core.constants import TIMEZONE
 from openprocurement.auction.worker_core.utils import prepare_service_stage
 
+from openprocurement.auction.texas.amount import Amount
 from openprocurement.auction.texas.constants import (
     PAUSE_DURATION, END, MAIN_ROUND, PAUSE, ROUND_DURATION
 )
+from openprocurement.auction.texas.database import ICoalescingDatabase
+from openprocurement.auction.texas.structures import FrozenDict
+from openprocurement.auction.texas.tracing import span
 
 
-def prepare_results_stage(bidder_id="", bidder_name="", amount="", time=""):
+def prepare_bidder_label(bidder_name):
+    return dict(
+        en="Bidder #{}".format(bidder_name),
+        uk="Учасник №{}".format(bidder_name),
+        ru="Участник №{}".format(bidder_name)
+    )
+
+
+def prepare_results_stage(bidder_id="", bidder_name="", amount="", time="", label=None):
+    """
+    Prepare result of bidder for stages and results of auction document
+
+    :param label: precomputed anonymous label of bidder, it is formatted
+                  from bidder_name if not provided
+    :type label: collections.Mapping
+    """
     stage = dict(
         bidder_id=bidder_id,
         time=str(time),
-        amount=amount or 0,
-        label=dict(
-            en="Bidder #{}".format(bidder_name),
-            uk="Учасник №{}".format(bidder_name),
-            ru="Участник №{}".format(bidder_name)
-        )
+        amount=Amount.from_value(amount or 0).to_value(),
+        label=dict(label) if label is not None else prepare_bidder_label(bidder_name)
     )
     return stage
 
@@ -40,8 +54,10 @@ def prepare_auction_stages(stage_start, auction_data, deadline, fast_forward=Fal
 
         planned_end = stage_start + timedelta(seconds=ROUND_DURATION)
         planned_end = planned_end if deadline is None or planned_end < deadline else deadline
-        stage_amount = float(Decimal(auction_data['value']['amount'] +
-                                     auction_data['minimalStep']['amount']).quantize(Decimal('0.01')))
+        stage_amount = (
+            Amount.from_document(auction_data['value']) +
+            Amount.from_document(auction_data['minimalStep'])
+        ).to_value()
         main_round_stage.update({
             'start': stage_start.isoformat(),
             'type': MAIN_ROUND,
@@ -99,27 +115,89 @@ def get_bids(results):
     return bids_information
 
 
+def prepare_opened_bidder(bid_information):
+    name = bid_information["tenderers"][0]["name"]
+    return {
+        'bidNumber': bid_information.get('bidNumber', ''),
+        'label': {'uk': name, 'en': name, 'ru': name}
+    }
+
+
+def prepare_bidders_presentation(bids_mapping):
+    """
+    Prepare presentation records of bidders: bid number and anonymous label.
+    Records are built once and shared by every result of bidder, instead of
+    formatting labels for each of them.
+
+    :param bids_mapping: bid numbers by bidder identifiers
+    :type bids_mapping: dict
+    :rtype: openprocurement.auction.texas.structures.FrozenDict
+    """
+    return FrozenDict(
+        (bidder_id, FrozenDict(
+            bidNumber=bid_number,
+            label=FrozenDict(prepare_bidder_label(bid_number))
+        ))
+        for bidder_id, bid_number in bids_mapping.items()
+    )
+
+
 def open_bidders_name(auction_document, bids_information):
+    # Opened name of bidder is prepared once for all of the bidder entries
+    opened_bidders = {}
     for field in ['initial_bids', 'results', 'stages']:
-        for index, stage in enumerate(auction_document[field]):
-            if 'bidder_id' in stage and stage['bidder_id'] in bids_information:
-                auction_document[field][index].update({
-                    'bidNumber': bids_information[stage['bidder_id']].get('bidNumber', ''),
-                    "label": {
-                        'uk': bids_information[stage['bidder_id']]["tenderers"][0]["name"],
-                        'en': bids_information[stage['bidder_id']]["tenderers"][0]["name"],
-                        'ru': bids_information[stage['bidder_id']]["tenderers"][0]["name"],
-                    }
-                })
+        for stage in auction_document[field]:
+            bidder_id = stage.get('bidder_id')
+            if bidder_id not in bids_information:
+                continue
+            if bidder_id not in opened_bidders:
+                opened_bidders[bidder_id] = prepare_opened_bidder(bids_information[bidder_id])
+            opened_bidder = opened_bidders[bidder_id]
+            stage.update({
+                'bidNumber': opened_bidder['bidNumber'],
+                'label': dict(opened_bidder['label'])
+            })
     return auction_document
 
 
 @contextmanager
-def update_auction_document(context, database):
+def update_auction_document(context, database, flush=True, save=True):
+    """
+    Yield auction document from context and save it after changes were made
+
+    :param context: Shared mapping for auction worker
+    :type context: openprocurement.auction.texas.context.IContext
+    :param database: Database to save auction document to
+    :type database: openprocurement.auction.texas.database.IDatabase
+    :param flush: Save document immediately. Otherwise saving could be
+                  postponed and merged with following changes if database
+                  supports it, so it must be False only if changes are
+                  followed by another durable update
+    :type flush: bool
+    :param save: Save document to database at all. If False changes are
+                 only committed to context and caller is responsible for
+                 saving them later
+    :type save: bool
+    """
     auction_document = context['auction_document']
     yield auction_document
-    database.save_auction_document(auction_document, context['auction_doc_id'])
+    if save and (flush or not ICoalescingDatabase.providedBy(database)):
+        with span('database.save'):
+            database.save_auction_document(auction_document, context['auction_doc_id'])
+    elif save:
+        database.defer_auction_document_save(auction_document, context['auction_doc_id'])
     context['auction_document'] = auction_document
+    auction_state = context.get('auction_state')
+    if auction_state is None:
+        return
+    # Committed document is not changed anymore, so it is diffed on post
+    # commit pipeline, out of the lock of bids and stage switches
+    post_commit = context.get('post_commit')
+    if post_commit is not None:
+        post_commit.submit('auction_state', auction_state.publish, auction_document)
+    else:
+        with span('auction_state.publish'):
+            auction_state.publish(auction_document)
 
 
 @contextmanager
@@ -148,6 +226,9 @@ def prepare_auction_protocol(context):
 
         }
     }
+    acknowledgement = context.get('bid_acknowledgement')
+    if acknowledgement is not None:
+        auction_protocol['bid_acknowledgement'] = acknowledgement.level
     return auction_protocol
 
 
@@ -168,14 +249,19 @@ def approve_auction_protocol_info(auction_document, auction_protocol):
     return auction_protocol
 
 
-def approve_auction_protocol_info_on_bids_stage(auction_document, auction_protocol):
-    current_stage = int(auction_document['current_stage'])
-    bid = auction_document['stages'][current_stage]
-    round_number = current_stage / 2 + 1
+def approve_auction_protocol_info_on_bid(auction_protocol, stage_index, bid):
+    round_number = stage_index / 2 + 1
     auction_protocol['timeline']['round_{}'.format(round_number)] = prepare_bid_result(bid)
     return auction_protocol
 
 
+def approve_auction_protocol_info_on_bids_stage(auction_document, auction_protocol):
+    current_stage = int(auction_document['current_stage'])
+    return approve_auction_protocol_info_on_bid(
+        auction_protocol, current_stage, auction_document['stages'][current_stage]
+    )
+
+
 def approve_auction_protocol_info_on_announcement(auction_document, auction_protocol, approved=None):
     auction_protocol['timeline']['results'] = {
         "time": datetime.now(TIMEZONE).isoformat(),
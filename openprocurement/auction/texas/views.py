@@ -9,40 +9,42 @@ from flask import (
     current_app as app, request, jsonify, url_for, session, abort, redirect
 )
 
-from openprocurement.auction.event_source import (
-    send_event, send_event_to_client, remove_client,
-)
+from openprocurement.auction.event_source import remove_client
 from openprocurement.auction.utils import (
     prepare_extra_journal_fields, get_bidder_id
 )
 
+from openprocurement.auction.texas.event_source import send_clients_list, send_event_to_client
+from openprocurement.auction.texas.idempotency import get_idempotency_key
+from openprocurement.auction.texas.metrics import METRICS
+from openprocurement.auction.texas.tracing import trace, span
+
 INVALIDATE_GRANT = timedelta(0, 230)
 
 
 def login():
     if 'bidder_id' in request.args and 'hash' in request.args:
-        for bidder_info in app.context['bidders_data']:
-            if bidder_info['id'] == request.args['bidder_id']:
-                next_url = request.args.get('next') or request.referrer or None
-                if 'X-Forwarded-Path' in request.headers:
-                    callback_url = urljoin(
-                        request.headers['X-Forwarded-Path'],
-                        'authorized'
-                    )
-                else:
-                    callback_url = url_for('authorized', next=next_url, _external=True)
-                response = app.remote_oauth.authorize(
-                    callback=callback_url,
-                    bidder_id=request.args['bidder_id'],
-                    hash=request.args['hash']
+        if request.args['bidder_id'] in app.context['bidders_index']:
+            next_url = request.args.get('next') or request.referrer or None
+            if 'X-Forwarded-Path' in request.headers:
+                callback_url = urljoin(
+                    request.headers['X-Forwarded-Path'],
+                    'authorized'
                 )
-                if 'return_url' in request.args:
-                    session['return_url'] = request.args['return_url']
-                session['login_bidder_id'] = request.args['bidder_id']
-                session['login_hash'] = request.args['hash']
-                session['login_callback'] = callback_url
-                app.logger.debug("Session: {}".format(repr(session)))
-                return response
+            else:
+                callback_url = url_for('authorized', next=next_url, _external=True)
+            response = app.remote_oauth.authorize(
+                callback=callback_url,
+                bidder_id=request.args['bidder_id'],
+                hash=request.args['hash']
+            )
+            if 'return_url' in request.args:
+                session['return_url'] = request.args['return_url']
+            session['login_bidder_id'] = request.args['bidder_id']
+            session['login_hash'] = request.args['hash']
+            session['login_callback'] = callback_url
+            app.logger.debug("Session: {}".format(repr(session)))
+            return response
     return abort(401)
 
 
@@ -50,6 +52,10 @@ def health():
     return jsonify({'health': 'check'})
 
 
+def metrics():
+    return jsonify(METRICS.snapshot())
+
+
 def authorized():
     if not('error' in request.args and request.args['error'] == 'access_denied'):
         resp = app.remote_oauth.authorized_response()
@@ -127,11 +133,7 @@ def logout():
         bidder_data = get_bidder_id(app, session)
         if bidder_data:
             remove_client(bidder_data['bidder_id'], session['client_id'])
-            send_event(
-                bidder_data['bidder_id'],
-                app.auction_bidders[bidder_data['bidder_id']]["clients"],
-                "ClientsList"
-            )
+            send_clients_list(bidder_data['bidder_id'])
     session.clear()
     return redirect(
         urljoin(request.headers['X-Forwarded-Path'], '.').rstrip('/')
@@ -139,16 +141,18 @@ def logout():
 
 
 def post_bid():
-    if 'remote_oauth' in session and 'client_id' in session:
-        bidder_data = get_bidder_id(app, session)
-        if bidder_data and bidder_data['bidder_id'] == request.json['bidder_id']:
-            return jsonify(app.form_handler())
-        else:
-            app.logger.warning(
-                "Client with client id: {} and bidder_id {} wants post bid but response status from Oauth".format(
-                    session.get('client_id', 'None'), request.json.get('bidder_id', 'None')
+    with trace('bid'):
+        if 'remote_oauth' in session and 'client_id' in session:
+            with span('bid.oauth'):
+                bidder_data = get_bidder_id(app, session)
+            if bidder_data and bidder_data['bidder_id'] == request.json['bidder_id']:
+                return jsonify(app.form_handler(bid_key=get_idempotency_key(request)))
+            else:
+                app.logger.warning(
+                    "Client with client id: {} and bidder_id {} wants post bid but response status from Oauth".format(
+                        session.get('client_id', 'None'), request.json.get('bidder_id', 'None')
+                    )
                 )
-            )
     abort(401)
 
 
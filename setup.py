@@ -31,6 +31,10 @@ ENTRY_POINTS = {
     'openprocurement.auction.robottests': [
         'texas = openprocurement.auction.texas.tests.functional.main:includeme'
     ],
+    'openprocurement.auction.texas.database': [
+        'memory = openprocurement.auction.texas.memory:memory_database',
+        'sqlite = openprocurement.auction.texas.sqlite:sqlite_database'
+    ],
 }
 
 setup(name='openprocurement.auction.texas',